@@ -0,0 +1,106 @@
+"""
+压缩日志基准测试 - 比较未压缩与各压缩格式的解析吞吐
+
+用法:
+    python benchmarks/bench_compressed_logs.py --lines 200000
+"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+import tempfile
+from pathlib import Path
+
+from common import file_size_mb, print_table, timeit, write_activity_log, write_gateway_log
+
+from monitor.log_parser import LogParser
+from monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
+from utils.compression import ZSTD_AVAILABLE
+
+
+def compress_variants(plain: Path) -> list:
+    """将未压缩日志写成各压缩格式，返回 [(格式, 路径), ...]"""
+    data = plain.read_bytes()
+    variants = [("plain", plain)]
+
+    for name, suffix, compress in [
+        ("gzip", ".gz", gzip.compress),
+        ("bz2", ".bz2", bz2.compress),
+        ("xz", ".xz", lzma.compress),
+    ]:
+        path = plain.with_name(plain.name + ".1" + suffix)
+        path.write_bytes(compress(data))
+        variants.append((name, path))
+
+    if ZSTD_AVAILABLE:
+        import zstandard
+        path = plain.with_name(plain.name + ".1.zst")
+        path.write_bytes(zstandard.ZstdCompressor().compress(data))
+        variants.append(("zstd", path))
+
+    return variants
+
+
+def bench_log_parser(plain: Path, repeat: int):
+    """LogParser 单文件解析"""
+    plain_mb = file_size_mb(plain)
+    rows = []
+    for name, path in compress_variants(plain):
+        seconds, result = timeit(lambda: LogParser._parse_jsonl_file(str(path)), repeat)
+        rows.append([
+            name,
+            f"{file_size_mb(path):.1f}",
+            f"{seconds:.3f}",
+            f"{plain_mb / seconds:.1f}",
+            len(result["commands"]),
+        ])
+
+    print_table(
+        "LogParser 解析吞吐（按解压后大小计算）",
+        ["格式", "文件 MB", "秒", "MB/s", "命令数"],
+        rows,
+    )
+
+
+def bench_analyzer(plain: Path, repeat: int):
+    """OpenClawLogAnalyzer 单文件分析"""
+    plain_mb = file_size_mb(plain)
+    rows = []
+    for name, path in compress_variants(plain):
+        analyzer = OpenClawLogAnalyzer()
+        seconds, report = timeit(lambda: analyzer.analyze_file(str(path)), repeat)
+        rows.append([
+            name,
+            f"{file_size_mb(path):.1f}",
+            f"{seconds:.3f}",
+            f"{plain_mb / seconds:.1f}",
+            report["statistics"]["parsed_lines"],
+        ])
+
+    print_table(
+        "OpenClawLogAnalyzer 分析吞吐（按解压后大小计算）",
+        ["格式", "文件 MB", "秒", "MB/s", "解析行数"],
+        rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩日志解析基准测试")
+    parser.add_argument("--lines", type=int, default=200000, help="合成日志行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    if not ZSTD_AVAILABLE:
+        print("未安装 zstandard，跳过 zstd")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        activity_log = write_activity_log(Path(tmpdir) / "openclaw-2024-01-15.jsonl", args.lines)
+        gateway_log = write_gateway_log(Path(tmpdir) / "gateway.log", args.lines)
+
+        bench_log_parser(activity_log, args.repeat)
+        bench_analyzer(gateway_log, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+数据库写入基准测试 - 比较每次调用新建连接、长连接（WAL + synchronous=NORMAL）与批量写入的吞吐
+
+用法:
+    python benchmarks/bench_database.py --records 5000
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from common import print_table, timeit
+
+from db.manager import DatabaseManager
+
+
+def make_records(count: int):
+    """
+    生成合成的活动记录 (date, timestamp, activity_type, description, severity, details)
+    """
+    records = []
+    for i in range(count):
+        timestamp = f"2024-01-15T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.{i % 1000:03d}"
+        if i % 2:
+            records.append(("2024-01-15", timestamp, "command", f"ls -la /tmp/{i}", "info", None))
+        else:
+            records.append(("2024-01-15", timestamp, "file_access", f"/Users/dev/project/{i}.py",
+                            "info", {"operation": "read"}))
+    return records
+
+
+def legacy_insert(db_path: Path, records):
+    """旧实现：每条记录打开连接、插入、提交、关闭（默认 DELETE 日志模式与 synchronous=FULL）"""
+    for date, timestamp, activity_type, description, severity, details in records:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO activity_records
+                (date, timestamp, activity_type, description, severity, details)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (date, timestamp, activity_type, description, severity,
+                  json.dumps(details) if details else None))
+            conn.commit()
+        except sqlite3.IntegrityError:
+            pass
+        finally:
+            conn.close()
+
+
+def manager_insert(db_manager: DatabaseManager, records):
+    """长连接：逐条调用 add_activity_record（每条一个事务）"""
+    for record in records:
+        db_manager.add_activity_record(*record)
+
+
+def bulk_insert(db_manager: DatabaseManager, records):
+    """批量写入：bulk_add_activities（executemany + INSERT OR IGNORE，一个事务）"""
+    fields = ("date", "timestamp", "activity_type", "description", "severity", "details")
+    return db_manager.bulk_add_activities(dict(zip(fields, record)) for record in records)
+
+
+def bench(records, repeat: int):
+    """每种方式每次使用一个新的数据库文件"""
+    rows = []
+
+    def run(name: str, insert):
+        def once():
+            with tempfile.TemporaryDirectory() as tmpdir:
+                insert(Path(tmpdir) / "bench.db")
+
+        seconds, _ = timeit(once, repeat)
+        rows.append([name, f"{seconds:.3f}", f"{len(records) / seconds:,.0f}"])
+
+    def legacy(db_path: Path):
+        DatabaseManager(str(db_path), journal_mode="DELETE", synchronous="FULL").close()
+        legacy_insert(db_path, records)
+
+    def persistent(journal_mode: str, synchronous: str):
+        def insert(db_path: Path):
+            db_manager = DatabaseManager(str(db_path), journal_mode=journal_mode, synchronous=synchronous)
+            manager_insert(db_manager, records)
+            db_manager.close()
+        return insert
+
+    run("每次新建连接 (DELETE, FULL)", legacy)
+    run("长连接 (DELETE, FULL)", persistent("DELETE", "FULL"))
+    run("长连接 (WAL, FULL)", persistent("WAL", "FULL"))
+    run("长连接 (WAL, NORMAL)", persistent("WAL", "NORMAL"))
+
+    def bulk(db_path: Path):
+        db_manager = DatabaseManager(str(db_path))
+        bulk_insert(db_manager, records)
+        db_manager.close()
+
+    run("批量写入 (WAL, NORMAL)", bulk)
+
+    print_table(f"写入 {len(records):,} 条活动记录", ["方式", "秒", "条/秒"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库写入基准测试")
+    parser.add_argument("--records", type=int, default=5000, help="写入的记录数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    bench(make_records(args.records), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+事件匹配基准测试 - 比较逐个关键字判断与 EventMatcher 一次扫描的分类吞吐
+
+用法:
+    python benchmarks/bench_event_matcher.py --lines 200000
+"""
+
+import argparse
+import random
+import re
+
+from common import make_gateway_line, print_table, timeit
+
+from monitor.event_matcher import CHANNELS, EventMatcher
+from monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
+
+# 合成网关日志之外补充的消息，覆盖连接、网关、文件和各个渠道关键字
+EXTRA_MESSAGES = [
+    ("gateway listening on ws://127.0.0.1:18789", "gateway"),
+    ("canvas host mounted at /__openclaw__/canvas", "gateway/canvas"),
+    ("connection closed code=1006", "gateway/ws"),
+    ("connect ok client=control-ui", "gateway/ws"),
+    ("req models.status method=models.status", "agent"),
+    ("reading path /tmp/openclaw/workspace/notes.md", "tools"),
+    ("delivery failed: rate limited", "gateway/ws"),
+] + [(f"outbound reply via {channel} ok", "delivery") for channel in CHANNELS]
+
+
+def classify_event(message: str, subsystem: str) -> str:
+    """
+    分类事件类型：逐个关键字判断的参考实现（EventMatcher 引入前分析器的做法，作为基线和对照）
+    """
+    message_lower = message.lower()
+
+    # 运行相关
+    if 'run' in message_lower and 'embedded' in message_lower:
+        if 'start' in message_lower:
+            return 'run_start'
+        elif 'done' in message_lower or 'complete' in message_lower:
+            return 'run_complete'
+        else:
+            return 'run_event'
+
+    # 会话相关
+    if 'session' in message_lower:
+        if 'state' in message_lower:
+            return 'session_state'
+        else:
+            return 'session_event'
+
+    # 网关相关
+    if 'gateway' in subsystem.lower():
+        if 'listening' in message_lower:
+            return 'gateway_listening'
+        elif 'mounted' in message_lower:
+            return 'gateway_mounted'
+        else:
+            return 'gateway_event'
+
+    # 连接相关
+    if 'connection' in message_lower or 'connect' in message_lower:
+        if 'close' in message_lower or 'closed' in message_lower:
+            return 'connection_closed'
+        else:
+            return 'connection_event'
+
+    # 错误和警告
+    if message_lower in ['ERROR', 'WARN', 'WARNING']:
+        return 'error'
+
+    # 文件访问
+    if any(word in message_lower for word in ['file', 'path', '/users', '/tmp']):
+        return 'file_access'
+
+    return 'other'
+
+
+def extract_api_method(message: str, subsystem: str):
+    """
+    从消息中提取 API 方法名（参考实现）
+    """
+    if not message:
+        return None
+
+    subsystem_lower = (subsystem or "").lower()
+    if "gateway/ws" not in subsystem_lower and "gateway" not in subsystem_lower and "agent" not in subsystem_lower:
+        return None
+
+    # 例: "res chat.history 61ms conn=..."
+    method_match = re.search(r"\b(req|res)\b\s+([a-zA-Z][\w./:-]+)", message)
+    if method_match:
+        return method_match.group(2)
+
+    # 兜底: method=xxx
+    method_match = re.search(r"\bmethod=([a-zA-Z][\w./:-]+)", message)
+    if method_match:
+        return method_match.group(1)
+
+    # 兜底: 已知常见方法
+    message_lower = message.lower()
+    for method in ["chat.history", "agent.turn", "agent.reply", "gateway.call", "models.status", "models.list"]:
+        if method in message_lower:
+            return method
+
+    return None
+
+
+def detect_external_channel(message: str, subsystem: str):
+    """
+    检测外部对话渠道（参考实现）
+    """
+    channels = [
+        "telegram", "whatsapp", "discord", "slack", "signal",
+        "imessage", "nostr", "msteams", "mattermost", "matrix",
+        "bluebubbles", "line", "zalo", "googlechat", "webchat",
+        "wechat", "qq", "sms",
+    ]
+
+    subsystem_lower = (subsystem or "").lower()
+    message_lower = (message or "").lower()
+
+    if "gateway/channels/" in subsystem_lower:
+        return subsystem_lower.split("/")[-1]
+
+    if "gateway/ws" in subsystem_lower:
+        if "webchat" in message_lower or "control-ui" in message_lower:
+            return "webchat"
+
+    for channel in channels:
+        if channel in message_lower:
+            return channel
+
+    return None
+
+
+def build_corpus(lines: int, seed: int = 0):
+    """
+    生成 (去除 ANSI 后的消息, 子系统) 列表
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(lines):
+        if rng.random() < 0.2:
+            corpus.append(rng.choice(EXTRA_MESSAGES))
+        else:
+            data = make_gateway_line(rng, i)
+            corpus.append((OpenClawLogAnalyzer._strip_ansi(data["0"]), data["_meta"]["name"]))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件匹配基准测试")
+    parser.add_argument("--lines", type=int, default=200000, help="合成消息条数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.lines)
+    matcher = EventMatcher()
+
+    def legacy():
+        return [
+            (
+                classify_event(message, subsystem),
+                extract_api_method(message, subsystem),
+                detect_external_channel(message, subsystem),
+                "failed" in message.lower(),
+            )
+            for message, subsystem in corpus
+        ]
+
+    def combined():
+        return [matcher.match(message, subsystem, with_tokens=False)[:4] for message, subsystem in corpus]
+
+    legacy_seconds, legacy_result = timeit(legacy, args.repeat)
+    combined_seconds, combined_result = timeit(combined, args.repeat)
+
+    print_table(
+        f"事件匹配吞吐（{args.lines} 条消息）",
+        ["实现", "秒", "条/秒", "加速比"],
+        [
+            ["逐个关键字", f"{legacy_seconds:.3f}", f"{args.lines / legacy_seconds:,.0f}", "1.00x"],
+            ["EventMatcher", f"{combined_seconds:.3f}", f"{args.lines / combined_seconds:,.0f}",
+             f"{legacy_seconds / combined_seconds:.2f}x"],
+        ],
+    )
+
+    mismatches = sum(1 for old, new in zip(legacy_result, combined_result) if old != new)
+    print(f"\n结果一致: {'是' if mismatches == 0 else f'否（{mismatches} 条不同）'}")
+
+
+if __name__ == "__main__":
+    main()
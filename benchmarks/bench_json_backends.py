@@ -0,0 +1,84 @@
+"""
+JSON 解码后端基准测试 - 比较各后端在日志热循环中的吞吐
+
+用法:
+    python benchmarks/bench_json_backends.py --lines 200000
+"""
+
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from common import file_size_mb, print_table, timeit, write_activity_log, write_gateway_log
+
+from monitor.log_parser import LogParser
+from monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
+from utils.json_decoder import available_backends, get_json_loads
+
+
+def bench_decode(lines, size_mb: float, repeat: int):
+    """仅解码：bytes 行直接交给各后端，与旧的 decode + strip + json.loads 对比"""
+    import json
+
+    def legacy():
+        for line in lines:
+            json.loads(line.decode("utf-8").strip())
+
+    rows = []
+    seconds, _ = timeit(legacy, repeat)
+    rows.append(["json (str 解码后)", f"{seconds:.3f}", f"{len(lines) / seconds:,.0f}", f"{size_mb / seconds:.1f}"])
+
+    for backend in available_backends():
+        loads = get_json_loads(backend)
+        seconds, _ = timeit(lambda: [loads(line) for line in lines], repeat)
+        rows.append([backend, f"{seconds:.3f}", f"{len(lines) / seconds:,.0f}", f"{size_mb / seconds:.1f}"])
+
+    print_table("纯解码吞吐", ["后端", "秒", "行/秒", "MB/s"], rows)
+
+
+def bench_end_to_end(activity_dir: str, gateway_log: Path, repeat: int):
+    """端到端：LogParser.parse_all_logs 与 OpenClawLogAnalyzer.analyze_file"""
+    activity_mb = sum(p.stat().st_size for p in Path(activity_dir).iterdir()) / (1024 * 1024)
+    gateway_mb = file_size_mb(gateway_log)
+
+    rows = []
+    for backend in available_backends():
+        parser = LogParser([activity_dir], json_backend=backend)
+        parser_seconds, _ = timeit(
+            lambda: parser.parse_all_logs(datetime(2024, 1, 15), use_checkpoints=False),
+            repeat,
+        )
+        analyzer = OpenClawLogAnalyzer(json_backend=backend)
+        analyzer_seconds, _ = timeit(lambda: analyzer.analyze_file(str(gateway_log)), repeat)
+        rows.append([
+            backend,
+            f"{activity_mb / parser_seconds:.1f}",
+            f"{gateway_mb / analyzer_seconds:.1f}",
+        ])
+
+    print_table("端到端吞吐 (MB/s)", ["后端", "LogParser", "OpenClawLogAnalyzer"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 解码后端基准测试")
+    parser.add_argument("--lines", type=int, default=200000, help="合成日志行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    print(f"可用后端: {', '.join(available_backends())}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        activity_dir = Path(tmpdir) / "activity"
+        activity_dir.mkdir()
+        activity_log = write_activity_log(activity_dir / "openclaw-2024-01-15.jsonl", args.lines)
+        gateway_log = write_gateway_log(Path(tmpdir) / "gateway.log", args.lines)
+
+        with open(activity_log, "rb") as f:
+            lines = f.readlines()
+        bench_decode(lines, file_size_mb(activity_log), args.repeat)
+        bench_end_to_end(str(activity_dir), gateway_log, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
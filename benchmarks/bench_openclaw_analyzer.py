@@ -0,0 +1,56 @@
+"""
+OpenClawLogAnalyzer 基准测试 - 单个大文件的分块并行分析
+
+用法:
+    python benchmarks/bench_openclaw_analyzer.py --lines 500000
+"""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from common import file_size_mb, print_table, timeit, write_gateway_log
+
+from monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
+
+
+def bench_chunked(log_file: Path, max_workers: int, min_chunk_mb: float, repeat: int):
+    """对比不同进程数下 analyze_file 的吞吐"""
+    size_mb = file_size_mb(log_file)
+    rows = []
+    baseline = None
+    for workers in sorted({1, *[w for w in (2, 4, 8, 16, 32) if w <= max_workers], max_workers}):
+        analyzer = OpenClawLogAnalyzer(
+            workers=workers,
+            min_chunk_bytes=int(min_chunk_mb * 1024 * 1024),
+        )
+        seconds, report = timeit(lambda: analyzer.analyze_file(str(log_file)), repeat)
+        baseline = baseline or seconds
+        rows.append([
+            workers,
+            f"{seconds:.3f}",
+            f"{size_mb / seconds:.1f}",
+            f"{baseline / seconds:.2f}x",
+            report["statistics"]["parsed_lines"],
+        ])
+    print_table("analyze_file 分块并行加速比", ["workers", "秒", "MB/s", "加速比", "解析行数"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenClawLogAnalyzer 基准测试")
+    parser.add_argument("--lines", type=int, default=300000, help="合成日志行数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="最大进程数")
+    parser.add_argument("--min-chunk-mb", type=float, default=4, help="每个分块的最小大小（MB）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最短耗时）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = write_gateway_log(Path(tmpdir) / "openclaw-2024-01-15.log", args.lines)
+        print(f"合成数据: {args.lines} 行, {file_size_mb(log_file):.1f} MB, CPU 核心数 {os.cpu_count()}")
+
+        bench_chunked(log_file, args.workers, args.min_chunk_mb, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
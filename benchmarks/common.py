@@ -0,0 +1,148 @@
+"""
+基准测试公共工具 - 合成日志数据与计时
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# 添加项目源码目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+
+def make_activity_line(rng: random.Random, index: int, date_str: str = "2024-01-15") -> Dict:
+    """
+    生成一行合成的 JSONL 活动日志
+
+    大部分行不产生记录，少量包含命令、文件访问或错误，接近真实日志分布。
+    """
+    timestamp = f"{date_str}T{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}"
+    roll = rng.random()
+    if roll < 0.05:
+        return {"timestamp": timestamp, "level": "info", "exec": f"ls -la /tmp/{index}"}
+    if roll < 0.10:
+        return {"timestamp": timestamp, "level": "info", "path": f"/Users/dev/project/{index}.py", "read": True}
+    if roll < 0.12:
+        return {"timestamp": timestamp, "level": "error", "error": f"request {index} failed", "message": "failed"}
+    return {
+        "timestamp": timestamp,
+        "level": rng.choice(["debug", "info", "info", "info"]),
+        "message": f"heartbeat {index}",
+        "subsystem": rng.choice(["gateway", "agent", "channels"]),
+        "durationMs": rng.randint(1, 500),
+    }
+
+
+def write_activity_log(path: Path, lines: int, seed: int = 0) -> Path:
+    """
+    写入合成的 JSONL 活动日志文件
+
+    Args:
+        path: 输出路径
+        lines: 行数
+        seed: 随机种子
+
+    Returns:
+        Path: 输出路径
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            f.write(json.dumps(make_activity_line(rng, i)) + "\n")
+    return path
+
+
+def make_gateway_line(rng: random.Random, index: int, date_str: str = "2024-01-15") -> Dict:
+    """
+    生成一行合成的 OpenClaw 系统（网关）日志
+    """
+    timestamp = f"{date_str}T{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}.000Z"
+    run_id = f"{rng.randrange(16 ** 8):08x}-{index // 50:04x}"
+    roll = rng.random()
+    if roll < 0.15:
+        message = f"embedded run start: runId={run_id} sessionId={index // 200:08x}"
+        subsystem = "agent/embedded"
+    elif roll < 0.30:
+        message = f"embedded run done: runId={run_id} sessionId={index // 200:08x} durationMs={rng.randint(100, 9000)}"
+        subsystem = "agent/embedded"
+    elif roll < 0.55:
+        method = rng.choice(["chat.history", "agent.turn", "models.list", "gateway.call"])
+        message = f"\x1b[32mres\x1b[39m {method} {rng.randint(1, 900)}ms conn={rng.randrange(16 ** 6):06x} id={index}"
+        subsystem = "gateway/ws"
+    elif roll < 0.65:
+        message = f"session state changed: sessionId={index // 200:08x} active"
+        subsystem = "session"
+    elif roll < 0.75:
+        channel = rng.choice(["telegram", "discord", "slack", "webchat"])
+        message = f"inbound message from {channel} chat={rng.randint(1, 99999)}"
+        subsystem = f"gateway/channels/{channel}"
+    elif roll < 0.80:
+        message = f"failed to read file /Users/dev/project/{index}.txt: ENOENT"
+        subsystem = "tools"
+    else:
+        message = f"tick {index} heap={rng.randint(10, 900)}MB"
+        subsystem = "diagnostics"
+
+    level = "ERROR" if roll >= 0.75 and roll < 0.80 else rng.choice(["INFO", "INFO", "DEBUG", "WARN"])
+    return {
+        "0": message,
+        "_meta": {"date": timestamp, "name": subsystem, "logLevelName": level},
+        "time": timestamp,
+    }
+
+
+def write_gateway_log(path: Path, lines: int, seed: int = 0) -> Path:
+    """
+    写入合成的 OpenClaw 系统日志文件
+
+    Args:
+        path: 输出路径
+        lines: 行数
+        seed: 随机种子
+
+    Returns:
+        Path: 输出路径
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            f.write(json.dumps(make_gateway_line(rng, i)) + "\n")
+    return path
+
+
+def timeit(func: Callable[[], object], repeat: int = 3) -> Tuple[float, object]:
+    """
+    多次运行取最短耗时
+
+    Returns:
+        Tuple[float, object]: (最短耗时秒数, 最后一次的返回值)
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_table(title: str, headers: List[str], rows: List[List[object]]):
+    """
+    打印对齐的结果表格
+    """
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print(f"\n{title}")
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def file_size_mb(path: Path) -> float:
+    """返回文件大小（MB）"""
+    return os.path.getsize(path) / (1024 * 1024)
@@ -4,9 +4,12 @@
 
 import sqlite3
 import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import logging
 
 from utils.helpers import get_database_path
@@ -14,19 +17,36 @@ from utils.helpers import get_database_path
 
 logger = logging.getLogger(__name__)
 
+# 连接上缓存的预编译语句数量（sqlite3 按 SQL 文本缓存，同一连接上重复执行的语句不再重新编译）
+_CACHED_STATEMENTS = 256
+
 
 class DatabaseManager:
     """
     SQLite 数据库管理器
     管理所有数据库操作
+    
+    所有操作共用一个长连接（不再每次调用都打开、关闭连接），由一把可重入锁串行化，
+    可以在调度线程和实时跟踪的工作线程中同时使用。连接使用 WAL 日志模式，
+    synchronous=NORMAL 时提交只写入 WAL、不逐次 fsync（断电可能丢失最近的提交，但不会损坏数据库）。
+    大量写入使用 bulk_add_activities / bulk_add_security_events（executemany + INSERT OR IGNORE）。
     """
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        batch_size: int = 1000,
+    ):
         """
         初始化数据库管理器
         
         Args:
             db_path: 数据库文件路径（可选，默认为项目根的 database/openclaw_monitor.db）
+            journal_mode: SQLite 日志模式（WAL / DELETE / TRUNCATE 等）
+            synchronous: SQLite 同步模式（OFF / NORMAL / FULL）
+            batch_size: 批量写入时每次 executemany 的行数（限制内存占用）
         """
         if db_path is None:
             self.db_path = get_database_path()
@@ -35,97 +55,192 @@ class DatabaseManager:
             self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"数据库路径: {self.db_path}")
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.RLock()
+        # 嵌套的事务层数（只有最外层提交或回滚）
+        self._depth = 0
+        self._conn = self._connect(journal_mode, synchronous)
         self._init_database()
     
+    def _connect(self, journal_mode: str, synchronous: str) -> sqlite3.Connection:
+        """
+        打开长连接并设置日志与同步模式
+        
+        Args:
+            journal_mode: SQLite 日志模式
+            synchronous: SQLite 同步模式
+        
+        Returns:
+            sqlite3.Connection: 连接（行以 sqlite3.Row 返回）
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=_CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        
+        mode = conn.execute(f"PRAGMA journal_mode={journal_mode}").fetchone()[0]
+        if mode.lower() != journal_mode.lower():
+            logger.warning(f"数据库不支持 {journal_mode} 日志模式，使用 {mode}")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        在锁内执行一个事务：正常结束时提交，出错时回滚并重新抛出异常
+        
+        可以嵌套：内层的写入并入最外层的事务，只在最外层结束时提交（如一批日志记录与其安全事件）。
+        内层抛出的异常若被调用方捕获（如重复记录），已执行的其他语句不受影响。
+        
+        Yields:
+            sqlite3.Cursor: 游标
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            self._depth += 1
+            try:
+                yield cursor
+                if self._depth == 1:
+                    self._conn.commit()
+            except BaseException:
+                if self._depth == 1:
+                    self._conn.rollback()
+                raise
+            finally:
+                self._depth -= 1
+                cursor.close()
+    
+    def close(self):
+        """
+        关闭数据库连接（之后不能再使用该实例）
+        """
+        with self._lock:
+            self._conn.close()
+    
     def _init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # 创建活动记录表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS activity_records (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    activity_type TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    severity TEXT DEFAULT 'info',
-                    details TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(date, timestamp, activity_type, description)
-                )
-            """)
-            
-            # 创建安全事件表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS security_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    event_type TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    source TEXT,
-                    details TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(date, timestamp, event_type, description)
-                )
-            """)
-            
-            # 创建日报告表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS daily_reports (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT UNIQUE NOT NULL,
-                    generated_at TEXT NOT NULL,
-                    security_score INTEGER,
-                    total_events INTEGER,
-                    process_count INTEGER,
-                    command_count INTEGER,
-                    file_access_count INTEGER,
-                    security_event_count INTEGER,
-                    summary TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # 创建执行状态追踪表（支持增量更新）
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS execution_tracking (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    execution_id TEXT UNIQUE NOT NULL,
-                    execution_time TEXT NOT NULL,
-                    last_log_timestamp TEXT,
-                    last_activity_timestamp TEXT,
-                    execution_status TEXT DEFAULT 'success',
-                    data_collected INTEGER DEFAULT 0,
-                    email_sent INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # 创建索引以加快查询
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_activity_date ON activity_records(date)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_security_date ON security_events(date)
-            """)
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_report_date ON daily_reports(date)
-            """)
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                # 创建活动记录表
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS activity_records (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        activity_type TEXT NOT NULL,
+                        description TEXT NOT NULL,
+                        severity TEXT DEFAULT 'info',
+                        details TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE(date, timestamp, activity_type, description)
+                    )
+                """)
+                
+                # 创建安全事件表
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS security_events (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        event_type TEXT NOT NULL,
+                        description TEXT NOT NULL,
+                        severity TEXT NOT NULL,
+                        source TEXT,
+                        details TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE(date, timestamp, event_type, description)
+                    )
+                """)
+                
+                # 创建日报告表
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS daily_reports (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        date TEXT UNIQUE NOT NULL,
+                        generated_at TEXT NOT NULL,
+                        security_score INTEGER,
+                        total_events INTEGER,
+                        process_count INTEGER,
+                        command_count INTEGER,
+                        file_access_count INTEGER,
+                        security_event_count INTEGER,
+                        summary TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # 创建执行状态追踪表（支持增量更新）
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS execution_tracking (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        execution_id TEXT UNIQUE NOT NULL,
+                        execution_time TEXT NOT NULL,
+                        last_log_timestamp TEXT,
+                        last_activity_timestamp TEXT,
+                        execution_status TEXT DEFAULT 'success',
+                        data_collected INTEGER DEFAULT 0,
+                        email_sent INTEGER DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # 创建日志文件读取游标表（支持按字节偏移增量解析）
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS log_file_cursors (
+                        file_path TEXT PRIMARY KEY,
+                        dev INTEGER NOT NULL,
+                        ino INTEGER NOT NULL,
+                        size INTEGER NOT NULL,
+                        offset INTEGER NOT NULL,
+                        line_no INTEGER DEFAULT 0,
+                        last_line_hash TEXT,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+                
+                # 创建日志文件时间范围索引表（按目标日期筛选需要解析的文件）
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS log_file_ranges (
+                        file_path TEXT PRIMARY KEY,
+                        min_ts TEXT NOT NULL,
+                        max_ts TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+                
+                # 创建审批文件状态表与已见审批条目摘要表（增量解析 exec-approvals.json）
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS exec_approval_files (
+                        file_path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS exec_approval_hashes (
+                        file_path TEXT NOT NULL,
+                        entry_hash TEXT NOT NULL,
+                        first_seen TEXT NOT NULL,
+                        PRIMARY KEY (file_path, entry_hash)
+                    )
+                """)
+                
+                # 创建索引以加快查询
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_activity_date ON activity_records(date)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_security_date ON security_events(date)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_report_date ON daily_reports(date)
+                """)
             logger.info("数据库表初始化成功")
         
         except Exception as e:
             logger.error(f"初始化数据库失败: {e}")
             raise
-        
-        finally:
-            conn.close()
     
     def add_activity_record(
         self,
@@ -150,19 +265,15 @@ class DatabaseManager:
         Returns:
             bool: 是否添加成功
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            details_json = json.dumps(details) if details else None
-            
-            cursor.execute("""
-                INSERT INTO activity_records
-                (date, timestamp, activity_type, description, severity, details)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (date, timestamp, activity_type, description, severity, details_json))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                details_json = json.dumps(details) if details else None
+                
+                cursor.execute("""
+                    INSERT INTO activity_records
+                    (date, timestamp, activity_type, description, severity, details)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (date, timestamp, activity_type, description, severity, details_json))
             return True
         
         except sqlite3.IntegrityError:
@@ -172,9 +283,6 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"添加活动记录失败: {e}")
             return False
-        
-        finally:
-            conn.close()
     
     def add_security_event(
         self,
@@ -201,19 +309,15 @@ class DatabaseManager:
         Returns:
             bool: 是否添加成功
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            details_json = json.dumps(details) if details else None
-            
-            cursor.execute("""
-                INSERT INTO security_events
-                (date, timestamp, event_type, description, severity, source, details)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (date, timestamp, event_type, description, severity, source, details_json))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                details_json = json.dumps(details) if details else None
+                
+                cursor.execute("""
+                    INSERT INTO security_events
+                    (date, timestamp, event_type, description, severity, source, details)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (date, timestamp, event_type, description, severity, source, details_json))
             return True
         
         except sqlite3.IntegrityError:
@@ -222,9 +326,120 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"添加安全事件失败: {e}")
             return False
+    
+    def bulk_add_activities(
+        self,
+        activities: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        批量添加活动记录（一个事务，已存在的记录忽略）
+        
+        Args:
+            activities: 活动记录的可迭代对象，每条为
+                {'date', 'timestamp', 'activity_type', 'description', 'severity'（默认 info）, 'details'}
+            batch_size: 每次 executemany 的行数（默认使用构造时的 batch_size）
+        
+        Returns:
+            Dict[str, int]: {'inserted': 新增条数, 'ignored': 已存在或缺少必填字段而忽略的条数}
+        
+        Raises:
+            sqlite3.Error: 写入失败（整个事务回滚，没有任何记录写入）
+        """
+        rows = (
+            (
+                activity.get("date"),
+                activity.get("timestamp"),
+                activity.get("activity_type"),
+                activity.get("description"),
+                activity.get("severity") or "info",
+                json.dumps(activity["details"]) if activity.get("details") else None,
+            )
+            for activity in activities
+        )
+        return self._bulk_insert("""
+            INSERT OR IGNORE INTO activity_records
+            (date, timestamp, activity_type, description, severity, details)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows, batch_size, "活动记录")
+    
+    def bulk_add_security_events(
+        self,
+        events: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        批量添加安全事件（一个事务，已存在的事件忽略）
+        
+        Args:
+            events: 安全事件的可迭代对象，每条为
+                {'date', 'timestamp', 'event_type', 'description', 'severity', 'source', 'details'}
+            batch_size: 每次 executemany 的行数（默认使用构造时的 batch_size）
+        
+        Returns:
+            Dict[str, int]: {'inserted': 新增条数, 'ignored': 已存在或缺少必填字段而忽略的条数}
+        
+        Raises:
+            sqlite3.Error: 写入失败（整个事务回滚，没有任何事件写入）
+        """
+        rows = (
+            (
+                event.get("date"),
+                event.get("timestamp"),
+                event.get("event_type"),
+                event.get("description"),
+                event.get("severity"),
+                event.get("source"),
+                json.dumps(event["details"]) if event.get("details") else None,
+            )
+            for event in events
+        )
+        return self._bulk_insert("""
+            INSERT OR IGNORE INTO security_events
+            (date, timestamp, event_type, description, severity, source, details)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows, batch_size, "安全事件")
+    
+    def _bulk_insert(
+        self,
+        sql: str,
+        rows: Iterable[Tuple],
+        batch_size: Optional[int],
+        label: str,
+    ) -> Dict[str, int]:
+        """
+        在一个事务中按批 executemany 写入，按连接的累计修改行数统计新增条数
         
-        finally:
-            conn.close()
+        Args:
+            sql: INSERT OR IGNORE 语句
+            rows: 参数元组的可迭代对象（按批取出，内存占用与总行数无关）
+            batch_size: 每批行数
+            label: 日志中的数据名称
+        
+        Returns:
+            Dict[str, int]: {'inserted', 'ignored'}
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        rows = iter(rows)
+        counts = {"inserted": 0, "ignored": 0}
+        
+        try:
+            with self.transaction() as cursor:
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    before = self._conn.total_changes
+                    cursor.executemany(sql, batch)
+                    inserted = self._conn.total_changes - before
+                    counts["inserted"] += inserted
+                    counts["ignored"] += len(batch) - inserted
+        
+        except sqlite3.Error as e:
+            logger.error(f"批量添加{label}失败: {e}")
+            raise
+        
+        return counts
     
     def get_activities_by_date(self, date: str) -> List[Dict[str, Any]]:
         """
@@ -236,11 +451,8 @@ class DatabaseManager:
         Returns:
             List[Dict[str, Any]]: 活动记录列表
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        try:
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("""
                 SELECT * FROM activity_records
                 WHERE date = ?
@@ -249,9 +461,6 @@ class DatabaseManager:
             
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
-        
-        finally:
-            conn.close()
     
     def get_security_events_by_date(self, date: str) -> List[Dict[str, Any]]:
         """
@@ -263,11 +472,8 @@ class DatabaseManager:
         Returns:
             List[Dict[str, Any]]: 安全事件列表
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        try:
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("""
                 SELECT * FROM security_events
                 WHERE date = ?
@@ -276,9 +482,6 @@ class DatabaseManager:
             
             rows = cursor.fetchall()
             return [dict(row) for row in rows]
-        
-        finally:
-            conn.close()
     
     def save_daily_report(
         self,
@@ -307,34 +510,27 @@ class DatabaseManager:
         Returns:
             bool: 是否保存成功
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            generated_at = datetime.now().isoformat()
-            
-            cursor.execute("""
-                INSERT OR REPLACE INTO daily_reports
-                (date, generated_at, security_score, total_events,
-                 process_count, command_count, file_access_count,
-                 security_event_count, summary)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                date, generated_at, security_score, total_events,
-                process_count, command_count, file_access_count,
-                security_event_count, summary
-            ))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                generated_at = datetime.now().isoformat()
+                
+                cursor.execute("""
+                    INSERT OR REPLACE INTO daily_reports
+                    (date, generated_at, security_score, total_events,
+                     process_count, command_count, file_access_count,
+                     security_event_count, summary)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    date, generated_at, security_score, total_events,
+                    process_count, command_count, file_access_count,
+                    security_event_count, summary
+                ))
             logger.info(f"已保存 {date} 的日报告")
             return True
         
         except Exception as e:
             logger.error(f"保存日报告失败: {e}")
             return False
-        
-        finally:
-            conn.close()
     
     def get_report_by_date(self, date: str) -> Optional[Dict[str, Any]]:
         """
@@ -346,17 +542,11 @@ class DatabaseManager:
         Returns:
             Optional[Dict[str, Any]]: 报告信息或 None
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        try:
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("SELECT * FROM daily_reports WHERE date = ?", (date,))
             row = cursor.fetchone()
             return dict(row) if row else None
-        
-        finally:
-            conn.close()
     def record_execution(
         self,
         execution_id: str,
@@ -378,31 +568,24 @@ class DatabaseManager:
         Returns:
             bool: 是否保存成功
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            execution_time = datetime.now().isoformat()
-            
-            cursor.execute("""
-                INSERT INTO execution_tracking
-                (execution_id, execution_time, last_log_timestamp,
-                 last_activity_timestamp, execution_status, email_sent)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                execution_id, execution_time, last_log_timestamp,
-                last_activity_timestamp, status, email_sent
-            ))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                execution_time = datetime.now().isoformat()
+                
+                cursor.execute("""
+                    INSERT INTO execution_tracking
+                    (execution_id, execution_time, last_log_timestamp,
+                     last_activity_timestamp, execution_status, email_sent)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    execution_id, execution_time, last_log_timestamp,
+                    last_activity_timestamp, status, email_sent
+                ))
             return True
         
         except Exception as e:
             logger.error(f"记录执行状态失败: {e}")
             return False
-        
-        finally:
-            conn.close()
     
     def get_last_execution(self) -> Optional[Dict[str, Any]]:
         """
@@ -411,11 +594,8 @@ class DatabaseManager:
         Returns:
             Optional[Dict[str, Any]]: 上次执行信息或 None
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        try:
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("""
                 SELECT * FROM execution_tracking
                 ORDER BY execution_time DESC
@@ -423,6 +603,221 @@ class DatabaseManager:
             """)
             row = cursor.fetchone()
             return dict(row) if row else None
+    
+    def get_file_cursor(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        获取日志文件的读取游标
+        
+        Args:
+            file_path: 日志文件路径
+        
+        Returns:
+            Optional[Dict[str, Any]]: 游标信息或 None
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("SELECT * FROM log_file_cursors WHERE file_path = ?", (file_path,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def save_file_cursor(
+        self,
+        file_path: str,
+        dev: int,
+        ino: int,
+        size: int,
+        offset: int,
+        line_no: int = 0,
+        last_line_hash: Optional[str] = None,
+    ) -> bool:
+        """
+        保存日志文件的读取游标
+        
+        Args:
+            file_path: 日志文件路径
+            dev: 文件所在设备号
+            ino: 文件 inode
+            size: 读取时的文件大小
+            offset: 已读取到的字节偏移（总是位于行尾之后）
+            line_no: 已读取的行数
+            last_line_hash: 最后一行已读内容的摘要
+        
+        Returns:
+            bool: 是否保存成功
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO log_file_cursors
+                    (file_path, dev, ino, size, offset, line_no, last_line_hash, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    file_path, dev, ino, size, offset, line_no,
+                    last_line_hash, datetime.now().isoformat()
+                ))
+            return True
         
-        finally:
-            conn.close()
\ No newline at end of file
+        except Exception as e:
+            logger.error(f"保存日志游标失败: {e}")
+            return False
+    
+    def delete_file_cursor(self, file_path: str) -> bool:
+        """
+        删除日志文件的读取游标（文件被删除、截断或轮转后从头读取）
+        
+        Args:
+            file_path: 日志文件路径
+        
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("DELETE FROM log_file_cursors WHERE file_path = ?", (file_path,))
+            return True
+        
+        except Exception as e:
+            logger.error(f"删除日志游标失败: {e}")
+            return False
+    
+    def get_file_ranges(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取日志文件的时间范围索引
+        
+        Args:
+            file_paths: 日志文件路径列表
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: {文件路径: {'min_ts', 'max_ts', 'size', 'mtime_ns'}}
+        """
+        if not file_paths:
+            return {}
+        
+        with self._lock:
+            cursor = self._conn.cursor()
+            ranges = {}
+            # SQLite 对单条语句的参数个数有限制，分批查询
+            for i in range(0, len(file_paths), 500):
+                batch = file_paths[i:i + 500]
+                cursor.execute(
+                    f"SELECT * FROM log_file_ranges WHERE file_path IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                for row in cursor.fetchall():
+                    ranges[row["file_path"]] = dict(row)
+            return ranges
+    
+    def save_file_range(
+        self,
+        file_path: str,
+        min_ts: str,
+        max_ts: str,
+        size: int,
+        mtime_ns: int,
+    ) -> bool:
+        """
+        保存日志文件的时间范围索引
+        
+        Args:
+            file_path: 日志文件路径
+            min_ts: 文件中最早的时间戳
+            max_ts: 文件中最晚的时间戳
+            size: 建立索引时的文件大小
+            mtime_ns: 建立索引时的文件修改时间（纳秒）
+        
+        Returns:
+            bool: 是否保存成功
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO log_file_ranges
+                    (file_path, min_ts, max_ts, size, mtime_ns, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (file_path, min_ts, max_ts, size, mtime_ns, datetime.now().isoformat()))
+            return True
+        
+        except Exception as e:
+            logger.error(f"保存日志时间范围失败: {e}")
+            return False
+    
+    def get_exec_approvals_state(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        获取审批文件上次解析时的状态
+        
+        Args:
+            file_path: 审批文件路径
+        
+        Returns:
+            Optional[Dict[str, Any]]: {'size', 'mtime_ns'} 或 None
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("SELECT * FROM exec_approval_files WHERE file_path = ?", (file_path,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def get_seen_approval_hashes(self, file_path: str, entry_hashes: List[str]) -> set:
+        """
+        查询哪些审批条目摘要已经处理过
+        
+        Args:
+            file_path: 审批文件路径
+            entry_hashes: 待查询的条目摘要
+        
+        Returns:
+            set: 已处理过的摘要
+        """
+        if not entry_hashes:
+            return set()
+        
+        with self._lock:
+            cursor = self._conn.cursor()
+            seen = set()
+            # SQLite 对单条语句的参数个数有限制，分批查询
+            for i in range(0, len(entry_hashes), 500):
+                batch = entry_hashes[i:i + 500]
+                cursor.execute(
+                    f"SELECT entry_hash FROM exec_approval_hashes "
+                    f"WHERE file_path = ? AND entry_hash IN ({','.join('?' * len(batch))})",
+                    [file_path] + batch,
+                )
+                seen.update(row[0] for row in cursor.fetchall())
+            return seen
+    
+    def save_exec_approvals_state(
+        self,
+        file_path: str,
+        size: int,
+        mtime_ns: int,
+        entry_hashes: List[str],
+    ) -> bool:
+        """
+        保存审批文件的解析状态和新处理的条目摘要（同一事务）
+        
+        Args:
+            file_path: 审批文件路径
+            size: 解析时的文件大小
+            mtime_ns: 解析时的文件修改时间（纳秒）
+            entry_hashes: 本次新处理的条目摘要
+        
+        Returns:
+            bool: 是否保存成功
+        """
+        now = datetime.now().isoformat()
+        
+        try:
+            with self.transaction() as cursor:
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO exec_approval_hashes (file_path, entry_hash, first_seen)
+                    VALUES (?, ?, ?)
+                """, [(file_path, entry_hash, now) for entry_hash in entry_hashes])
+                cursor.execute("""
+                    INSERT OR REPLACE INTO exec_approval_files (file_path, size, mtime_ns, updated_at)
+                    VALUES (?, ?, ?, ?)
+                """, (file_path, size, mtime_ns, now))
+            return True
+        
+        except Exception as e:
+            logger.error(f"保存审批文件状态失败: {e}")
+            return False
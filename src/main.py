@@ -2,12 +2,15 @@
 主程序 - OpenClawMonitor 入口点和调度器
 """
 
+import os
 import sys
 import logging
 import re
+import sqlite3
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent.parent
@@ -16,11 +19,15 @@ sys.path.insert(0, str(project_root / "src"))
 
 from config import get_config
 from utils.logger import setup_logger
+from utils.helpers import chunked, get_project_root, utc_day_window
+from utils.compression import strip_compression_suffix
+from utils.path_resolver import PathResolver
 from monitor.process_monitor import ProcessMonitor
-from monitor.log_parser import LogParser
+from monitor.log_parser import LogParser, RECORD_COMMAND, RECORD_FILE_ACCESS
 from monitor.security_analyzer import SecurityAnalyzer
 from monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
 from monitor.openclaw_report_generator import OpenClawReportGenerator
+from monitor.live_tail import LiveTail, SYSTEM_LOG_PATTERN
 from db.manager import DatabaseManager
 from report.generator import ReportGenerator
 from report.notifier.email_sender import EmailNotifier
@@ -53,13 +60,19 @@ class OpenClawMonitor:
         logger.info(f"配置已加载: {config_path or '使用默认配置'}")
         
         # 初始化各个组件
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager(
+            journal_mode=self.config.database.journal_mode,
+            synchronous=self.config.database.synchronous,
+            batch_size=self.config.database.batch_size,
+        )
         self.process_monitor = ProcessMonitor()
-        self.log_parser = LogParser(self.config.log_paths.paths)
+        self.log_parser = self._create_log_parser()
         self.security_analyzer = SecurityAnalyzer()
         self.report_generator = ReportGenerator()
-        self.openclaw_log_analyzer = OpenClawLogAnalyzer()
+        self.openclaw_log_analyzer = self._create_openclaw_log_analyzer(state_dir=self._analyzer_state_dir())
         self.openclaw_report_generator = OpenClawReportGenerator()
+        # 系统日志（*.log）与活动日志位于相同的目录，单独解析（不使用活动日志的时间范围索引）
+        self.system_log_resolver = PathResolver(self.config.log_paths.paths)
         self.email_notifier = EmailNotifier(
             smtp_server=self.config.email.smtp_server,
             smtp_port=self.config.email.smtp_port,
@@ -72,38 +85,99 @@ class OpenClawMonitor:
         # 初始化调度器
         self.scheduler = Scheduler()
         
+        # 实时跟踪（start_live_tail 时创建）；与每日批处理共用写库锁，避免同时推进读取游标
+        self.live_tail = None
+        self._ingest_lock = threading.RLock()
+        
         logger.info("OpenClawMonitor 初始化完成")
     
-    def analyze_openclaw_logs(self, log_file_path: str = None):
+    def _create_log_parser(self) -> LogParser:
         """
-        分析 OpenClaw 系统日志并生成报告
+        创建活动日志解析器
+        
+        Returns:
+            LogParser: 使用数据库保存读取游标和时间范围索引的解析器
+        """
+        return LogParser(
+            self.config.log_paths.paths,
+            cursor_store=self.db_manager,
+            workers=self.config.parsing.workers,
+            pool_chunksize=self.config.parsing.pool_chunksize,
+            pool_max_task_bytes=self.config.parsing.pool_max_task_mb * 1024 * 1024,
+            json_backend=self.config.parsing.json_backend,
+            prefilter=self.config.parsing.prefilter,
+            min_level=self.config.parsing.min_level,
+            seek_by_timestamp=self.config.parsing.seek_by_timestamp,
+            range_index=self.db_manager,
+        )
+    
+    def _create_openclaw_log_analyzer(self, state_dir: Optional[str] = None) -> OpenClawLogAnalyzer:
+        """
+        创建系统日志分析器
         
         Args:
-            log_file_path: 日志文件路径（默认为最新的 /private/tmp/openclaw 下的日志）
+            state_dir: 分析快照目录（None 表示不使用快照）
         
         Returns:
-            str: 报告 HTML 内容
+            OpenClawLogAnalyzer: 分析器
         """
-        # 如果未指定文件，查找默认位置
-        if log_file_path is None:
-            from pathlib import Path
-            import glob
-            
-            openclaw_dir = Path("/private/tmp/openclaw/")
-            if openclaw_dir.exists():
-                log_files = sorted(glob.glob(str(openclaw_dir / "*.log")), reverse=True)
-                if log_files:
-                    log_file_path = log_files[0]
-                    logger.info(f"使用默认日志文件: {log_file_path}")
-        
-        if not log_file_path:
-            logger.error("未找到 OpenClaw 日志文件")
+        return OpenClawLogAnalyzer(
+            workers=self.config.parsing.analyzer_workers,
+            min_chunk_bytes=self.config.parsing.analyzer_min_chunk_mb * 1024 * 1024,
+            json_backend=self.config.parsing.json_backend,
+            state_dir=state_dir,
+            run_timeout_minutes=self.config.parsing.analyzer_run_timeout_minutes,
+            max_error_templates=self.config.parsing.analyzer_max_error_templates,
+            max_lifecycle_entries=self.config.parsing.analyzer_max_lifecycle_entries,
+            bucket_minutes=self.config.parsing.analyzer_bucket_minutes,
+        )
+    
+    def _analyzer_state_dir(self) -> Optional[str]:
+        """
+        获取系统日志分析快照目录
+        
+        Returns:
+            Optional[str]: 绝对路径；未配置时为 None
+        """
+        state_dir = self.config.parsing.analyzer_state_dir
+        if not state_dir:
             return None
         
-        logger.info(f"开始分析 OpenClaw 日志: {log_file_path}")
+        path = Path(os.path.expanduser(state_dir))
+        if not path.is_absolute():
+            path = get_project_root() / path
+        return str(path)
+    
+    def analyze_openclaw_logs(self, log_file_path: str = None, target_date: datetime = None):
+        """
+        分析 OpenClaw 系统日志并生成报告
+        
+        Args:
+            log_file_path: 日志文件路径（默认分析所有配置的日志目录中目标日期的系统日志）
+            target_date: 目标日期（默认为昨天），只统计当天（本地时间）的事件
         
-        # 分析日志
-        analysis_data = self.openclaw_log_analyzer.analyze_file(log_file_path)
+        Returns:
+            str: 报告 HTML 内容
+        """
+        if log_file_path:
+            logger.info(f"开始分析 OpenClaw 日志: {log_file_path}")
+            analysis_data = self.openclaw_log_analyzer.analyze_file(log_file_path)
+        else:
+            if target_date is None:
+                target_date = datetime.now() - timedelta(days=1)
+            
+            window_start = datetime.combine(target_date.date(), datetime.min.time())
+            log_files = self._find_system_logs(target_date, window_start.timestamp())
+            if not log_files:
+                logger.error("未找到 OpenClaw 日志文件")
+                return None
+            
+            logger.info(f"开始分析 {len(log_files)} 个 OpenClaw 日志文件: {', '.join(log_files)}")
+            
+            # 系统日志时间戳为 UTC，窗口按本地日期换算（与日志路径解析的时间范围筛选一致）
+            window = utc_day_window(target_date)
+            analysis_data = self.openclaw_log_analyzer.analyze_files(log_files, window)
+            self.openclaw_log_analyzer.prune_snapshots()
         
         # 打印摘要
         summary = self.openclaw_log_analyzer.get_summary()
@@ -126,6 +200,36 @@ class OpenClawMonitor:
         
         return html_report
 
+    def _find_system_logs(self, target_date: datetime, modified_since: float) -> List[str]:
+        """
+        在所有配置的日志目录中查找目标日期的 OpenClaw 系统日志（*.log 及其轮转、压缩文件）
+        
+        同一文件的不同路径（如 /tmp 与 /private/tmp）只保留一个；
+        最后修改时间早于 modified_since 的文件不可能包含目标日期的日志，直接跳过。
+        
+        Args:
+            target_date: 目标日期
+            modified_since: 修改时间下界（Unix 时间戳）
+        
+        Returns:
+            List[str]: 日志文件路径，按修改时间从旧到新排序
+        """
+        found_logs = self.system_log_resolver.resolve_all_logs(target_date)
+        
+        log_files = []
+        for files in found_logs.values():
+            for file_path in files:
+                if not SYSTEM_LOG_PATTERN.search(strip_compression_suffix(file_path)):
+                    continue
+                try:
+                    mtime = os.path.getmtime(file_path)
+                except OSError:
+                    continue
+                if mtime >= modified_since:
+                    log_files.append((mtime, file_path))
+        
+        return [file_path for _, file_path in sorted(log_files)]
+    
     @staticmethod
     def _extract_html_body(html_content: Optional[str]) -> str:
         """
@@ -172,13 +276,19 @@ class OpenClawMonitor:
 
         return base_html + injected_section
     
-    def collect_daily_data(self, target_date=None, since_timestamp: Optional[str] = None):
+    def collect_daily_data(
+        self,
+        target_date=None,
+        since_timestamp: Optional[str] = None,
+        use_checkpoints: bool = True,
+    ):
         """
         收集某一天的数据（支持增量更新）
         
         Args:
             target_date: 目标日期（默认为昨天）
             since_timestamp: 仅收集此时间戳之后的新数据（用于增量更新）
+            use_checkpoints: 是否从日志文件上次读取到的字节偏移处继续解析
         
         Returns:
             dict: 收集的数据
@@ -195,92 +305,213 @@ class OpenClawMonitor:
         logger.debug("收集进程数据...")
         processes = self.process_monitor.collect(target_date)
         
-        # 2. 解析日志（支持增量）
+        # 2. 解析日志（支持增量，惰性读取，在保存时逐批消费）
         logger.debug("解析日志文件...")
-        log_data = self.log_parser.parse_all_logs(target_date, since_timestamp)
+        records = self.log_parser.iter_records(target_date, since_timestamp, use_checkpoints)
         
-        # 3. 解析命令执行审批
-        logger.debug("解析命令执行审批...")
-        approvals = self.log_parser.parse_exec_approvals()
+        # 3. 解析命令执行审批（惰性读取，在保存时逐批消费）
+        approvals = self._iter_approvals()
         
-        # 4. 分析安全事件
-        logger.debug("分析安全事件...")
-        self.security_analyzer.collect(target_date, log_data)
-        security_analysis = self.security_analyzer.analyze()
-        
-        # 合并数据
+        # 合并数据（日志记录、审批与安全分析在 save_to_database 中流式完成）
         collected_data = {
             "date": date_str,
+            "target_date": target_date,
             "processes": processes,
-            "commands": log_data.get("commands", []) + approvals,
-            "file_accesses": log_data.get("file_accesses", []),
-            "events": security_analysis.get("events", []),
-            "security_score": security_analysis.get("security_score", 0),
-            "missing_logs": log_data.get("missing_logs", False),
+            "approvals": approvals,
+            "records": records,
+            "missing_logs": records.missing_logs,
         }
         
         logger.info(f"数据收集完成: {len(processes)} 个进程, "
-                   f"{len(collected_data['commands'])} 条命令, "
-                   f"{len(collected_data['events'])} 个事件")
+                   f"{records.found_logs_count} 个待解析日志文件")
         
         return collected_data
     
+    def _iter_approvals(self):
+        """
+        逐条产出命令执行审批文件中上次提交之后新增的条目
+        
+        解析失败时记录错误并结束（与 parse_exec_approvals 一致）；此时审批文件状态不会暂存，下次重新读取。
+        
+        Yields:
+            dict: 审批条目
+        """
+        logger.debug("解析命令执行审批...")
+        try:
+            yield from self.log_parser.iter_exec_approvals()
+        except Exception as e:
+            logger.error(f"解析审批文件失败: {e}")
+    
     def save_to_database(self, data):
         """
         将数据保存到数据库
         
+        日志记录和命令执行审批按 parsing.batch_size 分批读取、分析，并按批（executemany + INSERT OR IGNORE）写入，
+        内存占用与日志、审批文件大小无关。每批在一个事务中写入并提交；某批写入失败时只回滚该批，
+        其中记录所属文件的暂存读取游标被丢弃（下次重新读取），其余文件的游标照常提交。
+        
         Args:
-            data: 收集的数据
+            data: 收集的数据（collect_daily_data 的返回值）
+        
+        Returns:
+            dict: 安全分析结果（不含事件明细）
         """
         date_str = data["date"]
         logger.info(f"保存 {date_str} 的数据到数据库...")
         
-        # 保存进程数据
-        for proc in data.get("processes", []):
-            self.db_manager.add_activity_record(
-                date=date_str,
-                timestamp=proc.get("timestamp"),
-                activity_type="process",
-                description=proc.get("name", "未知"),
-                severity="info",
-                details=proc,
-            )
+        # 保存进程数据，分批保存命令执行审批（失败时抛出异常，本次不提交任何读取游标）
+        saved = [self.db_manager.bulk_add_activities(
+            [self._process_row(date_str, proc) for proc in data.get("processes", [])]
+        )]
+        approvals = 0
+        for batch in chunked(data.get("approvals", []), self.config.parsing.batch_size):
+            saved.append(self.db_manager.bulk_add_activities([self._command_row(date_str, cmd) for cmd in batch]))
+            approvals += len(batch)
+        
+        # 流式保存日志记录及其安全事件
+        self.security_analyzer.reset()
+        counts = self._save_records(date_str, data.get("records", []), self.security_analyzer, self.log_parser)
+        for result in saved:
+            counts["inserted"] += result["inserted"]
+            counts["ignored"] += result["ignored"]
+        
+        if data.get("missing_logs", False):
+            event = self.security_analyzer.record_missing_logs(data.get("target_date"))
+            saved = self.db_manager.bulk_add_security_events([self._security_event_row(date_str, event)])
+            counts["events"] += 1
+            counts["inserted"] += saved["inserted"]
+            counts["ignored"] += saved["ignored"]
+        
+        if counts["failed_files"]:
+            logger.warning(f"{counts['failed']} 条记录写入失败，{len(counts['failed_files'])} 个日志文件的读取游标未提交，"
+                           "下次重新读取")
         
-        # 保存命令数据
-        for cmd in data.get("commands", []):
-            self.db_manager.add_activity_record(
-                date=date_str,
-                timestamp=cmd.get("timestamp", datetime.now().isoformat()),
-                activity_type="command",
-                description=cmd.get("command", "未知命令")[:200],
-                severity="info",
-                details=cmd,
-            )
+        security_analysis = self.security_analyzer.analyze()
         
-        # 保存文件访问数据
-        for access in data.get("file_accesses", []):
-            self.db_manager.add_activity_record(
-                date=date_str,
-                timestamp=access.get("timestamp"),
-                activity_type="file_access",
-                description=access.get("path", "未知路径")[:200],
-                severity="info",
-                details=access,
-            )
+        logger.info(f"数据保存完成: {approvals} 条审批命令, {counts['commands']} 条命令, "
+                   f"{counts['file_accesses']} 次文件访问, "
+                   f"{counts['events']} 个安全事件"
+                   f"（新增 {counts['inserted']} 条，已存在 {counts['ignored']} 条）")
         
-        # 保存安全事件
-        for event in data.get("events", []):
-            if event.get("type") == "security_event" or event.get("type") == "log_warning":
-                self.db_manager.add_security_event(
-                    date=date_str,
-                    timestamp=event.get("timestamp"),
-                    event_type=event.get("category", "general"),
-                    description=event.get("message", "未知事件")[:200],
-                    severity=event.get("severity", "info"),
-                    details=event,
-                )
-        
-        logger.info(f"数据保存完成")
+        return {
+            "security_score": security_analysis.get("security_score", 0),
+            "event_counts": security_analysis.get("event_counts", {}),
+            "severity_counts": security_analysis.get("severity_counts", {}),
+            "total_events": security_analysis.get("total_events", 0),
+        }
+    
+    def _save_records(
+        self,
+        date_str: str,
+        records,
+        security_analyzer: SecurityAnalyzer,
+        log_parser: LogParser,
+    ) -> dict:
+        """
+        按 parsing.batch_size 分批保存日志记录，并保存其中的安全事件（每批各一次批量写入）
+        
+        每批的记录与安全事件在一个事务中写入并提交。某批写入失败时该批回滚，
+        批中记录所属文件的暂存读取游标从 log_parser 中丢弃（下次从上次提交的位置重新读取，
+        已写入的记录由唯一约束去重），后续批次继续写入。
+        
+        Args:
+            date_str: 记录所属日期
+            records: LogRecord 的可迭代对象
+            security_analyzer: 累计安全事件计数的分析器
+            log_parser: 产出这些记录的日志解析器（暂存着它们的读取游标）
+        
+        Returns:
+            dict: {'commands', 'file_accesses', 'events'} 写入的数量，
+                {'inserted', 'ignored'} 新增与已存在（或缺少必填字段）的条数，
+                {'failed', 'failed_files'} 写入失败的记录数及其所属文件
+        """
+        counts = {"commands": 0, "file_accesses": 0, "events": 0, "inserted": 0, "ignored": 0,
+                  "failed": 0, "failed_files": set()}
+        
+        for chunk in chunked(records, self.config.parsing.batch_size):
+            activities = []
+            commands = 0
+            for record in chunk:
+                if record.kind == RECORD_COMMAND:
+                    activities.append(self._command_row(date_str, record.data))
+                    commands += 1
+                elif record.kind == RECORD_FILE_ACCESS:
+                    activities.append(self._file_access_row(date_str, record.data))
+            
+            events = [
+                self._security_event_row(date_str, event)
+                for event in security_analyzer.collect_chunk(chunk)
+                if event.get("type") == "security_event"
+            ]
+            
+            try:
+                with self.db_manager.transaction():
+                    saved_activities = self.db_manager.bulk_add_activities(activities)
+                    saved_events = self.db_manager.bulk_add_security_events(events)
+            except sqlite3.Error as e:
+                failed_files = {record.source for record in chunk}
+                logger.error(f"{len(chunk)} 条记录写入失败（{', '.join(sorted(failed_files))}）: {e}")
+                counts["failed"] += len(chunk)
+                counts["failed_files"] |= failed_files
+                log_parser.discard_checkpoints(failed_files)
+                continue
+            
+            counts["commands"] += commands
+            counts["file_accesses"] += len(activities) - commands
+            counts["events"] += len(events)
+            for saved in (saved_activities, saved_events):
+                counts["inserted"] += saved["inserted"]
+                counts["ignored"] += saved["ignored"]
+        
+        return counts
+    
+    @staticmethod
+    def _process_row(date_str: str, proc: dict) -> dict:
+        """进程数据对应的活动记录"""
+        return {
+            "date": date_str,
+            "timestamp": proc.get("timestamp"),
+            "activity_type": "process",
+            "description": proc.get("name", "未知"),
+            "severity": "info",
+            "details": proc,
+        }
+    
+    @staticmethod
+    def _command_row(date_str: str, cmd: dict) -> dict:
+        """命令记录对应的活动记录"""
+        return {
+            "date": date_str,
+            "timestamp": cmd.get("timestamp", datetime.now().isoformat()),
+            "activity_type": "command",
+            "description": (cmd.get("command") or "未知命令")[:200],
+            "severity": "info",
+            "details": cmd,
+        }
+    
+    @staticmethod
+    def _file_access_row(date_str: str, access: dict) -> dict:
+        """文件访问记录对应的活动记录"""
+        return {
+            "date": date_str,
+            "timestamp": access.get("timestamp"),
+            "activity_type": "file_access",
+            "description": (access.get("path") or "未知路径")[:200],
+            "severity": "info",
+            "details": access,
+        }
+    
+    @staticmethod
+    def _security_event_row(date_str: str, event: dict) -> dict:
+        """安全事件对应的数据库记录"""
+        return {
+            "date": date_str,
+            "timestamp": event.get("timestamp"),
+            "event_type": event.get("category", "general"),
+            "description": (event.get("message") or "未知事件")[:200],
+            "severity": event.get("severity", "info"),
+            "details": event,
+        }
     
     def generate_and_send_report(self, target_date=None, use_last_execution=True):
         """
@@ -305,11 +536,15 @@ class OpenClawMonitor:
                 since_timestamp = last_exec.get("last_activity_timestamp")
                 logger.info(f"从上次执行节点 {since_timestamp} 之后的数据开始收集")
         
-        # 收集数据（增量）
-        data = self.collect_daily_data(target_date, since_timestamp)
-        
-        # 保存到数据库
-        self.save_to_database(data)
+        # 收集数据（增量）并逐批保存到数据库，再提交已全部写入的日志文件的读取游标
+        with self._ingest_lock:
+            try:
+                data = self.collect_daily_data(target_date, since_timestamp, use_last_execution)
+                security_summary = self.save_to_database(data)
+            except Exception:
+                self.log_parser.discard_checkpoints()
+                raise
+            self.log_parser.commit_checkpoints()
         
         # 获取最近24小时的所有数据用于报告
         now = datetime.now()
@@ -338,14 +573,14 @@ class OpenClawMonitor:
                 "events": recent_security_events,
             },
             missing_logs=data.get("missing_logs", False),
-            security_score=data.get("security_score", 0),
+            security_score=security_summary.get("security_score", 0),
             time_window_hours=24,
         )
         
         # 保存日报告
         self.db_manager.save_daily_report(
             date=date_str,
-            security_score=data.get("security_score", 0),
+            security_score=security_summary.get("security_score", 0),
             total_events=len(recent_activities),
             process_count=len([a for a in recent_activities if a.get("activity_type") == "process"]),
             command_count=len([a for a in recent_activities if a.get("activity_type") == "command"]),
@@ -368,7 +603,7 @@ class OpenClawMonitor:
         )
         
         # 生成 OpenClaw 系统日志分析并嵌入邮件
-        openclaw_html = self.analyze_openclaw_logs()
+        openclaw_html = self.analyze_openclaw_logs(target_date=target_date)
         email_content = self._inject_openclaw_analysis(html_report, openclaw_html)
 
         # 发送邮件
@@ -401,6 +636,47 @@ class OpenClawMonitor:
         
         logger.info("调度器已启动，等待定时任务...")
     
+    def start_live_tail(self):
+        """
+        启动实时跟踪：日志文件变更后只读取新追加的内容，更新当日的实时聚合并写入数据库
+        """
+        if self.live_tail is not None:
+            return
+        
+        # 独立的解析器与分析器：暂存的读取游标和聚合状态不与每日批处理互相干扰
+        self.live_security_analyzer = SecurityAnalyzer()
+        self.live_tail = LiveTail(
+            self.config.log_paths.paths,
+            analyzer=self._create_openclaw_log_analyzer(),
+            log_parser=self._create_log_parser(),
+            on_records=self._ingest_live_records,
+            lock=self._ingest_lock,
+            debounce_seconds=self.config.live.debounce_seconds,
+        )
+        self.live_tail.start()
+        
+        interval = self.config.live.summary_interval_minutes
+        if interval > 0:
+            self.scheduler.schedule_interval_task(
+                interval,
+                "minutes",
+                lambda: logger.info(f"\n{self.live_tail.summary()}"),
+                "输出实时聚合摘要",
+            )
+    
+    def _ingest_live_records(self, records):
+        """
+        实时跟踪读取到的新记录写入数据库（归入当天）
+        
+        Args:
+            records: LogRecord 列表
+        """
+        date_str = datetime.now().strftime("%Y-%m-%d")
+        counts = self._save_records(date_str, records, self.live_security_analyzer, self.live_tail.log_parser)
+        logger.debug(f"实时写入: {counts['commands']} 条命令, "
+                     f"{counts['file_accesses']} 次文件访问, "
+                     f"{counts['events']} 个安全事件（新增 {counts['inserted']} 条）")
+    
     def run_once(self):
         """
         运行一次（用于测试）
@@ -427,6 +703,11 @@ def main():
         action="store_true",
         help="运行一次并退出（用于测试）",
     )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="同时启动实时跟踪（日志变更后几秒内更新聚合和数据库）",
+    )
     parser.add_argument(
         "--date",
         type=str,
@@ -445,6 +726,8 @@ def main():
         # 后台运行模式：启动调度器
         try:
             monitor.start_scheduler()
+            if args.live or monitor.config.live.enabled:
+                monitor.start_live_tail()
             
             # 保持程序运行
             while True:
@@ -453,6 +736,8 @@ def main():
         
         except KeyboardInterrupt:
             logger.info("收到中断信号，正在关闭...")
+            if monitor.live_tail is not None:
+                monitor.live_tail.stop()
             monitor.scheduler.stop()
             logger.info("已关闭")
         
@@ -0,0 +1,203 @@
+"""
+错误模板挖掘 - 把错误/警告消息归并为日志模板（Drain 风格），统计全部错误而不只是前若干条
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 变量部分：key=value 的值、十六进制标识、含数字的词
+_VARIABLE_PATTERN = re.compile(r"(?<==)[^\s,;]+|\b[0-9a-fA-F]{8,}(?:-[0-9a-fA-F]+)*\b|[^\s=]*\d[^\s=]*")
+
+# 模板中的通配符
+WILDCARD = "<*>"
+
+# 示例消息保留的最大长度
+_SAMPLE_CHARS = 200
+
+
+def mask_message(message: str, max_tokens: int = 40) -> str:
+    """
+    把消息中的变量部分替换为通配符，得到模板键
+
+    例如 "connect 10.0.0.1 failed after 61ms runId=ab12" 得到 "connect <*> failed after <*> runId=<*>"。
+
+    Args:
+        message: 去除 ANSI 控制字符后的消息
+        max_tokens: 只保留前若干个词（限制单条消息的处理时间）
+
+    Returns:
+        str: 模板键
+    """
+    tokens = message.split(None, max_tokens)[:max_tokens]
+    return _VARIABLE_PATTERN.sub(WILDCARD, " ".join(tokens))
+
+
+def template_id(template: str) -> str:
+    """
+    模板的稳定标识（同一模板在不同运行、进程中相同）
+
+    Args:
+        template: 模板
+
+    Returns:
+        str: 8 位十六进制标识
+    """
+    return hashlib.md5(template.encode("utf-8")).hexdigest()[:8]
+
+
+class ErrorTemplateMiner:
+    """
+    错误模板挖掘器
+
+    读取时：每条消息经一次正则替换得到模板键（数字、标识、key=value 的值替换为通配符），
+    再做一次字典查找，累计精确的次数、首次/最后出现时间和一条示例消息。
+    模板键只取决于消息本身，因此多个分块、文件的结果按键相加即可合并，与顺序处理一致。
+
+    生成报告时：对模板键做 Drain 风格的聚类（按词数和首词分组，组内相似度达到阈值的模板合并，
+    不同的位置变为通配符），把只有非数字变量不同的模板（如用户名、方法名）归为一类。
+    聚类按次数和键排序后进行，结果与读取顺序无关。
+
+    内存预算：模板键超过 max_templates 时淘汰次数最少的一批，被淘汰的次数计入 evicted，
+    总数仍然守恒；预算内的模板次数是精确的。
+    """
+
+    def __init__(self, max_templates: int = 2000, similarity: float = 0.5, max_tokens: int = 40):
+        """
+        初始化挖掘器
+
+        Args:
+            max_templates: 最多保留的模板键数量
+            similarity: 聚类时两个模板合并所需的最低相似度（相同位置的词所占比例）
+            max_tokens: 每条消息参与模板化的最大词数
+        """
+        self.max_templates = max(1, max_templates)
+        self.similarity = similarity
+        self.max_tokens = max_tokens
+        # {模板键: {'count', 'first_seen', 'last_seen', 'sample'}}
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        # 因超出预算被淘汰的消息数
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def add(self, message: str, timestamp: Optional[str] = None):
+        """
+        记录一条错误/警告消息
+
+        Args:
+            message: 去除 ANSI 控制字符后的消息
+            timestamp: 消息时间戳
+        """
+        key = mask_message(message, self.max_tokens)
+        entry = self.templates.get(key)
+        if entry is None:
+            if len(self.templates) >= self.max_templates:
+                self._evict()
+            self.templates[key] = {
+                "count": 1,
+                "first_seen": timestamp,
+                "last_seen": timestamp,
+                "sample": message[:_SAMPLE_CHARS],
+            }
+            return
+
+        entry["count"] += 1
+        if timestamp:
+            if entry["first_seen"] is None or timestamp < entry["first_seen"]:
+                entry["first_seen"] = timestamp
+            if entry["last_seen"] is None or timestamp > entry["last_seen"]:
+                entry["last_seen"] = timestamp
+
+    def _evict(self):
+        """
+        淘汰次数最少的一批模板键（保留预算的 90%，摊还排序开销）
+        """
+        keep = self.max_templates * 9 // 10
+        ranked = sorted(self.templates.items(), key=lambda item: -item[1]["count"])
+        for _, entry in ranked[keep:]:
+            self.evicted += entry["count"]
+        self.templates = dict(ranked[:keep])
+
+    def export(self) -> Dict[str, Any]:
+        """
+        导出状态（用于跨进程归并和分析快照）
+
+        Returns:
+            Dict: {'templates', 'evicted'}
+        """
+        return {"templates": self.templates, "evicted": self.evicted}
+
+    def merge(self, partial: Dict[str, Any]):
+        """
+        归并时间上在后的一段的状态（示例消息保留先出现的一条）
+
+        Args:
+            partial: export 导出的状态
+        """
+        self.evicted += partial["evicted"]
+        for key, other in partial["templates"].items():
+            entry = self.templates.get(key)
+            if entry is None:
+                if len(self.templates) >= self.max_templates:
+                    self._evict()
+                self.templates[key] = dict(other)
+                continue
+
+            entry["count"] += other["count"]
+            for field, pick in (("first_seen", min), ("last_seen", max)):
+                values = [value for value in (entry[field], other[field]) if value]
+                entry[field] = pick(values) if values else None
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        聚类模板键并返回次数最多的模板
+
+        Args:
+            limit: 返回的模板数
+
+        Returns:
+            List[Dict]: [{'id', 'template', 'count', 'first_seen', 'last_seen', 'sample'}]，按次数降序
+        """
+        # (词数, 首词) -> [[模板词列表, 汇总]]
+        groups: Dict[Tuple[int, str], List[List[Any]]] = {}
+        clusters = []
+        for key, entry in sorted(self.templates.items(), key=lambda item: (-item[1]["count"], item[0])):
+            tokens = key.split()
+            group = groups.setdefault((len(tokens), tokens[0] if tokens else ""), [])
+            cluster = self._most_similar(group, tokens)
+            if cluster is None:
+                cluster = [tokens, dict(entry)]
+                group.append(cluster)
+                clusters.append(cluster)
+                continue
+
+            cluster[0] = [a if a == b else WILDCARD for a, b in zip(cluster[0], tokens)]
+            summary = cluster[1]
+            summary["count"] += entry["count"]
+            if entry["first_seen"] and (summary["first_seen"] is None or entry["first_seen"] < summary["first_seen"]):
+                summary["first_seen"] = entry["first_seen"]
+                summary["sample"] = entry["sample"]
+            if entry["last_seen"] and (summary["last_seen"] is None or entry["last_seen"] > summary["last_seen"]):
+                summary["last_seen"] = entry["last_seen"]
+
+        result = []
+        for tokens, summary in clusters:
+            template = " ".join(tokens)
+            result.append({"id": template_id(template), "template": template, **summary})
+        result.sort(key=lambda item: (-item["count"], item["template"]))
+        return result[:limit]
+
+    def _most_similar(self, group: List[List[Any]], tokens: List[str]) -> Optional[List[Any]]:
+        """
+        在同组的聚类中查找与模板最相似且达到阈值的一个
+        """
+        best, best_score = None, -1.0
+        for cluster in group:
+            same = sum(1 for a, b in zip(cluster[0], tokens) if a == b or a == WILDCARD)
+            score = same / len(tokens) if tokens else 1.0
+            if score > best_score:
+                best, best_score = cluster, score
+        return best if best_score >= self.similarity else None
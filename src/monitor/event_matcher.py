@@ -0,0 +1,350 @@
+"""
+系统日志事件匹配器 - 一次扫描同时得到事件类型、API 方法和外部对话渠道，
+并把网关消息切分为方向、方法、耗时和 key=value 字段
+"""
+
+import re
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Match, Optional, Tuple
+
+
+# 事件分类关键字
+CLASSIFY_KEYWORDS = (
+    "run", "embedded", "start", "done", "complete",
+    "session", "state",
+    "listening", "mounted",
+    "connection", "connect", "close", "closed",
+    "file", "path", "/users", "/tmp",
+)
+
+# 无法从 req/res 或 method= 中提取时，按顺序查找的常见 API 方法
+COMMON_METHODS = (
+    "chat.history",
+    "agent.turn",
+    "agent.reply",
+    "gateway.call",
+    "models.status",
+    "models.list",
+)
+
+# 外部对话渠道（按优先顺序）
+CHANNELS = (
+    "telegram", "whatsapp", "discord", "slack", "signal",
+    "imessage", "nostr", "msteams", "mattermost", "matrix",
+    "bluebubbles", "line", "zalo", "googlechat", "webchat",
+    "wechat", "qq", "sms",
+)
+
+_FILE_KEYWORDS = ("file", "path", "/users", "/tmp")
+
+# 网关消息的方向与方法，如 "res chat.history"
+# （与 r"\b(req|res)\b\s+(...)" 等价，词边界改写为字面量之后的反向断言，使正则以字面量开头，可以快速定位）
+_METHOD_PATTERN = re.compile(r"(re[qs])(?<!\wre[qs])\s+([a-zA-Z][\w./:-]+)")
+
+# 耗时，如 "61ms"
+_DURATION_PATTERN = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)ms\b")
+
+# 没有 req/res 时的兜底：第一个值为合法方法名的 method= 字段
+_METHOD_PARAM_PATTERN = re.compile(r"method=(?<!\wmethod=)([a-zA-Z][\w./:-]+)")
+
+# key=value 字段之间的分隔符：空白、逗号、分号和括号（如 "(runId=ab12)"、"runId=ab12,sessionId=cd34"）
+_FIELD_SEPARATORS = re.compile(r"[\s,;()\[\]{}]+")
+
+# runId= / sessionId= 字段值中的标识
+_ID_VALUE = re.compile(r"[a-f0-9\-]+")
+
+# 匹配结果缓存的条目上限（超过后清空重建）
+_MAX_CACHED = 4096
+
+# (事件类型, API 方法, 外部渠道, 是否包含 failed, 词法单元)
+# 词法单元（tokenize_message 的结果）只对 API 调用以及运行、会话事件计算，其余为 None
+EventMatch = Tuple[str, Optional[str], Optional[str], bool, Optional[Dict[str, Any]]]
+
+
+def tokenize_message(message: str) -> Dict[str, Any]:
+    """
+    切分网关消息
+
+    例如 "res chat.history 61ms conn=ab12 id=7" 得到
+    {'direction': 'res', 'method': 'chat.history', 'duration_ms': 61.0, 'fields': {'conn': 'ab12', 'id': '7'}}。
+    方向与方法、耗时各用一次以字面量定位的正则查找，所有 key=value 字段在一次按空白、逗号、分号和括号切分中取出。
+
+    Args:
+        message: 去除 ANSI 控制字符后的消息
+
+    Returns:
+        Dict: {'direction', 'method', 'duration_ms', 'fields'}；方向、方法和耗时取第一次出现的值
+            （没有 "Nms" 时取 durationMs 字段），同名字段保留第一次出现的值，没有时为 None
+    """
+    return _tokenize(message, _METHOD_PATTERN.search(message))
+
+
+def _tokenize(message: str, head: Optional[Match]) -> Dict[str, Any]:
+    """
+    tokenize_message 的实现（head 为 _METHOD_PATTERN 在消息中的查找结果，调用方已查找过时可复用）
+    """
+    direction, method = head.groups() if head else (None, None)
+
+    fields = {}
+    for key, _, value in [word.partition("=") for word in _FIELD_SEPARATORS.split(message) if "=" in word]:
+        if key and key not in fields:
+            fields[key] = value
+
+    duration = None
+    if "ms" in message:
+        duration_match = _DURATION_PATTERN.search(message)
+        if duration_match:
+            duration = float(duration_match.group(1))
+    if duration is None and "durationMs" in fields:
+        duration = _parse_number(fields["durationMs"])
+
+    return {"direction": direction, "method": method, "duration_ms": duration, "fields": fields}
+
+
+def _parse_number(text: str) -> Optional[float]:
+    """
+    解析数值，不是数值时返回 None
+    """
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def token_id(tokens: Optional[Dict[str, Any]], key: str) -> Optional[str]:
+    """
+    从字段中取出十六进制标识（runId / sessionId）
+
+    Args:
+        tokens: tokenize_message 的结果
+        key: 字段名
+
+    Returns:
+        Optional[str]: 标识；没有该字段或值不是标识时为 None
+    """
+    if not tokens:
+        return None
+    value = tokens["fields"].get(key)
+    if not value:
+        return None
+    id_match = _ID_VALUE.match(value)
+    return id_match.group() if id_match else None
+
+
+def _keyword_regex(keywords: Iterable[str]) -> str:
+    """
+    把关键字集合展开成前缀树形式的正则（同一位置优先匹配最长的关键字）
+
+    Args:
+        keywords: 关键字
+
+    Returns:
+        str: 正则表达式源码
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # 较短的关键字在此结束：贪婪的可选分组保证先尝试更长的关键字
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _remember(cache: Dict, key: Hashable, value):
+    """
+    写入有上限的缓存
+    """
+    if len(cache) >= _MAX_CACHED:
+        cache.clear()
+    cache[key] = value
+
+
+def _overlap(keyword: str, other: str) -> bool:
+    """
+    other 的某次出现是否可能被 keyword 的命中遮住（other 是 keyword 的子串，或 keyword 的后缀是 other 的前缀）
+    """
+    if other in keyword:
+        return True
+    return any(keyword.endswith(other[:size]) for size in range(1, min(len(keyword), len(other))))
+
+
+class EventMatcher:
+    """
+    多关键字匹配器
+
+    所有关键字合并为一个正则，对小写消息只扫描一次，得到消息中出现的关键字集合，
+    再按 OpenClawLogAnalyzer 原有的判断顺序得出事件类型、API 方法和外部渠道。
+
+    关键字按前缀树展开成正则（每个位置只需比较首字符即可排除大部分分支），
+    同一位置取最长的关键字，命中后从其结尾继续扫描。被命中关键字遮住的只有两类：
+    它的子串（如 connection 中的 connect）和与它首尾重叠的关键字（如 "signaline"
+    中 signal 之后的 line），这些候选预先算好，命中时再逐个确认，
+    因此结果与逐个 `in` 判断完全一致。
+    """
+
+    def __init__(self):
+        keywords = set(CLASSIFY_KEYWORDS) | set(COMMON_METHODS) | set(CHANNELS) | {"control-ui", "failed"}
+        self._pattern = re.compile(_keyword_regex(keywords))
+        # 关键字 -> 与其命中位置重叠、因而可能被扫描跳过的其他关键字
+        self._overlaps: Dict[str, Tuple[str, ...]] = {}
+        for keyword in keywords:
+            overlaps = tuple(sorted(other for other in keywords if other != keyword and _overlap(keyword, other)))
+            if overlaps:
+                self._overlaps[keyword] = overlaps
+        # 命中的关键字集合 -> 需要再确认的重叠关键字
+        self._candidates: Dict[FrozenSet[str], Tuple[str, ...]] = {}
+        # (出现的关键字集合, 子系统) -> (事件类型, 外部渠道, 兜底 API 方法, 是否需要从消息中提取 API 方法)
+        self._decisions: Dict[Tuple[FrozenSet[str], str], Tuple[str, Optional[str], Optional[str], bool]] = {}
+
+    def keywords_in(self, message_lower: str) -> FrozenSet[str]:
+        """
+        查找小写消息中出现的所有关键字
+
+        Args:
+            message_lower: 小写消息
+
+        Returns:
+            FrozenSet[str]: 出现的关键字
+        """
+        hits = frozenset(self._pattern.findall(message_lower))
+        candidates = self._candidates.get(hits)
+        if candidates is None:
+            candidates = tuple(sorted(
+                {other for keyword in hits for other in self._overlaps.get(keyword, ())} - hits
+            ))
+            _remember(self._candidates, hits, candidates)
+
+        if candidates:
+            present = [other for other in candidates if other in message_lower]
+            if present:
+                return hits.union(present)
+        return hits
+
+    def match(self, message: str, subsystem: str, with_tokens: bool = True) -> EventMatch:
+        """
+        匹配一条消息
+
+        关键字集合与子系统相同的消息得出的结论相同，按二者缓存；
+        API 方法（req/res 与 method=，区分大小写）来自 tokenize_message，每条消息单独计算。
+
+        Args:
+            message: 去除 ANSI 控制字符后的消息
+            subsystem: 子系统
+            with_tokens: 是否切分 API 调用以及运行、会话事件的消息（False 时词法单元总是 None）
+
+        Returns:
+            EventMatch: (事件类型, API 方法, 外部渠道, 是否包含 failed, 词法单元)
+        """
+        message = message or ""
+        subsystem = subsystem or ""
+        found = self.keywords_in(message.lower())
+
+        key = (found, subsystem)
+        decision = self._decisions.get(key)
+        if decision is None:
+            subsystem_lower = subsystem.lower()
+            decision = (
+                self._classify(found, subsystem_lower),
+                self._channel(found, subsystem_lower),
+                self._common_method(found),
+                "gateway" in subsystem_lower or "agent" in subsystem_lower,
+            )
+            _remember(self._decisions, key, decision)
+
+        event_type, channel, api_method, has_api = decision
+        head = None
+        if not has_api or not message:
+            api_method = None
+        else:
+            head = _METHOD_PATTERN.search(message)
+            if head:
+                api_method = head.group(2)
+            elif "method=" in message:
+                method_match = _METHOD_PARAM_PATTERN.search(message)
+                if method_match:
+                    api_method = method_match.group(1)
+
+        tokens = None
+        if with_tokens and (api_method or "run" in event_type or "session" in event_type):
+            if not has_api:
+                head = _METHOD_PATTERN.search(message)
+            tokens = _tokenize(message, head)
+
+        return event_type, api_method, channel, "failed" in found, tokens
+
+    @staticmethod
+    def _classify(found: FrozenSet[str], subsystem_lower: str) -> str:
+        """
+        分类事件类型（与原先逐个关键字判断的顺序一致，参考实现见 benchmarks/bench_event_matcher.py）
+        """
+        # 运行相关
+        if "run" in found and "embedded" in found:
+            if "start" in found:
+                return "run_start"
+            elif "done" in found or "complete" in found:
+                return "run_complete"
+            else:
+                return "run_event"
+
+        # 会话相关
+        if "session" in found:
+            return "session_state" if "state" in found else "session_event"
+
+        # 网关相关
+        if "gateway" in subsystem_lower:
+            if "listening" in found:
+                return "gateway_listening"
+            elif "mounted" in found:
+                return "gateway_mounted"
+            else:
+                return "gateway_event"
+
+        # 连接相关（connect 是 connection 的子串）
+        if "connect" in found:
+            return "connection_closed" if "close" in found else "connection_event"
+
+        # 原实现用小写消息与大写的 ERROR / WARN 比较，错误分支永远不会命中，这里保持一致
+
+        # 文件访问
+        if any(keyword in found for keyword in _FILE_KEYWORDS):
+            return "file_access"
+
+        return "other"
+
+    @staticmethod
+    def _common_method(found: FrozenSet[str]) -> Optional[str]:
+        """
+        按顺序查找已知的常见 API 方法（消息中没有 req/res 和 method= 时的兜底）
+        """
+        for method in COMMON_METHODS:
+            if method in found:
+                return method
+        return None
+
+    @staticmethod
+    def _channel(found: FrozenSet[str], subsystem_lower: str) -> Optional[str]:
+        """
+        检测外部对话渠道（与原先逐个关键字判断的结果一致）
+        """
+        if "gateway/channels/" in subsystem_lower:
+            return subsystem_lower.split("/")[-1]
+
+        if "gateway/ws" in subsystem_lower:
+            if "webchat" in found or "control-ui" in found:
+                return "webchat"
+
+        for channel in CHANNELS:
+            if channel in found:
+                return channel
+
+        return None
@@ -0,0 +1,419 @@
+"""
+运行与会话生命周期跟踪 - 状态、时长分布、并发度与超时运行
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 报告中列出的超时运行数上限
+_MAX_TIMED_OUT_LISTED = 20
+
+
+def parse_timestamp(timestamp: Any) -> Optional[float]:
+    """
+    将 ISO 8601 时间戳解析为 Unix 时间
+
+    结尾的 "Z" 先替换为 "+00:00"（Python 3.11 之前的 fromisoformat 不接受 "Z"）。
+
+    Args:
+        timestamp: 时间戳字符串（如 2024-01-15T10:00:00.000Z）
+
+    Returns:
+        Optional[float]: Unix 时间；无法解析时为 None（不带时区的按本地时间）
+    """
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    if timestamp.endswith("Z"):
+        timestamp = timestamp[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except ValueError:
+        return None
+
+
+def percentile_summary(values: List[float]) -> Dict[str, Any]:
+    """
+    计算样本的分位数摘要（最近秩法）
+
+    Args:
+        values: 样本（会被原地排序）
+
+    Returns:
+        Dict: {'count', 'avg', 'p50', 'p95', 'p99', 'max'}，保留 1 位小数；没有样本时只有 count
+    """
+    if not values:
+        return {"count": 0}
+
+    values.sort()
+    last = len(values) - 1
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values), 1),
+        "p50": round(values[int(0.50 * last)], 1),
+        "p95": round(values[int(0.95 * last)], 1),
+        "p99": round(values[int(0.99 * last)], 1),
+        "max": round(values[last], 1),
+    }
+
+
+def sweep_concurrency(intervals: List[Tuple[float, float]], span: Tuple[float, float]) -> Dict[str, Any]:
+    """
+    扫描线计算区间集合的并发度
+
+    区间按闭区间处理：同一时刻的开始先于结束，首尾相接的两个区间在该时刻视为并发。
+
+    Args:
+        intervals: [(开始, 结束)]，结束不早于开始
+        span: 统计时间范围 (开始, 结束)，用于计算平均并发
+
+    Returns:
+        Dict: {'peak', 'peak_at', 'average'}；peak_at 为首次达到峰值的 Unix 时间
+    """
+    points = []
+    for start, end in intervals:
+        points.append((start, 0))
+        points.append((end, 1))
+    points.sort()
+
+    active = peak = 0
+    peak_at = None
+    area = 0.0
+    previous = None
+    for time_point, is_end in points:
+        if previous is not None:
+            area += active * (time_point - previous)
+        previous = time_point
+        if is_end:
+            active -= 1
+        else:
+            active += 1
+            if active > peak:
+                peak, peak_at = active, time_point
+
+    duration = span[1] - span[0]
+    return {
+        "peak": peak,
+        "peak_at": peak_at,
+        "average": round(area / duration, 2) if duration > 0 else float(peak),
+    }
+
+
+class LifecycleTracker:
+    """
+    运行与会话生命周期跟踪器
+
+    读取时每个事件只做 O(1) 的字典更新，保存的状态与运行、会话数量成正比，与事件数无关；
+    时间戳只在生成摘要时解析一次，时长分位数和并发度在摘要时一次排序、扫描得出。
+    多个分块或文件的状态可以按时间顺序归并，结果与顺序处理相同。
+
+    内存预算：运行或会话超过 max_entries 时淘汰一批（保留预算的 90%）。运行先淘汰已超时仍未完成的
+    （计入超时数），再淘汰最早完成的，最后才淘汰未超时的进行中运行；会话先淘汰最早不再出现的。
+    被淘汰的条目仍计入状态统计，但不再参与时长分位数和并发度（摘要中的 evicted 为其数量）。
+    """
+
+    def __init__(self, run_timeout_seconds: float = 1800, max_entries: int = 50000):
+        """
+        初始化跟踪器
+
+        Args:
+            run_timeout_seconds: 运行开始后超过该时长仍未完成即视为超时
+            max_entries: 运行、会话各自最多保留的条目数（长期运行的实时跟踪中限制内存占用）
+        """
+        self.run_timeout_seconds = run_timeout_seconds
+        self.max_entries = max(1, max_entries)
+        # {runId: {'start', 'complete', 'status'}}
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        # {sessionId: {'start', 'state'}}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        # 显式设置过状态的会话（归并时以后一段的显式状态为准）
+        self.explicit_session_states = set()
+        # {sessionId: 最后一次出现的时间戳}
+        self.session_last_seen: Dict[str, Any] = {}
+        # 见到的最晚时间戳（淘汰时判断超时的参考时间）
+        self.latest: Any = None
+        # 因超出预算被淘汰的运行 {状态: 数量}、会话 {状态: 数量}
+        self.evicted_runs = {'complete': 0, 'running': 0, 'unknown': 0}
+        self.evicted_sessions = {'active': 0, 'inactive': 0}
+        # 淘汰时已超时的运行数及最早的若干个 [(开始时间戳, runId)]
+        self.evicted_timed_out = 0
+        self.evicted_timed_out_runs: List[Tuple[Any, str]] = []
+
+    def on_run(self, run_id: str, event_type: str, timestamp: Any):
+        """
+        记录一个运行事件
+
+        Args:
+            run_id: 运行 ID
+            event_type: 事件类型（run_start / run_complete / run_event）
+            timestamp: 事件时间戳
+        """
+        if timestamp and (self.latest is None or timestamp > self.latest):
+            self.latest = timestamp
+
+        run = self.runs.get(run_id)
+        if run is None:
+            if len(self.runs) >= self.max_entries:
+                self._evict_runs()
+            run = self.runs[run_id] = {
+                'start': None,
+                'complete': None,
+                'status': 'unknown',
+            }
+
+        if event_type == 'run_start':
+            run['start'] = timestamp
+            run['status'] = 'running'
+        elif event_type == 'run_complete':
+            run['complete'] = timestamp
+            run['status'] = 'complete'
+
+    def on_session(self, session_id: str, timestamp: Any, state: Optional[str] = None):
+        """
+        记录一个会话事件
+
+        Args:
+            session_id: 会话 ID
+            timestamp: 事件时间戳
+            state: 事件显式给出的会话状态（session_state 事件），None 表示未给出
+        """
+        if timestamp and (self.latest is None or timestamp > self.latest):
+            self.latest = timestamp
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            if len(self.sessions) >= self.max_entries:
+                self._evict_sessions()
+            session = self.sessions[session_id] = {
+                'start': timestamp,
+                'state': 'active',
+            }
+
+        if state is not None:
+            session['state'] = state
+            self.explicit_session_states.add(session_id)
+
+        if timestamp:
+            self.session_last_seen[session_id] = timestamp
+
+    def _evict_runs(self):
+        """
+        淘汰一批运行（保留预算的 90%，摊还排序开销）：已超时未完成的优先，其次按完成时间从早到晚
+        """
+        keep = self.max_entries * 9 // 10
+        reference = parse_timestamp(self.latest)
+
+        def rank(item):
+            run = item[1]
+            if run['status'] == 'running':
+                start = parse_timestamp(run['start'])
+                if start is not None and reference is not None and reference - start > self.run_timeout_seconds:
+                    return (0, run['start'])
+                return (2, run['start'] or '')
+            return (1, run['complete'] or run['start'] or '')
+
+        ranked = sorted(self.runs.items(), key=rank)
+        for run_id, run in ranked[:len(ranked) - keep]:
+            self.evicted_runs[run['status']] = self.evicted_runs.get(run['status'], 0) + 1
+            if rank((run_id, run))[0] == 0:
+                self.evicted_timed_out += 1
+                self.evicted_timed_out_runs.append((run['start'], run_id))
+            del self.runs[run_id]
+        self.evicted_timed_out_runs = sorted(self.evicted_timed_out_runs)[:_MAX_TIMED_OUT_LISTED]
+
+    def _evict_sessions(self):
+        """
+        淘汰一批会话（保留预算的 90%）：已结束的优先，其次按最后一次出现的时间从早到晚
+        """
+        keep = self.max_entries * 9 // 10
+        ranked = sorted(
+            self.sessions.items(),
+            key=lambda item: (item[1]['state'] == 'active', self.session_last_seen.get(item[0]) or ''),
+        )
+        for session_id, session in ranked[:len(ranked) - keep]:
+            self.evicted_sessions[session['state']] = self.evicted_sessions.get(session['state'], 0) + 1
+            del self.sessions[session_id]
+            self.session_last_seen.pop(session_id, None)
+            self.explicit_session_states.discard(session_id)
+
+    def export(self) -> Dict[str, Any]:
+        """
+        导出状态（用于跨进程归并和分析快照）
+
+        Returns:
+            Dict: {'runs', 'sessions', 'explicit_session_states', 'session_last_seen', 'latest',
+                'evicted_runs', 'evicted_sessions', 'evicted_timed_out', 'evicted_timed_out_runs'}
+        """
+        return {
+            "runs": self.runs,
+            "sessions": self.sessions,
+            "explicit_session_states": self.explicit_session_states,
+            "session_last_seen": self.session_last_seen,
+            "latest": self.latest,
+            "evicted_runs": self.evicted_runs,
+            "evicted_sessions": self.evicted_sessions,
+            "evicted_timed_out": self.evicted_timed_out,
+            "evicted_timed_out_runs": self.evicted_timed_out_runs,
+        }
+
+    def merge(self, partial: Dict[str, Any]):
+        """
+        归并时间上在后的一段的状态
+
+        Args:
+            partial: export 导出的状态
+        """
+        # 运行：start/complete 取后一段中最后一次出现的值，状态以后一段中最后的变化为准
+        for run_id, run in partial["runs"].items():
+            current = self.runs.get(run_id)
+            if current is None:
+                self.runs[run_id] = dict(run)
+                continue
+            if run["start"] is not None:
+                current["start"] = run["start"]
+            if run["complete"] is not None:
+                current["complete"] = run["complete"]
+            if run["status"] != "unknown":
+                current["status"] = run["status"]
+
+        # 会话：start 取首次出现的时间，state 以后一段中显式设置的状态为准
+        explicit_states = partial["explicit_session_states"]
+        for session_id, session in partial["sessions"].items():
+            current = self.sessions.get(session_id)
+            if current is None:
+                self.sessions[session_id] = dict(session)
+            elif session_id in explicit_states:
+                current["state"] = session["state"]
+        self.explicit_session_states.update(explicit_states)
+        self.session_last_seen.update(partial.get("session_last_seen", {}))
+
+        # 淘汰统计相加，参考时间取较晚者，超出预算时再淘汰
+        latest = partial.get("latest")
+        if latest and (self.latest is None or latest > self.latest):
+            self.latest = latest
+        for status, count in partial.get("evicted_runs", {}).items():
+            self.evicted_runs[status] = self.evicted_runs.get(status, 0) + count
+        for state, count in partial.get("evicted_sessions", {}).items():
+            self.evicted_sessions[state] = self.evicted_sessions.get(state, 0) + count
+        self.evicted_timed_out += partial.get("evicted_timed_out", 0)
+        self.evicted_timed_out_runs = sorted(
+            self.evicted_timed_out_runs + [tuple(item) for item in partial.get("evicted_timed_out_runs", [])]
+        )[:_MAX_TIMED_OUT_LISTED]
+        if len(self.runs) > self.max_entries:
+            self._evict_runs()
+        if len(self.sessions) > self.max_entries:
+            self._evict_sessions()
+
+    def status_counts(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        统计运行与会话的状态（各遍历一次，包含被淘汰的条目）
+
+        Returns:
+            Tuple[Dict, Dict]: (运行 {'total', 'completed', 'running', 'unknown'},
+                会话 {'total', 'active', 'inactive'})
+        """
+        run_counts = dict(self.evicted_runs)
+        for run in self.runs.values():
+            status = run['status']
+            run_counts[status] = run_counts.get(status, 0) + 1
+
+        session_counts = dict(self.evicted_sessions)
+        for session in self.sessions.values():
+            state = session['state']
+            session_counts[state] = session_counts.get(state, 0) + 1
+
+        runs_stats = {
+            'total': len(self.runs) + sum(self.evicted_runs.values()),
+            'completed': run_counts['complete'],
+            'running': run_counts['running'],
+            'unknown': run_counts['unknown'],
+        }
+        sessions_stats = {
+            'total': len(self.sessions) + sum(self.evicted_sessions.values()),
+            'active': session_counts['active'],
+            'inactive': session_counts['inactive'],
+        }
+        return runs_stats, sessions_stats
+
+    def summary(self, time_min: Any, time_max: Any) -> Dict[str, Any]:
+        """
+        生成生命周期摘要
+
+        运行区间为 [开始, 完成]；只有完成事件的运行从分析范围的开始算起；
+        未完成的运行到分析范围的结束为止，开始后超过超时时长仍未完成的只计到超时为止并标记为超时。
+        会话区间为 [首次出现, 最后一次出现]。
+        被淘汰的条目不参与时长和并发度，其中已超时的运行计入超时数和超时列表。
+
+        Args:
+            time_min: 分析范围内最早的事件时间戳
+            time_max: 分析范围内最晚的事件时间戳（判断超时的参考时间）
+
+        Returns:
+            Dict: {'runs': {'durations', 'concurrency', 'timeout_seconds', 'timed_out', 'timed_out_runs', 'evicted'},
+                'sessions': {'durations', 'concurrency', 'evicted'}}；时长单位为秒
+        """
+        span_start = parse_timestamp(time_min)
+        span_end = parse_timestamp(time_max)
+        timeout = self.run_timeout_seconds
+
+        durations = []
+        run_intervals = []
+        timed_out = []
+        for run_id, run in self.runs.items():
+            start = parse_timestamp(run['start'])
+            complete = parse_timestamp(run['complete'])
+            if start is not None and complete is not None and complete >= start:
+                durations.append(complete - start)
+                run_intervals.append((start, complete))
+            elif start is not None and (complete is None or run['status'] == 'running'):
+                end = span_end if span_end is not None and span_end >= start else start
+                if end - start > timeout:
+                    timed_out.append((run['start'], run_id))
+                    end = start + timeout
+                run_intervals.append((start, end))
+            elif complete is not None and span_start is not None and complete >= span_start:
+                run_intervals.append((span_start, complete))
+
+        session_durations = []
+        session_intervals = []
+        for session_id, session in self.sessions.items():
+            first = parse_timestamp(session['start'])
+            last = parse_timestamp(self.session_last_seen.get(session_id))
+            if first is not None and last is not None and last >= first:
+                session_durations.append(last - first)
+                session_intervals.append((first, last))
+
+        if span_start is None or span_end is None:
+            span = (0.0, 0.0)
+        else:
+            span = (span_start, span_end)
+
+        timed_out_count = len(timed_out) + self.evicted_timed_out
+        timed_out = sorted(timed_out + self.evicted_timed_out_runs)
+        return {
+            'runs': {
+                'durations': percentile_summary(durations),
+                'concurrency': self._format_concurrency(sweep_concurrency(run_intervals, span)),
+                'timeout_seconds': timeout,
+                'timed_out': timed_out_count,
+                'timed_out_runs': [
+                    {'run_id': run_id, 'start': start} for start, run_id in timed_out[:_MAX_TIMED_OUT_LISTED]
+                ],
+                'evicted': sum(self.evicted_runs.values()),
+            },
+            'sessions': {
+                'durations': percentile_summary(session_durations),
+                'concurrency': self._format_concurrency(sweep_concurrency(session_intervals, span)),
+                'evicted': sum(self.evicted_sessions.values()),
+            },
+        }
+
+    @staticmethod
+    def _format_concurrency(concurrency: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将峰值时间转换为 ISO 时间戳（UTC）
+        """
+        peak_at = concurrency["peak_at"]
+        if peak_at is not None:
+            peak_at = datetime.fromtimestamp(peak_at, timezone.utc).isoformat().replace("+00:00", "Z")
+        return {**concurrency, "peak_at": peak_at}
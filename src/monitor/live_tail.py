@@ -0,0 +1,190 @@
+"""
+实时跟踪模块 - 由文件变更事件驱动，只读取日志新追加的内容
+"""
+
+import os
+import re
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from utils.compression import is_compressed
+from monitor.log_parser import LogParser, LogRecord
+from monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
+from monitor.watchdog_handler import LogFileMonitor
+
+
+logger = logging.getLogger(__name__)
+
+# OpenClaw 系统日志文件名（可带轮转序号）
+SYSTEM_LOG_PATTERN = re.compile(r"\.log(\.\d+)?$")
+
+
+class LiveTail:
+    """
+    日志实时跟踪器
+
+    LogFileMonitor 报告文件变更后：
+    - 系统日志（*.log）交给 OpenClawLogAnalyzer.tail_file，从内存中的字节游标继续分析，累加到当日的聚合状态；
+    - JSONL 活动日志和系统日志交给 LogParser.iter_appended_records，从数据库中的读取游标继续解析，
+      记录经 on_records 写库成功后再提交游标（游标按规范化的真实路径保存，与每日批处理共用，
+      配置路径末尾带 "/" 或经过符号链接时也不会重复入库）。
+
+    每次只读取新追加的完整行，CPU 开销与日志增长量成正比，与文件大小无关。
+    同一文件在去抖窗口内的多次修改合并为一次读取，回调在 LogFileHandler 的工作线程中执行，
+    分析与写库由一把锁串行化。文件重命名时游标随文件转移，删除、重新创建或截断时游标清除。
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        analyzer: OpenClawLogAnalyzer,
+        log_parser: LogParser,
+        on_records: Callable[[List[LogRecord]], Any],
+        lock: Optional[threading.RLock] = None,
+        debounce_seconds: float = 0.5,
+    ):
+        """
+        初始化跟踪器
+
+        Args:
+            paths: 监控的日志目录
+            analyzer: 实时聚合使用的系统日志分析器（应为独立实例，不与每日批处理共用）
+            log_parser: 活动日志解析器（需配置 cursor_store，否则每次都完整解析）
+            on_records: 写入一批新记录的回调（抛出异常时不提交读取游标，下次重新读取）
+            lock: 与其他写库流程（如每日批处理）共用的锁，None 时使用独立的锁
+            debounce_seconds: 同一文件的修改事件合并为一次读取的窗口（秒）
+        """
+        self.paths = paths
+        self.analyzer = analyzer
+        self.log_parser = log_parser
+        self.on_records = on_records
+        self.monitor = LogFileMonitor(
+            paths,
+            self.handle_change,
+            debounce_seconds=debounce_seconds,
+            reset_callback=self.handle_reset,
+            move_callback=self.handle_moved,
+        )
+        self._lock = lock or threading.RLock()
+        self._day: Optional[date] = None
+        self.stats = {"changes": 0, "analyzed_lines": 0, "records": 0, "errors": 0}
+
+    def start(self):
+        """
+        开始跟踪
+
+        已有的系统日志从当前末尾开始跟踪（实时聚合只统计启动之后的事件），
+        活动日志从已保存的读取游标继续（启动前未入库的内容会在第一次变更时补齐）。
+        """
+        with self._lock:
+            self._day = date.today()
+            for path in self._existing_system_logs():
+                self.analyzer.tail_file(path, from_end=True)
+        self.monitor.start()
+        logger.info("实时跟踪已启动")
+
+    def stop(self):
+        """
+        停止跟踪
+        """
+        self.monitor.stop()
+        logger.info("实时跟踪已停止")
+
+    def handle_change(self, file_path: str):
+        """
+        处理一个文件变更事件
+
+        Args:
+            file_path: 发生变更的文件路径
+        """
+        if is_compressed(file_path):
+            return
+
+        with self._lock:
+            self.stats["changes"] += 1
+            self._roll_day()
+
+            try:
+                if SYSTEM_LOG_PATTERN.search(file_path):
+                    self.stats["analyzed_lines"] += self.analyzer.tail_file(file_path)
+
+                records = list(self.log_parser.iter_appended_records(file_path))
+                if records:
+                    self.on_records(records)
+                    self.stats["records"] += len(records)
+                self.log_parser.commit_checkpoints()
+            except Exception as e:
+                self.log_parser.discard_checkpoints([file_path])
+                self.stats["errors"] += 1
+                logger.error(f"实时处理日志变更失败 {file_path}: {e}")
+
+    def handle_reset(self, file_path: str):
+        """
+        文件被删除、重新创建或截断：清除读取游标，之后从头读取
+
+        Args:
+            file_path: 文件路径
+        """
+        with self._lock:
+            self.analyzer.forget_file(file_path)
+            self.log_parser.reset_cursor(file_path)
+
+    def handle_moved(self, src_path: str, dest_path: str):
+        """
+        文件被重命名（日志轮转）：读取游标随文件转移，新路径从原位置继续读取剩余内容
+
+        Args:
+            src_path: 原路径
+            dest_path: 新路径
+        """
+        with self._lock:
+            self.analyzer.move_file(src_path, dest_path)
+            self.log_parser.move_cursor(src_path, dest_path)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        当日实时聚合的分析结果
+
+        Returns:
+            Dict: 与 OpenClawLogAnalyzer.analyze_file 相同的结构
+        """
+        with self._lock:
+            self._roll_day()
+            return self.analyzer.current_report()
+
+    def summary(self) -> str:
+        """
+        当日实时聚合的文本摘要
+
+        Returns:
+            str: 摘要文本
+        """
+        with self._lock:
+            self._roll_day()
+            return self.analyzer.get_summary()
+
+    def _roll_day(self):
+        """
+        跨天时清空聚合状态（读取游标保留，新的一天只统计之后追加的内容）
+        """
+        today = date.today()
+        if self._day != today:
+            if self._day is not None:
+                logger.info(f"日期变更为 {today}，重置实时聚合")
+            self.analyzer.reset()
+            self._day = today
+
+    def _existing_system_logs(self) -> List[str]:
+        """
+        列出监控目录中已存在的系统日志
+        """
+        found = []
+        for path in self.paths:
+            expanded_path = os.path.expanduser(os.path.expandvars(path))
+            for root, _, files in os.walk(expanded_path):
+                for name in files:
+                    if SYSTEM_LOG_PATTERN.search(name):
+                        found.append(os.path.join(root, name))
+        return found
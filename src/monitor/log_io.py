@@ -0,0 +1,228 @@
+"""
+日志文件底层读取工具 - 字节偏移、文件身份与断点续读
+"""
+
+import hashlib
+import os
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+
+
+# 反向查找上一行时每次读取的块大小
+_BACKWARD_BLOCK_SIZE = 8192
+
+
+def line_hash(line: bytes) -> str:
+    """
+    计算一行日志内容（不含换行符）的摘要
+
+    Args:
+        line: 行内容
+
+    Returns:
+        str: 十六进制摘要
+    """
+    return hashlib.sha1(line.rstrip(b"\n")).hexdigest()
+
+
+def file_identity(st: os.stat_result) -> Dict[str, int]:
+    """
+    从 stat 结果中提取文件身份信息
+
+    Args:
+        st: os.stat / os.fstat 的结果
+
+    Returns:
+        Dict[str, int]: {'dev', 'ino', 'size'}
+    """
+    return {"dev": st.st_dev, "ino": st.st_ino, "size": st.st_size}
+
+
+def read_line_ending_at(f: BinaryIO, offset: int) -> bytes:
+    """
+    读取在 offset 处结束的那一行（offset 指向换行符之后）
+
+    Args:
+        f: 以二进制模式打开的文件
+        offset: 行结束位置
+
+    Returns:
+        bytes: 行内容（不含换行符）
+    """
+    end = offset - 1  # 跳过结尾的换行符
+    if end <= 0:
+        return b""
+
+    chunks = []
+    pos = end
+    while pos > 0:
+        read_size = min(_BACKWARD_BLOCK_SIZE, pos)
+        pos -= read_size
+        f.seek(pos)
+        block = f.read(read_size)
+        newline = block.rfind(b"\n")
+        if newline != -1:
+            chunks.append(block[newline + 1:])
+            break
+        chunks.append(block)
+
+    return b"".join(reversed(chunks))
+
+
+def last_line_end(f: BinaryIO, start: int, end: int) -> int:
+    """
+    查找 [start, end) 中最后一个完整行的结束位置（换行符之后）
+
+    Args:
+        f: 以二进制模式打开的文件
+        start: 查找下界
+        end: 查找上界（通常为文件大小）
+
+    Returns:
+        int: 最后一个换行符之后的偏移；区间内没有换行符时为 start
+    """
+    pos = end
+    while pos > start:
+        read_size = min(_BACKWARD_BLOCK_SIZE, pos - start)
+        pos -= read_size
+        f.seek(pos)
+        newline = f.read(read_size).rfind(b"\n")
+        if newline != -1:
+            return pos + newline + 1
+    return start
+
+
+def resolve_resume_position(
+    file_path: str,
+    cursor: Optional[Dict[str, Any]],
+) -> Tuple[int, Optional[int], str]:
+    """
+    根据已保存的游标计算本次应从哪里继续读取
+
+    检测文件轮转（dev/inode 变化）、截断（大小变小）和改写（最后一行摘要不一致），
+    出现任一情况时回退到从头完整解析。
+
+    Args:
+        file_path: 文件路径
+        cursor: 已保存的游标（dev, ino, size, offset, line_no, last_line_hash）
+
+    Returns:
+        Tuple[int, Optional[int], str]: (字节偏移, 已读行数（未知时为 None）, 原因)
+    """
+    if not cursor:
+        return 0, 0, "new"
+
+    try:
+        with open(file_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if (st.st_dev, st.st_ino) != (cursor.get("dev"), cursor.get("ino")):
+                return 0, 0, "rotated"
+
+            offset = cursor.get("offset") or 0
+            if st.st_size < offset or st.st_size < (cursor.get("size") or 0):
+                return 0, 0, "truncated"
+
+            if offset > 0 and cursor.get("last_line_hash"):
+                if line_hash(read_line_ending_at(f, offset)) != cursor["last_line_hash"]:
+                    return 0, 0, "rewritten"
+
+            return offset, cursor.get("line_no"), "resume"
+
+    except OSError:
+        return 0, 0, "unreadable"
+
+
+def _probe_timestamp(
+    f: BinaryIO,
+    pos: int,
+    start: int,
+    end: int,
+    get_timestamp: Callable[[bytes], Optional[str]],
+    max_scan_lines: int,
+) -> Optional[Tuple[int, int, str]]:
+    """
+    从 pos 之后的第一个行首开始，找到第一条带时间戳的完整行
+
+    Returns:
+        Optional[Tuple[int, int, str]]: (行首偏移, 行尾偏移, 时间戳)；区间内找不到时返回 None
+    """
+    if pos > start:
+        # 从 pos - 1 读到换行符，恰好停在 pos 之后（含 pos）的第一个行首
+        f.seek(pos - 1)
+        f.readline()
+    else:
+        f.seek(start)
+
+    for _ in range(max_scan_lines):
+        line_start = f.tell()
+        if line_start >= end:
+            return None
+        line = f.readline()
+        if not line.endswith(b"\n"):
+            return None
+        timestamp = get_timestamp(line)
+        if timestamp is not None:
+            return line_start, line_start + len(line), timestamp
+
+    return None
+
+
+def find_offset_after_timestamp(
+    f: BinaryIO,
+    since_timestamp: str,
+    start: int,
+    end: int,
+    get_timestamp: Callable[[bytes], Optional[str]],
+    probes: int = 8,
+    max_scan_lines: int = 64,
+    min_span: int = 64 * 1024,
+) -> Optional[int]:
+    """
+    在按时间顺序写入的日志中二分查找 since_timestamp 之后的位置
+
+    先均匀抽样检查时间戳是否单调不减，再对字节偏移二分，每次只读取一行；
+    返回值之前的所有行时间戳都 <= since_timestamp（不含时间戳的行视为随前后行一起跳过）。
+    抽样或二分过程中发现时间戳乱序时返回 None，调用方应回退到线性扫描。
+
+    Args:
+        f: 以二进制模式打开的文件
+        since_timestamp: 时间戳下界（字符串比较，与增量过滤一致）
+        start: 查找起点（行首）
+        end: 查找终点（文件大小）
+        get_timestamp: 从一行原始日志中取出时间戳，没有时返回 None
+        probes: 单调性抽样点数
+        max_scan_lines: 每个探测点最多向后查看的行数
+        min_span: 区间小于该字节数时停止二分，剩余部分交给线性扫描
+
+    Returns:
+        Optional[int]: 可以安全跳转到的行首偏移；文件乱序时为 None
+    """
+    # 单调性抽样
+    previous = None
+    for i in range(probes + 1):
+        pos = start + (end - start) * i // probes
+        probe = _probe_timestamp(f, pos, start, end, get_timestamp, max_scan_lines)
+        if probe is None:
+            continue
+        if previous is not None and probe[2] < previous:
+            return None
+        previous = probe[2]
+
+    # 二分查找：lo 之前的行都 <= since_timestamp，hi 处的行 > since_timestamp
+    lo, hi = start, end
+    lo_ts, hi_ts = None, None
+    while hi - lo > min_span:
+        mid = (lo + hi) // 2
+        probe = _probe_timestamp(f, mid, start, hi, get_timestamp, max_scan_lines)
+        if probe is None:
+            break
+
+        line_start, line_end, timestamp = probe
+        if (lo_ts is not None and timestamp < lo_ts) or (hi_ts is not None and timestamp > hi_ts):
+            return None
+
+        if timestamp <= since_timestamp:
+            lo, lo_ts = line_end, timestamp
+        else:
+            hi, hi_ts = line_start, timestamp
+
+    return lo
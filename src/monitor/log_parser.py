@@ -2,181 +2,998 @@
 日志解析模块 - 解析 JSONL 格式的日志文件
 """
 
+import hashlib
 import json
 import glob
 import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from pathlib import Path
 import logging
 
-from utils.path_resolver import PathResolver
+from utils.helpers import chunked
+from utils.json_decoder import JsonLoads, get_json_loads, iter_json_array
+from utils.path_resolver import PathResolver, state_key
+from utils.compression import (
+    DECOMPRESSION_ERRORS,
+    is_compressed,
+    open_decompressed,
+    strip_compression_suffix,
+)
+from monitor.log_io import (
+    file_identity,
+    find_offset_after_timestamp,
+    line_hash,
+    resolve_resume_position,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+# 日志记录类型
+RECORD_COMMAND = "command"
+RECORD_FILE_ACCESS = "file_access"
+RECORD_EVENT = "event"
+
+# 记录类型与 parse_all_logs 返回字典键的对应关系
+_RECORD_KEYS = {
+    RECORD_COMMAND: "commands",
+    RECORD_FILE_ACCESS: "file_accesses",
+    RECORD_EVENT: "events",
+}
+
+# 剩余内容小于该字节数时直接线性扫描，不做时间戳二分
+_MIN_SEEK_BYTES = 1024 * 1024
+
+# 可解析的日志文件名（去掉压缩后缀后）
+_LOG_FILE_PATTERN = re.compile(r"\.(jsonl|log)(\.\d+)?$")
+
+
+class LineFilter:
+    """
+    字节级行预过滤器
+    
+    在解码 JSON 之前扫描原始 bytes：不含任何可产生记录的键（exec/path/error 等）的行
+    不可能产出记录，直接跳过；若配置了最低日志级别，只含事件类键且级别过低的行也跳过。
+    预过滤只会多放行、不会误丢：键名使用 JSON 转义写法等少见情况除外。
+    """
+    
+    LEVELS = {
+        "trace": 5,
+        "debug": 10,
+        "info": 20,
+        "notice": 25,
+        "warn": 30,
+        "warning": 30,
+        "error": 40,
+        "critical": 50,
+        "fatal": 50,
+    }
+    
+    _KEY_PATTERN = re.compile(
+        rb'"(exec|command|cmd|path|file|read|write|error|permission|security)"\s*:'
+    )
+    _LEVEL_PATTERN = re.compile(rb'"level"\s*:\s*"([A-Za-z]+)"')
+    _EVENT_KEYS = frozenset([b"error", b"permission", b"security"])
+    
+    def __init__(self, enabled: bool = True, min_level: Optional[str] = None):
+        """
+        初始化预过滤器
+        
+        Args:
+            enabled: 是否启用字节级预过滤
+            min_level: 安全事件的最低日志级别（如 'warn'），None 表示不过滤
+        """
+        self.enabled = enabled
+        self.min_rank = self.LEVELS.get(min_level.lower()) if min_level else None
+    
+    def accepts_line(self, raw_line: bytes) -> bool:
+        """
+        判断一行是否可能产出记录（需要解码）
+        
+        Args:
+            raw_line: 原始日志行
+        
+        Returns:
+            bool: 是否需要解码
+        """
+        if not self.enabled:
+            return True
+        
+        if self._KEY_PATTERN.search(raw_line) is None:
+            return False
+        
+        if self.min_rank is None:
+            return True
+        
+        # 只含事件类键时，级别过低的行只会产出被丢弃的事件
+        keys = {match.group(1) for match in self._KEY_PATTERN.finditer(raw_line)}
+        if not keys <= self._EVENT_KEYS:
+            return True
+        
+        levels = self._LEVEL_PATTERN.findall(raw_line)
+        if len(levels) > 1:
+            return True  # 可能含嵌套的 level 字段，交给解码后判断
+        return self.level_allowed(levels[0].decode("ascii") if levels else "info")
+    
+    def level_allowed(self, level: Any) -> bool:
+        """
+        判断事件级别是否达到最低日志级别
+        
+        Args:
+            level: 日志级别（未知级别一律保留）
+        
+        Returns:
+            bool: 是否保留
+        """
+        if self.min_rank is None:
+            return True
+        rank = self.LEVELS.get(str(level).lower())
+        return rank is None or rank >= self.min_rank
+
+
+class LogRecord(NamedTuple):
+    """从日志中提取的单条记录"""
+    kind: str  # RECORD_COMMAND / RECORD_FILE_ACCESS / RECORD_EVENT
+    data: Dict[str, Any]
+    source: str  # 来源文件路径
+
+
+class LogRecordStream:
+    """
+    惰性日志记录流
+    迭代时逐个文件、逐行产出 LogRecord，内存占用与日志大小无关
+
+    进程池模式下每个任务的结果（其文件的全部记录）整体返回，内存占用与任务大小成正比：
+    每个任务的待读字节数不超过 pool_max_task_bytes，更大的文件在当前进程中流式解析，
+    同时在途的任务数不超过 workers 的两倍。
+    """
+    
+    def __init__(
+        self,
+        parser: "LogParser",
+        found_logs: Dict[str, List[str]],
+        since_timestamp: Optional[str] = None,
+        use_checkpoints: bool = True,
+    ):
+        """
+        初始化记录流
+        
+        Args:
+            parser: 所属的日志解析器
+            found_logs: PathResolver.resolve_all_logs 的结果
+            since_timestamp: 仅产出此时间戳之后的日志
+            use_checkpoints: 是否从上次保存的字节偏移处继续读取
+        """
+        self.parser = parser
+        self.found_logs = found_logs
+        self.since_timestamp = since_timestamp
+        self.use_checkpoints = use_checkpoints
+        self.files = [f for files in found_logs.values() for f in files]
+        # 与已找到的文件相同而跳过的 [(路径, 已保留的路径)]
+        self.duplicate_logs = list(parser.path_resolver.duplicate_logs)
+        # 时间范围与请求窗口不重叠而跳过的文件（文件存在，不算缺失）
+        self.out_of_range_logs = list(parser.path_resolver.out_of_range_logs)
+        self.missing_logs = len(found_logs) == 0 and not self.out_of_range_logs
+        self.found_logs_count = len(self.files)
+        # 预过滤效果统计：非空行数 / 解码行数 / 未解码直接跳过的行数
+        self.filter_stats = {"lines": 0, "decoded": 0, "skipped": 0}
+    
+    def __iter__(self) -> Iterator[LogRecord]:
+        # 只解析 JSONL 格式（含轮转编号和压缩后缀，如 openclaw.jsonl.1.gz）
+        files = [f for f in self.files if _LOG_FILE_PATTERN.search(strip_compression_suffix(f))]
+        
+        if self.parser.workers > 1 and len(files) > 1:
+            yield from self._iter_parallel(files)
+        else:
+            for file_path in files:
+                logger.info(f"解析日志文件: {file_path}")
+                try:
+                    yield from self.parser._iter_file_records(
+                        file_path, self.since_timestamp, self.use_checkpoints, self.filter_stats
+                    )
+                except Exception as e:
+                    logger.error(f"解析日志文件失败 {file_path}: {e}")
+        
+        stats = self.filter_stats
+        if stats["lines"]:
+            logger.info(
+                f"预过滤: 共 {stats['lines']} 行, 解码 {stats['decoded']} 行, "
+                f"跳过 {stats['skipped']} 行 ({stats['skipped'] / stats['lines']:.1%})"
+            )
+    
+    def _iter_parallel(self, files: List[str]) -> Iterator[LogRecord]:
+        """
+        使用进程池并行解析多个文件
+        
+        每个任务最多包含 pool_chunksize 个文件、pool_max_task_bytes 字节待读内容（压缩文件按压缩后大小计）；
+        待读内容超过 pool_max_task_bytes 的文件不交给进程池，轮到它时在当前进程中流式解析。
+        同时在途的任务数限制为 workers 的两倍，结果按文件顺序产出，与顺序解析的输出一致。
+        
+        Args:
+            files: 待解析的文件列表
+        
+        Yields:
+            LogRecord: 日志记录
+        """
+        parser = self.parser
+        
+        # 按文件顺序划分为进程池任务 ("pool", [任务参数, ...]) 和当前进程流式解析的大文件 ("serial", 任务参数)
+        units = []
+        batch, batch_bytes = [], 0
+        for file_path in files:
+            start_offset, start_line = 0, 0
+            if self.use_checkpoints:
+                start_offset, start_line = parser._resume_position(file_path)
+            try:
+                remaining = max(0, os.path.getsize(file_path) - start_offset)
+            except OSError:
+                remaining = 0
+            task = (file_path, self.since_timestamp, start_offset, start_line)
+            
+            if batch and (
+                remaining > parser.pool_max_task_bytes
+                or len(batch) >= parser.pool_chunksize
+                or batch_bytes + remaining > parser.pool_max_task_bytes
+            ):
+                units.append(("pool", batch))
+                batch, batch_bytes = [], 0
+            if remaining > parser.pool_max_task_bytes:
+                units.append(("serial", task))
+            else:
+                batch.append(task)
+                batch_bytes += remaining
+        if batch:
+            units.append(("pool", batch))
+        
+        max_in_flight = parser.workers * 2
+        logger.info(f"使用 {parser.workers} 个进程并行解析 {len(files)} 个日志文件")
+        
+        with ProcessPoolExecutor(max_workers=parser.workers) as executor:
+            pending = deque()
+            in_flight = 0
+            next_unit = 0
+            
+            while pending or next_unit < len(units):
+                while next_unit < len(units) and in_flight < max_in_flight:
+                    kind, payload = units[next_unit]
+                    if kind == "pool":
+                        payload = executor.submit(
+                            _parse_files_task, payload, parser.json_backend,
+                            parser.line_filter, parser.seek_by_timestamp,
+                        )
+                        in_flight += 1
+                    pending.append((kind, payload))
+                    next_unit += 1
+                
+                kind, payload = pending.popleft()
+                if kind == "serial":
+                    # 大文件：进程池继续处理已提交的任务，当前进程逐行产出
+                    file_path, since_timestamp, start_offset, start_line = payload
+                    logger.info(f"解析日志文件: {file_path}")
+                    try:
+                        yield from parser._iter_file_records(
+                            file_path, since_timestamp, self.use_checkpoints, self.filter_stats,
+                            start=(start_offset, start_line),
+                        )
+                    except Exception as e:
+                        logger.error(f"解析日志文件失败 {file_path}: {e}")
+                    continue
+                
+                in_flight -= 1
+                for result in payload.result():
+                    file_path = result["file_path"]
+                    if result.get("error"):
+                        logger.error(f"解析日志文件失败 {file_path}: {result['error']}")
+                        continue
+                    
+                    logger.info(f"解析日志文件: {file_path}")
+                    for kind, entry in result["records"]:
+                        yield LogRecord(kind, entry, file_path)
+                    
+                    for key, value in result["stats"].items():
+                        self.filter_stats[key] += value
+                    
+                    if self.use_checkpoints and result.get("cursor"):
+                        parser._pending_cursors[state_key(file_path)] = result["cursor"]
+                    parser._stage_time_range(file_path, result.get("time_range"))
+
+
+def _parse_files_task(
+    tasks: List[Tuple[str, Optional[str], int, int]],
+    json_backend: str = "auto",
+    line_filter: Optional[LineFilter] = None,
+    seek_by_timestamp: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    进程池任务：解析一批文件（结果包含这些文件的全部记录，调用方据此限制每个任务的大小）
+    
+    Args:
+        tasks: [(文件路径, since_timestamp, 起始偏移, 起始行号), ...]
+        json_backend: JSON 解码后端名称
+        line_filter: 行预过滤器
+        seek_by_timestamp: 是否按时间戳二分跳过 since_timestamp 之前的内容
+    
+    Returns:
+        List[Dict[str, Any]]: 每个文件的 {'file_path', 'records', 'cursor', 'time_range', 'stats', 'error'}
+    """
+    loads = get_json_loads(json_backend)
+    results = []
+    for file_path, since_timestamp, start_offset, start_line in tasks:
+        progress = {}
+        try:
+            records = list(LogParser._iter_jsonl_file(
+                file_path, since_timestamp, start_offset, start_line, progress,
+                loads=loads, line_filter=line_filter, seek_by_timestamp=seek_by_timestamp,
+            ))
+            results.append({
+                "file_path": file_path,
+                "records": records,
+                "cursor": progress.get("cursor"),
+                "time_range": progress.get("time_range"),
+                "stats": progress["stats"],
+            })
+        except Exception as e:
+            results.append({"file_path": file_path, "error": str(e)})
+    
+    return results
+
+
 class LogParser:
     """
     日志解析器
     支持多路径、多格式的日志解析
     """
     
-    def __init__(self, log_paths: List[str]):
+    def __init__(
+        self,
+        log_paths: List[str],
+        cursor_store=None,
+        workers: int = 1,
+        pool_chunksize: int = 1,
+        pool_max_task_bytes: int = 64 * 1024 * 1024,
+        json_backend: str = "auto",
+        prefilter: bool = True,
+        min_level: Optional[str] = None,
+        seek_by_timestamp: bool = True,
+        range_index=None,
+    ):
         """
         初始化日志解析器
         
         Args:
             log_paths: 日志路径列表
+            cursor_store: 读取游标存储（需提供 get_file_cursor/save_file_cursor，
+                通常为 DatabaseManager）；为 None 时每次都完整解析
+            workers: 并行解析的进程数（<= 1 时在当前进程中顺序解析）
+            pool_chunksize: 并行解析时每个进程任务包含的文件数
+            pool_max_task_bytes: 并行解析时每个进程任务最多包含的待读字节数（任务结果整体驻留内存）；
+                待读内容更大的文件在当前进程中流式解析
+            json_backend: JSON 解码后端（auto / orjson / ujson / json）
+            prefilter: 是否在解码前按字节预过滤不可能产出记录的行
+            min_level: 安全事件的最低日志级别（如 'warn'），None 表示全部保留
+            seek_by_timestamp: 指定 since_timestamp 时，是否对按时间顺序写入的文件
+                二分查找起始位置（乱序文件自动回退为线性扫描）
+            range_index: 日志文件时间范围索引（需提供 get_file_ranges/save_file_range，
+                通常为 DatabaseManager）；为 None 时每次都解析所有匹配的文件
         """
         self.log_paths = log_paths
-        self.path_resolver = PathResolver(log_paths)
+        self.range_index = range_index
+        self.path_resolver = PathResolver(log_paths, range_index)
+        self.cursor_store = cursor_store
+        self.workers = max(1, workers)
+        self.pool_chunksize = max(1, pool_chunksize)
+        self.pool_max_task_bytes = max(1, pool_max_task_bytes)
+        self.json_backend = json_backend
+        self._loads = get_json_loads(json_backend)
+        self.line_filter = LineFilter(prefilter, min_level)
+        self.seek_by_timestamp = seek_by_timestamp
         self.parsed_logs = []
+        self._pending_cursors = {}
+        self._pending_ranges = {}
+        self._pending_approvals = {}
+        # 本轮写库失败、不提交检查点的文件（其游标可能在丢弃之后才暂存）
+        self._discarded = set()
     
-    def parse_all_logs(self, target_date: datetime = None, since_timestamp: Optional[str] = None) -> Dict[str, Any]:
+    def iter_records(
+        self,
+        target_date: datetime = None,
+        since_timestamp: Optional[str] = None,
+        use_checkpoints: bool = True,
+    ) -> LogRecordStream:
         """
-        解析所有配置路径中的日志文件
+        以流的方式解析所有配置路径中的日志文件
+        
+        日志路径在调用时立即解析（可通过返回值的 missing_logs / found_logs_count 查看），
+        日志内容在迭代时才逐行读取。
         
         Args:
             target_date: 目标日期（默认为昨天）
             since_timestamp: 仅解析此时间戳之后的日志（用于增量更新）
+            use_checkpoints: 是否从上次保存的字节偏移处继续读取
         
         Returns:
-            Dict[str, Any]: {
-                'commands': [...],
-                'file_accesses': [...],
-                'events': [...],
-                'missing_logs': bool
-            }
+            LogRecordStream: 可迭代的 LogRecord 流
         """
         if target_date is None:
             target_date = datetime.now() - timedelta(days=1)
         
         # 解析所有路径中的日志
-        found_logs = self.path_resolver.resolve_all_logs(target_date)
-        
-        commands = []
-        file_accesses = []
-        events = []
+        found_logs = self.path_resolver.resolve_all_logs(target_date, since_timestamp)
         
-        for path_pattern, files in found_logs.items():
-            for file_path in files:
-                try:
-                    logger.info(f"解析日志文件: {file_path}")
-                    
-                    # 如果是 JSONL 格式
-                    if file_path.endswith('.jsonl') or file_path.endswith('.log'):
-                        parsed = self._parse_jsonl_file(file_path, since_timestamp)
-                        commands.extend(parsed.get("commands", []))
-                        file_accesses.extend(parsed.get("file_accesses", []))
-                        events.extend(parsed.get("events", []))
-                    
-                except Exception as e:
-                    logger.error(f"解析日志文件失败 {file_path}: {e}")
+        if self.path_resolver.duplicate_logs:
+            logger.info(
+                f"跳过 {len(self.path_resolver.duplicate_logs)} 个重复的日志文件: "
+                + ", ".join(f"{path} (同 {original})" for path, original in self.path_resolver.duplicate_logs)
+            )
         
-        # 检查是否找到日志
-        missing_logs = len(found_logs) == 0
+        if self.path_resolver.out_of_range_logs:
+            logger.info(f"时间范围索引跳过 {len(self.path_resolver.out_of_range_logs)} 个日志文件")
         
-        if missing_logs:
+        if not found_logs and not self.path_resolver.out_of_range_logs:
             logger.warning(
                 f"未找到 {target_date.strftime('%Y-%m-%d')} 的日志文件。"
                 "请检查 ~/.openclaw/openclaw.json 的 logging.file 和 level 配置"
             )
         
+        return LogRecordStream(self, found_logs, since_timestamp, use_checkpoints)
+    
+    def parse_all_logs(
+        self,
+        target_date: datetime = None,
+        since_timestamp: Optional[str] = None,
+        use_checkpoints: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        解析所有配置路径中的日志文件（iter_records 的列表形式）
+        
+        Args:
+            target_date: 目标日期（默认为昨天）
+            since_timestamp: 仅解析此时间戳之后的日志（用于增量更新）
+            use_checkpoints: 是否从上次保存的字节偏移处继续读取
+        
+        Returns:
+            Dict[str, Any]: {
+                'commands': [...],
+                'file_accesses': [...],
+                'events': [...],
+                'missing_logs': bool
+            }
+        """
+        if target_date is None:
+            target_date = datetime.now() - timedelta(days=1)
+        
+        records = self.iter_records(target_date, since_timestamp, use_checkpoints)
+        
+        result = {key: [] for key in _RECORD_KEYS.values()}
+        for record in records:
+            result[_RECORD_KEYS[record.kind]].append(record.data)
+        
         return {
             "target_date": target_date.isoformat(),
-            "commands": commands,
-            "file_accesses": file_accesses,
-            "events": events,
-            "missing_logs": missing_logs,
-            "found_logs_count": len([f for files in found_logs.values() for f in files]),
+            "commands": result["commands"],
+            "file_accesses": result["file_accesses"],
+            "events": result["events"],
+            "missing_logs": records.missing_logs,
+            "found_logs_count": records.found_logs_count,
+            "duplicate_logs": records.duplicate_logs,
+            "out_of_range_logs": records.out_of_range_logs,
+            "filter_stats": records.filter_stats,
         }
     
+    def _iter_file_records(
+        self,
+        file_path: str,
+        since_timestamp: Optional[str] = None,
+        use_checkpoints: bool = True,
+        stats: Optional[Dict[str, int]] = None,
+        start: Optional[Tuple[int, Optional[int]]] = None,
+    ) -> Iterator[LogRecord]:
+        """
+        逐条产出单个文件中的记录，并在读完后暂存读取游标
+        
+        Args:
+            file_path: 文件路径
+            since_timestamp: 仅解析此时间戳之后的日志
+            use_checkpoints: 是否从上次保存的字节偏移处继续读取
+            stats: 累加预过滤统计的字典
+            start: 调用方已确定的 (起始偏移, 起始行号)；None 时按 use_checkpoints 确定
+        
+        Yields:
+            LogRecord: 日志记录
+        """
+        if start is not None:
+            start_offset, start_line = start
+        elif use_checkpoints:
+            start_offset, start_line = self._resume_position(file_path)
+        else:
+            start_offset, start_line = 0, 0
+        
+        progress = {}
+        for kind, entry in self._iter_jsonl_file(
+            file_path, since_timestamp, start_offset, start_line, progress,
+            loads=self._loads, line_filter=self.line_filter,
+            seek_by_timestamp=self.seek_by_timestamp,
+        ):
+            yield LogRecord(kind, entry, file_path)
+        
+        if stats is not None:
+            for key, value in progress.get("stats", {}).items():
+                stats[key] += value
+        
+        if use_checkpoints and progress.get("cursor"):
+            self._pending_cursors[state_key(file_path)] = progress["cursor"]
+        self._stage_time_range(file_path, progress.get("time_range"))
+    
+    def iter_appended_records(self, file_path: str) -> Iterator[LogRecord]:
+        """
+        实时跟踪：逐条产出文件自上次提交的读取游标之后追加的记录
+        
+        读完后暂存游标，写库成功后调用 commit_checkpoints 提交。
+        
+        Args:
+            file_path: 文件路径（JSONL 活动日志或系统日志）
+        
+        Yields:
+            LogRecord: 日志记录
+        """
+        if is_compressed(file_path) or not _LOG_FILE_PATTERN.search(file_path):
+            return
+        yield from self._iter_file_records(file_path)
+    
+    def reset_cursor(self, file_path: str):
+        """
+        清除文件的读取游标（文件被删除、重新创建或截断），之后从头读取
+        
+        Args:
+            file_path: 文件路径
+        """
+        key = state_key(file_path)
+        self._pending_cursors.pop(key, None)
+        if self.cursor_store is not None and self.cursor_store.get_file_cursor(key):
+            self.cursor_store.delete_file_cursor(key)
+    
+    def move_cursor(self, src_path: str, dest_path: str):
+        """
+        文件重命名（日志轮转）后把读取游标转移到新路径，新路径上已入库的内容不再重复读取
+        
+        游标中的 dev/inode 不变，新路径从原位置继续读取；原路径之后出现的新文件从头读取。
+        
+        Args:
+            src_path: 原路径
+            dest_path: 新路径
+        """
+        if self.cursor_store is None:
+            return
+        
+        src_key, dest_key = state_key(src_path), state_key(dest_path)
+        cursor = self.cursor_store.get_file_cursor(src_key)
+        if not cursor:
+            return
+        fields = ("dev", "ino", "size", "offset", "line_no", "last_line_hash")
+        self.cursor_store.save_file_cursor(dest_key, **{field: cursor[field] for field in fields})
+        self.cursor_store.delete_file_cursor(src_key)
+    
+    def _resume_position(self, file_path: str) -> Tuple[int, Optional[int]]:
+        """
+        根据已保存的游标确定文件的续读位置
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            Tuple[int, Optional[int]]: (字节偏移, 已读行数（未知时为 None）)
+        """
+        if self.cursor_store is None:
+            return 0, 0
+        
+        cursor = self.cursor_store.get_file_cursor(state_key(file_path))
+        offset, line_no, reason = resolve_resume_position(file_path, cursor)
+        
+        if reason == "resume":
+            logger.debug(f"从字节偏移 {offset} 继续解析 {file_path}")
+        elif cursor:
+            logger.info(f"日志文件已{'轮转' if reason == 'rotated' else '截断或改写'}，重新完整解析: {file_path}")
+        
+        return offset, line_no
+    
+    def _stage_time_range(self, file_path: str, time_range: Optional[Dict[str, Any]]):
+        """
+        暂存文件的时间范围索引，待 commit_checkpoints 时保存
+        
+        只读取了文件后半部分时（断点续读或按时间戳跳转）与已有索引合并，
+        没有已有索引时无法得知完整范围，不保存。
+        
+        Args:
+            file_path: 文件路径
+            time_range: _iter_jsonl_file 输出的 'time_range'
+        """
+        if self.range_index is None or not time_range:
+            return
+        
+        time_range = dict(time_range)
+        bounds = [(time_range["min_ts"], time_range["max_ts"])]
+        if not time_range.pop("complete"):
+            previous = self.range_index.get_file_ranges([state_key(file_path)]).get(state_key(file_path))
+            if not previous:
+                return
+            bounds.append((previous["min_ts"], previous["max_ts"]))
+        
+        bounds = [(low, high) for low, high in bounds if low is not None]
+        if not bounds:
+            return
+        
+        time_range["min_ts"] = min(low for low, _ in bounds)
+        time_range["max_ts"] = max(high for _, high in bounds)
+        self._pending_ranges[state_key(file_path)] = time_range
+    
+    def commit_checkpoints(self) -> int:
+        """
+        持久化本次解析得到的读取游标、时间范围索引和审批文件状态
+        
+        应在解析结果成功写入数据库之后调用，避免未入库的数据被跳过；
+        discard_checkpoints 标记的文件不提交。
+        
+        Returns:
+            int: 保存的游标数量
+        """
+        for key in self._discarded:
+            self._pending_cursors.pop(key, None)
+            self._pending_ranges.pop(key, None)
+            self._pending_approvals.pop(key, None)
+        self._discarded = set()
+        
+        if self.range_index is not None:
+            for file_path, time_range in self._pending_ranges.items():
+                self.range_index.save_file_range(file_path, **time_range)
+        self._pending_ranges = {}
+        
+        if self.cursor_store is None:
+            self._pending_cursors = {}
+            self._pending_approvals = {}
+            return 0
+        
+        for approvals_file, state in self._pending_approvals.items():
+            self.cursor_store.save_exec_approvals_state(approvals_file, **state)
+        self._pending_approvals = {}
+        
+        saved = 0
+        for file_path, cursor in self._pending_cursors.items():
+            if self.cursor_store.save_file_cursor(file_path, **cursor):
+                saved += 1
+        
+        self._pending_cursors = {}
+        logger.debug(f"已保存 {saved} 个日志读取游标")
+        return saved
+    
+    def discard_checkpoints(self, file_paths: Optional[Iterable[str]] = None):
+        """
+        丢弃暂存的读取游标、时间范围索引和审批文件状态（对应的记录未能全部写入数据库）
+        
+        流式读取时文件的游标在读完后才暂存，可能晚于其某批记录写入失败，
+        因此这些文件在下一次 commit_checkpoints 时才统一排除。
+        丢弃后这些文件下次从上次提交的位置重新读取，已写入的记录由唯一约束去重。
+        
+        Args:
+            file_paths: 要丢弃的文件路径；None 表示丢弃全部暂存状态
+        """
+        if file_paths is None:
+            self._pending_cursors = {}
+            self._pending_ranges = {}
+            self._pending_approvals = {}
+            self._discarded = set()
+            return
+        
+        self._discarded.update(state_key(file_path) for file_path in file_paths)
+    
     @staticmethod
-    def _parse_jsonl_file(file_path: str, since_timestamp: Optional[str] = None) -> Dict[str, Any]:
+    def _parse_jsonl_file(
+        file_path: str,
+        since_timestamp: Optional[str] = None,
+        start_offset: int = 0,
+        start_line: int = 0,
+        loads: JsonLoads = json.loads,
+    ) -> Dict[str, Any]:
         """
         解析单个 JSONL 文件
         
         Args:
             file_path: 文件路径
             since_timestamp: 仅解析此时间戳之后的日志
+            start_offset: 开始读取的字节偏移（必须位于行首）
+            start_line: start_offset 之前已读取的行数
+            loads: JSON 解码函数（直接解码 bytes）
         
         Returns:
-            Dict[str, Any]: 解析的数据
+            Dict[str, Any]: 解析的数据，'cursor' 为读取结束时的游标
+        """
+        result = {key: [] for key in _RECORD_KEYS.values()}
+        progress = {}
+        
+        for kind, entry in LogParser._iter_jsonl_file(
+            file_path, since_timestamp, start_offset, start_line, progress, loads=loads
+        ):
+            result[_RECORD_KEYS[kind]].append(entry)
+        
+        result["cursor"] = progress.get("cursor")
+        return result
+    
+    @staticmethod
+    def _iter_jsonl_file(
+        file_path: str,
+        since_timestamp: Optional[str] = None,
+        start_offset: int = 0,
+        start_line: Optional[int] = 0,
+        progress: Optional[Dict[str, Any]] = None,
+        loads: JsonLoads = json.loads,
+        line_filter: Optional[LineFilter] = None,
+        seek_by_timestamp: bool = False,
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
         """
-        commands = []
-        file_accesses = []
-        events = []
+        逐行解析单个 JSONL 文件
+        
+        按时间戳二分跳转后无法得知跳过的行数，之后记录的 'line' 为 None。
+        未压缩文件末尾尚未写完（没有换行符）的行不解析，写完后下次读取时产出。
+        .gz / .bz2 / .xz / .zst 压缩的轮转日志流式解压读取，总是从头解析（未变化时整体跳过）。
+        
+        Args:
+            file_path: 文件路径
+            since_timestamp: 仅解析此时间戳之后的日志
+            start_offset: 开始读取的字节偏移（必须位于行首）
+            start_line: start_offset 之前已读取的行数（未知时为 None）
+            progress: 写入 'cursor'（读取结束时的游标）、'stats'（预过滤统计）和
+                'time_range'（已解码行的时间戳范围，'complete' 表示是否从文件开头读取）
+            loads: JSON 解码函数（直接解码 bytes）
+            line_filter: 行预过滤器（None 表示解码所有行）
+            seek_by_timestamp: 指定 since_timestamp 时先二分查找第一条更新的行
+        
+        Yields:
+            Tuple[str, Dict[str, Any]]: (记录类型, 记录)
+        """
+        stats = {"lines": 0, "decoded": 0, "skipped": 0}
+        if progress is not None:
+            progress["stats"] = stats
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
+            with open(file_path, 'rb') as raw:
+                st = os.fstat(raw.fileno())
+                identity = file_identity(st)
+                
+                # 压缩日志无法按偏移跳转：游标偏移等于压缩文件大小时表示已完整读取，否则从头解压
+                compressed = is_compressed(file_path)
+                if compressed:
+                    if start_offset and start_offset == identity["size"]:
+                        logger.debug(f"压缩日志未变化，跳过: {file_path}")
+                        return
+                    start_offset, start_line = 0, 0
+                
+                read_offset = start_offset
+                if (
+                    not compressed
+                    and seek_by_timestamp
+                    and since_timestamp
+                    and identity["size"] - start_offset >= _MIN_SEEK_BYTES
+                ):
+                    seek_offset = LogParser._seek_offset(raw, since_timestamp, start_offset, identity["size"], loads)
+                    if seek_offset is None:
+                        logger.debug(f"日志时间戳非单调，线性扫描: {file_path}")
+                    elif seek_offset > start_offset:
+                        logger.debug(f"按时间戳跳过 {seek_offset - start_offset} 字节: {file_path}")
+                        read_offset = seek_offset
+                        start_line = None
+                
+                raw.seek(read_offset)
+                f = open_decompressed(raw, file_path) if compressed else raw
+                
+                # 游标只推进到最后一个完整行之后；未写完的行（未压缩文件末尾没有换行符的行）不解析，
+                # 留待写完后再读取，避免同一条记录在写完之前每次都被重复产出
+                offset = read_offset
+                line_num = start_line
+                committed_line = start_line
+                last_complete_line = None
+                min_ts, max_ts = None, None
+                
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n") and not compressed:
+                        break
+                    if line_num is not None:
+                        line_num += 1
+                    if raw_line.endswith(b"\n"):
+                        offset += len(raw_line)
+                        last_complete_line = raw_line
+                        committed_line = line_num
+                    
+                    # 空行判断不复制数据，原始 bytes 直接交给解码器（无需先解码为 str）
+                    if raw_line.isspace():
                         continue
                     
-                    try:
-                        data = json.loads(line)
-                        
-                        # 如果指定了 since_timestamp，跳过之前的日志
-                        if since_timestamp and data.get("timestamp"):
-                            if data.get("timestamp") <= since_timestamp:
-                                continue
-                        
-                        # 提取命令信息
-                        if any(key in data for key in ['exec', 'command', 'cmd']):
-                            cmd_entry = {
-                                "line": line_num,
-                                "timestamp": data.get("timestamp"),
-                                "command": data.get("exec") or data.get("command") or data.get("cmd"),
-                                "type": "exec",
-                            }
-                            commands.append(cmd_entry)
-                        
-                        # 提取文件访问信息
-                        if any(key in data for key in ['path', 'file', 'read', 'write']):
-                            access_entry = {
-                                "line": line_num,
-                                "timestamp": data.get("timestamp"),
-                                "path": data.get("path") or data.get("file"),
-                                "type": data.get("type", "access"),
-                                "read": data.get("read", False),
-                                "write": data.get("write", False),
-                            }
-                            file_accesses.append(access_entry)
-                        
-                        # 提取安全事件
-                        if any(key in data for key in ['error', 'permission', 'security']):
-                            event_entry = {
-                                "line": line_num,
-                                "timestamp": data.get("timestamp"),
-                                "level": data.get("level", "info"),
-                                "message": data.get("message") or data.get("error"),
-                                "type": "security" if "permission" in data else "event",
-                            }
-                            events.append(event_entry)
+                    stats["lines"] += 1
+                    if line_filter is not None and not line_filter.accepts_line(raw_line):
+                        stats["skipped"] += 1
+                        continue
                     
-                    except json.JSONDecodeError as e:
+                    stats["decoded"] += 1
+                    try:
+                        data = loads(raw_line)
+                    except ValueError as e:
                         logger.debug(f"JSON 解析错误 {file_path}:{line_num} - {e}")
+                        continue
+                    
+                    if not isinstance(data, dict):
+                        continue
+                    
+                    # 记录时间范围（用于时间范围索引）
+                    timestamp = data.get("timestamp")
+                    if isinstance(timestamp, str):
+                        if min_ts is None or timestamp < min_ts:
+                            min_ts = timestamp
+                        if max_ts is None or timestamp > max_ts:
+                            max_ts = timestamp
+                    
+                    # 如果指定了 since_timestamp，跳过之前的日志
+                    if since_timestamp and timestamp:
+                        if timestamp <= since_timestamp:
+                            continue
+                    
+                    # 提取命令信息
+                    if any(key in data for key in ['exec', 'command', 'cmd']):
+                        yield RECORD_COMMAND, {
+                            "line": line_num,
+                            "timestamp": data.get("timestamp"),
+                            "command": data.get("exec") or data.get("command") or data.get("cmd"),
+                            "type": "exec",
+                        }
+                    
+                    # 提取文件访问信息
+                    if any(key in data for key in ['path', 'file', 'read', 'write']):
+                        yield RECORD_FILE_ACCESS, {
+                            "line": line_num,
+                            "timestamp": data.get("timestamp"),
+                            "path": data.get("path") or data.get("file"),
+                            "type": data.get("type", "access"),
+                            "read": data.get("read", False),
+                            "write": data.get("write", False),
+                        }
+                    
+                    # 提取安全事件
+                    if any(key in data for key in ['error', 'permission', 'security']) and (
+                        line_filter is None or line_filter.level_allowed(data.get("level", "info"))
+                    ):
+                        yield RECORD_EVENT, {
+                            "line": line_num,
+                            "timestamp": data.get("timestamp"),
+                            "level": data.get("level", "info"),
+                            "message": data.get("message") or data.get("error"),
+                            "type": "security" if "permission" in data else "event",
+                        }
+                
+                if progress is not None:
+                    progress["time_range"] = {
+                        "min_ts": min_ts,
+                        "max_ts": max_ts,
+                        "size": st.st_size,
+                        "mtime_ns": st.st_mtime_ns,
+                        "complete": read_offset == 0,
+                    }
+                
+                if progress is not None and compressed:
+                    progress["cursor"] = dict(
+                        identity,
+                        offset=identity["size"],
+                        line_no=committed_line,
+                        last_line_hash=None,
+                    )
+                elif progress is not None and offset > start_offset and last_complete_line is not None:
+                    progress["cursor"] = dict(
+                        identity,
+                        offset=offset,
+                        line_no=committed_line,
+                        last_line_hash=line_hash(last_complete_line),
+                    )
         
         except FileNotFoundError:
             logger.warning(f"日志文件不存在: {file_path}")
+        except DECOMPRESSION_ERRORS as e:
+            if not is_compressed(file_path):
+                raise
+            logger.warning(f"压缩日志损坏或不完整，已读取的部分保留 {file_path}: {e}")
+    
+    @staticmethod
+    def _seek_offset(
+        f,
+        since_timestamp: str,
+        start_offset: int,
+        end_offset: int,
+        loads: JsonLoads,
+    ) -> Optional[int]:
+        """
+        在文件中二分查找 since_timestamp 之后第一条日志附近的行首
         
-        return {
-            "commands": commands,
-            "file_accesses": file_accesses,
-            "events": events,
-        }
+        Args:
+            f: 以二进制模式打开的文件
+            since_timestamp: 时间戳下界
+            start_offset: 查找起点（行首）
+            end_offset: 查找终点
+            loads: JSON 解码函数
+        
+        Returns:
+            Optional[int]: 可跳转到的字节偏移；时间戳非单调时为 None
+        """
+        def get_timestamp(raw_line: bytes) -> Optional[str]:
+            try:
+                data = loads(raw_line)
+            except ValueError:
+                return None
+            timestamp = data.get("timestamp") if isinstance(data, dict) else None
+            return timestamp if isinstance(timestamp, str) else None
+        
+        return find_offset_after_timestamp(f, since_timestamp, start_offset, end_offset, get_timestamp)
+    
+    def iter_exec_approvals(self, approvals_file: str = None) -> Iterator[Any]:
+        """
+        流式解析命令执行审批文件，只产出上次提交之后新增的条目
+        
+        文件大小和修改时间与上次提交时一致时不读取文件；否则逐条流式解码，
+        按条目内容摘要（排序键后的 JSON 的 sha1）跳过已处理过的条目。
+        新条目的摘要在 commit_checkpoints 时保存。未配置 cursor_store 时产出全部条目。
+        
+        Args:
+            approvals_file: 审批文件路径（默认为 ~/.openclaw/exec-approvals.json）
+        
+        Yields:
+            Any: 审批条目
+        """
+        if approvals_file is None:
+            approvals_file = os.path.expanduser("~/.openclaw/exec-approvals.json")
+        
+        try:
+            st = os.stat(approvals_file)
+        except FileNotFoundError:
+            logger.info(f"审批文件不存在: {approvals_file}")
+            return
+        
+        store = self.cursor_store
+        if store is not None:
+            state = store.get_exec_approvals_state(state_key(approvals_file))
+            if state and (state["size"], state["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                logger.debug(f"审批文件未变化，跳过: {approvals_file}")
+                return
+        
+        new_hashes = []
+        seen_hashes = set()
+        with open(approvals_file, 'r', encoding='utf-8') as f:
+            for batch in chunked(iter_json_array(f, key="approvals"), 500):
+                hashes = [_approval_hash(entry) for entry in batch]
+                known = store.get_seen_approval_hashes(state_key(approvals_file), hashes) if store is not None else set()
+                for entry, entry_hash in zip(batch, hashes):
+                    if entry_hash in known or entry_hash in seen_hashes:
+                        continue
+                    seen_hashes.add(entry_hash)
+                    new_hashes.append(entry_hash)
+                    yield entry
+        
+        if store is not None:
+            self._pending_approvals[state_key(approvals_file)] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "entry_hashes": new_hashes,
+            }
     
     def parse_exec_approvals(self, approvals_file: str = None) -> List[Dict[str, Any]]:
         """
-        解析命令执行审批文件
+        解析命令执行审批文件（iter_exec_approvals 的列表形式，保留用于兼容）
+        
+        条目全部读入内存；数据量大时使用 iter_exec_approvals 逐批消费。解析失败时记录错误并返回空列表。
         
         Args:
             approvals_file: 审批文件路径（默认为 ~/.openclaw/exec-approvals.json）
         
         Returns:
-            List[Dict[str, Any]]: 执行的命令列表
+            List[Dict[str, Any]]: 上次提交之后新增的命令列表
         """
         if approvals_file is None:
             approvals_file = os.path.expanduser("~/.openclaw/exec-approvals.json")
@@ -184,21 +1001,25 @@ class LogParser:
         approvals = []
         
         try:
-            if os.path.exists(approvals_file):
-                with open(approvals_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                    # 提取已批准的命令
-                    if isinstance(data, list):
-                        approvals = data
-                    elif isinstance(data, dict):
-                        approvals = data.get("approvals", [])
-                
-                logger.info(f"从 {approvals_file} 加载了 {len(approvals)} 条命令记录")
-            else:
-                logger.info(f"审批文件不存在: {approvals_file}")
+            approvals = list(self.iter_exec_approvals(approvals_file))
+            if approvals:
+                logger.info(f"从 {approvals_file} 加载了 {len(approvals)} 条新命令记录")
         
         except Exception as e:
             logger.error(f"解析审批文件失败 {approvals_file}: {e}")
         
         return approvals
+
+
+def _approval_hash(entry: Any) -> str:
+    """
+    计算审批条目的内容摘要（与键顺序和格式无关）
+    
+    Args:
+        entry: 审批条目
+    
+    Returns:
+        str: 十六进制摘要
+    """
+    canonical = json.dumps(entry, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
@@ -2,16 +2,53 @@
 OpenClaw 系统日志分析器 - 从系统日志提取监控数据
 """
 
+import gzip
+import hashlib
 import json
+import mmap
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from pathlib import Path
 import logging
 
+from utils.json_decoder import get_json_loads
+from utils.compression import DECOMPRESSION_ERRORS, is_compressed, open_decompressed
+from utils.latency_sketch import LatencySketch
+from utils.time_buckets import TimeBuckets
+from utils.path_resolver import state_key
+from monitor.error_templates import ErrorTemplateMiner
+from monitor.event_matcher import EventMatch, EventMatcher, token_id
+from monitor.lifecycle import LifecycleTracker
+from monitor.log_io import file_identity, last_line_end, line_hash, read_line_ending_at, resolve_resume_position
+
 logger = logging.getLogger(__name__)
 
+# 报告中保留的最近事件数
+_RECENT_EVENTS = 100
+
+# 报告中列出的错误模板数
+_TOP_ERROR_TEMPLATES = 20
+
+# 时间分桶统计的维度：事件类型、子系统、日志级别、API 方法
+_TIMELINE_DIMENSIONS = ("type", "subsystem", "level", "method")
+
+# 消息内容所在的键
+_MESSAGE_KEYS = tuple(str(i) for i in range(10))
+
+# ANSI 颜色控制字符
+_ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+# 时间窗口：(起始时间戳, 结束时间戳)，None 表示不限
+TimeWindow = Tuple[Optional[str], Optional[str]]
+
+# 分析快照格式版本（聚合状态字段变化时递增，旧快照自动失效）
+_SNAPSHOT_VERSION = 7
+
 
 class OpenClawLogAnalyzer:
     """
@@ -19,13 +56,63 @@ class OpenClawLogAnalyzer:
     解析系统级别的网关、会话、运行日志，提取监控指标
     """
     
-    def __init__(self):
-        """初始化分析器"""
-        self.events = []
-        self.runs = {}
-        self.sessions = {}
-        self.errors = []
+    def __init__(
+        self,
+        workers: int = 1,
+        min_chunk_bytes: int = 64 * 1024 * 1024,
+        json_backend: str = "auto",
+        state_dir: Optional[str] = None,
+        run_timeout_minutes: float = 30,
+        max_error_templates: int = 2000,
+        bucket_minutes: int = 1,
+        max_lifecycle_entries: int = 50000,
+    ):
+        """
+        初始化分析器
+        
+        Args:
+            workers: 分析单个大文件时的并行进程数（<= 1 时顺序分析）
+            min_chunk_bytes: 并行分析时每个分块的最小字节数，文件小于两个分块时顺序分析
+            json_backend: JSON 解码后端（auto / orjson / ujson / json）
+            state_dir: 分析快照目录；设置后每次分析从上次的快照和字节偏移处继续，
+                None 表示每次完整分析
+            run_timeout_minutes: 运行开始后超过该时长仍未完成即在报告中标记为超时
+            max_error_templates: 错误模板挖掘最多保留的模板数（内存预算）
+            bucket_minutes: 活动时间序列的桶宽（分钟）
+            max_lifecycle_entries: 运行、会话各自最多跟踪的条目数（内存预算）
+        """
+        self.workers = max(1, workers)
+        self.min_chunk_bytes = max(1, min_chunk_bytes)
+        self.json_backend = json_backend
+        self.state_dir = state_dir
+        self.run_timeout_minutes = run_timeout_minutes
+        self.max_error_templates = max_error_templates
+        self.bucket_minutes = bucket_minutes
+        self.max_lifecycle_entries = max_lifecycle_entries
+        self._loads = get_json_loads(json_backend)
+        self._matcher = EventMatcher()
+        self._window = None
+        # 实时跟踪模式下各文件的读取游标 {绝对路径: 游标}（与聚合状态分开，重置状态时保留）
+        self._tail_cursors: Dict[str, Dict[str, Any]] = {}
+        self._reset_state()
+    
+    def _reset_state(self):
+        """
+        重置所有聚合状态
+        
+        内存占用与日志大小无关：只保留最近的事件，错误按模板归并计数（模板数有上限），
+        时间范围和事件类型分布在读取时累计。
+        """
+        self.events = deque(maxlen=_RECENT_EVENTS)
+        self.lifecycle = LifecycleTracker(self.run_timeout_minutes * 60, self.max_lifecycle_entries)
+        self.error_templates = ErrorTemplateMiner(self.max_error_templates)
+        self.error_count = 0
+        self.event_types = {}
+        self.timeline = TimeBuckets(_TIMELINE_DIMENSIONS, self.bucket_minutes * 60)
+        self.time_min = None
+        self.time_max = None
         self.api_methods = {}
+        self.api_latency = {}
         self.external_channels = {}
         self.statistics = {
             "total_lines": 0,
@@ -39,6 +126,20 @@ class OpenClawLogAnalyzer:
             "external_conversations": 0,
         }
     
+    @property
+    def runs(self) -> Dict[str, Dict[str, Any]]:
+        """
+        运行状态 {runId: {'start', 'complete', 'status'}}
+        """
+        return self.lifecycle.runs
+    
+    @property
+    def sessions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        会话状态 {sessionId: {'start', 'state'}}
+        """
+        return self.lifecycle.sessions
+    
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
         """
         分析日志文件
@@ -50,48 +151,62 @@ class OpenClawLogAnalyzer:
             Dict: 分析结果
         """
         logger.info(f"开始分析日志文件: {file_path}")
-        self.events = []
-        self.runs = {}
-        self.sessions = {}
-        self.errors = []
-        self.api_methods = {}
-        self.external_channels = {}
-        self.statistics = {
-            "total_lines": 0,
-            "parsed_lines": 0,
-            "runs": 0,
-            "sessions": 0,
-            "errors": 0,
-            "file_accesses": 0,
-            "api_calls": 0,
-            "api_errors": 0,
-            "external_conversations": 0,
-        }
+        self._reset_state()
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    self.statistics["total_lines"] += 1
-                    
-                    try:
-                        data = json.loads(line)
-                        self.statistics["parsed_lines"] += 1
-                        
-                        # 提取事件
-                        event = self._extract_event(data, line_num)
-                        if event:
-                            self.events.append(event)
-                            
-                            # 分类处理不同类型的事件
-                            self._process_event(event)
-                    
-                    except json.JSONDecodeError:
-                        logger.debug(f"第 {line_num} 行: JSON 解析失败")
+            self._analyze_one(file_path)
+            
+            logger.info(f"分析完成: {self.statistics['parsed_lines']}/{self.statistics['total_lines']} 行")
+            
+            return self._generate_report()
+        
+        except Exception as e:
+            logger.error(f"分析文件失败: {e}")
+            return {"error": str(e)}
+    
+    def analyze_files(self, file_paths: List[str], window: Optional[TimeWindow] = None) -> Dict[str, Any]:
+        """
+        分析多个日志文件并合并为一份报告
+        
+        每个文件独立分析为部分聚合结果（workers > 1 时用进程池并行），再按 file_paths 的顺序归并：
+        计数相加；运行以后面文件中的状态为准；会话的开始时间取最早出现的一次；
+        错误样本和最近事件在所有文件的并集上重新选取。file_paths 应按时间先后排序。
+        
+        Args:
+            file_paths: 日志文件路径列表
+            window: 时间窗口 (起始, 结束)，只统计时间戳在 [起始, 结束) 内的事件（与日志时间戳按字符串比较，
+                任一端为 None 表示不限）；没有时间戳的事件总是统计
+        
+        Returns:
+            Dict: 分析结果（与 analyze_file 相同的结构）
+        """
+        logger.info(f"开始分析 {len(file_paths)} 个日志文件")
+        self._reset_state()
+        self._window = window
+        
+        try:
+            if len(file_paths) == 1:
+                self._analyze_one(file_paths[0])
+            else:
+                if self.workers > 1:
+                    with ProcessPoolExecutor(max_workers=min(self.workers, len(file_paths))) as executor:
+                        partials = list(executor.map(
+                            _analyze_file_task,
+                            file_paths,
+                            [self._worker_options(state_dir=self.state_dir)] * len(file_paths),
+                            [window] * len(file_paths),
+                        ))
+                else:
+                    partials = (
+                        _analyze_file_task(file_path, self._worker_options(state_dir=self.state_dir), window)
+                        for file_path in file_paths
+                    )
+                
+                for file_path, partial in zip(file_paths, partials):
+                    if partial.get("error"):
+                        logger.error(f"分析文件失败 {file_path}: {partial['error']}")
                         continue
+                    self._merge_partial(partial)
             
             logger.info(f"分析完成: {self.statistics['parsed_lines']}/{self.statistics['total_lines']} 行")
             
@@ -100,279 +215,659 @@ class OpenClawLogAnalyzer:
         except Exception as e:
             logger.error(f"分析文件失败: {e}")
             return {"error": str(e)}
+        
+        finally:
+            self._window = None
+    
+    def tail_file(self, file_path: str, from_end: bool = False) -> int:
+        """
+        实时跟踪：只分析文件自上次调用以来追加的完整行，结果累加到当前状态（不重置）
+        
+        读取游标保存在内存中；文件轮转、截断或改写时从头读取新内容。
+        未写完的最后一行留待下次读取；压缩文件（已轮转的归档）不跟踪。
+        
+        Args:
+            file_path: 日志文件路径
+            from_end: 第一次见到该文件时是否跳过已有内容，只跟踪之后追加的行
+        
+        Returns:
+            int: 本次分析的行数
+        """
+        if is_compressed(file_path):
+            return 0
+        
+        key = state_key(file_path)
+        cursor = self._tail_cursors.get(key)
+        offset, line_no, reason = resolve_resume_position(file_path, cursor)
+        if cursor and reason != "resume":
+            logger.info(f"日志文件已{'轮转' if reason == 'rotated' else '截断或改写'}，从头跟踪: {file_path}")
+        
+        try:
+            with open(file_path, 'rb') as f:
+                identity = file_identity(os.fstat(f.fileno()))
+                end = last_line_end(f, offset, identity["size"])
+                
+                if cursor is None and from_end:
+                    line_base = line_count = None
+                else:
+                    line_base = line_no or 0
+                    f.seek(offset)
+                    line_count = self._consume_lines(_read_until(f, offset, end), line_base)
+                
+                last_line = read_line_ending_at(f, end) if end > 0 else b""
+        except FileNotFoundError:
+            self._tail_cursors.pop(key, None)
+            return 0
+        
+        self._tail_cursors[key] = dict(
+            identity,
+            offset=end,
+            line_no=line_count,
+            last_line_hash=line_hash(last_line) if end > 0 else None,
+        )
+        return 0 if line_count is None else line_count - line_base
+    
+    def current_report(self) -> Dict[str, Any]:
+        """
+        基于当前聚合状态生成报告（实时跟踪模式使用）
+        
+        Returns:
+            Dict: 分析结果（与 analyze_file 相同的结构）
+        """
+        return self._generate_report()
+    
+    def forget_file(self, file_path: str):
+        """
+        清除文件的实时跟踪游标（文件被删除、重新创建或截断），之后从头读取
+        
+        Args:
+            file_path: 日志文件路径
+        """
+        self._tail_cursors.pop(state_key(file_path), None)
+    
+    def move_file(self, src_path: str, dest_path: str):
+        """
+        文件重命名（日志轮转）后把实时跟踪游标转移到新路径，新路径从原位置继续读取
+        
+        Args:
+            src_path: 原路径
+            dest_path: 新路径
+        """
+        cursor = self._tail_cursors.pop(state_key(src_path), None)
+        if cursor is not None:
+            self._tail_cursors[state_key(dest_path)] = cursor
+    
+    def reset(self):
+        """
+        清空聚合状态（实时跟踪的读取游标保留，之后只统计新追加的内容）
+        """
+        self._reset_state()
+    
+    def _analyze_one(self, file_path: str):
+        """
+        按文件类型和配置选择分析方式，结果累加到当前状态
+        
+        Args:
+            file_path: 日志文件路径
+        """
+        if self.state_dir:
+            self._analyze_resumable(file_path)
+        elif is_compressed(file_path):
+            self._analyze_compressed(file_path)
+        else:
+            self._analyze_plain(file_path)
+    
+    def _consume_lines(self, lines: Iterable[bytes], line_base: int = 0) -> int:
+        """
+        逐行分析日志内容
+        
+        Args:
+            lines: 原始日志行（bytes，行号从 line_base + 1 开始计算）
+            line_base: 这些行之前已读取的行数
+        
+        Returns:
+            int: 读取到的最后一行的行号（含空行）
+        """
+        loads = self._loads
+        line_num = line_base
+        for line_num, line in enumerate(lines, line_base + 1):
+            # 空行判断不复制数据，原始 bytes 直接交给解码器
+            if line.isspace():
+                continue
+            
+            self.statistics["total_lines"] += 1
+            
+            try:
+                data = loads(line)
+            except ValueError:
+                logger.debug(f"第 {line_num} 行: JSON 解析失败")
+                continue
+            
+            self.statistics["parsed_lines"] += 1
+            
+            # 提取事件
+            extracted = self._extract_event(data, line_num)
+            if extracted:
+                event, match = extracted
+                self.events.append(event)
+                
+                # 分类处理不同类型的事件
+                self._process_event(event, match)
+        
+        return line_num
+    
+    def _analyze_plain(self, file_path: str, start: int = 0, end: Optional[int] = None, line_base: int = 0) -> int:
+        """
+        分析未压缩日志的 [start, end) 字节区间，足够大时分块并行
+        
+        Args:
+            file_path: 日志文件路径
+            start: 起始偏移（位于行首）
+            end: 结束偏移（位于行首；None 表示读到文件末尾）
+            line_base: start 之前的行数
+        
+        Returns:
+            int: 读取到的最后一行的行号
+        """
+        ranges = self._split_file(file_path, start, end)
+        if len(ranges) > 1:
+            return self._analyze_parallel(file_path, ranges, line_base)
+        
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            if end is None:
+                return self._consume_lines(f, line_base)
+            
+            return self._consume_lines(_read_until(f, start, end), line_base)
+    
+    def _analyze_compressed(self, file_path: str) -> int:
+        """
+        流式解压并顺序分析压缩的轮转日志（无法按字节区间切分）
+        
+        文件损坏或压缩未写完时保留已分析的部分。
+        
+        Args:
+            file_path: 压缩日志文件路径
+        
+        Returns:
+            int: 读取的行数；文件不完整时为 -1
+        """
+        with open(file_path, 'rb') as raw, open_decompressed(raw, file_path) as f:
+            try:
+                return self._consume_lines(f)
+            except DECOMPRESSION_ERRORS as e:
+                logger.warning(f"压缩日志损坏或不完整，已分析的部分保留 {file_path}: {e}")
+                return -1
+    
+    def _analyze_resumable(self, file_path: str):
+        """
+        从快照恢复聚合状态，只分析上次之后追加的内容，并写入新的快照
+        
+        文件轮转、截断或改写时（由读取游标判断）丢弃快照重新分析。
+        未写完的最后一行留待下次分析；压缩文件未变化时直接使用快照。
+        
+        Args:
+            file_path: 日志文件路径
+        """
+        snapshot_path = self._snapshot_path(file_path)
+        snapshot = self._load_snapshot(snapshot_path)
+        cursor = snapshot["cursor"] if snapshot else None
+        offset, line_no, reason = resolve_resume_position(file_path, cursor)
+        
+        with open(file_path, 'rb') as f:
+            identity = file_identity(os.fstat(f.fileno()))
+            
+            if is_compressed(file_path):
+                if reason == "resume" and offset == identity["size"]:
+                    logger.info(f"压缩日志未变化，使用上次的分析结果: {file_path}")
+                    self._merge_partial(snapshot["partial"])
+                    return
+                line_count = self._analyze_compressed(file_path)
+                if line_count >= 0:
+                    self._save_snapshot(snapshot_path, file_path, dict(
+                        identity, offset=identity["size"], line_no=line_count, last_line_hash=None,
+                    ))
+                return
+            
+            if reason == "resume" and offset > 0:
+                self._merge_partial(snapshot["partial"])
+                line_base = line_no or 0
+                logger.info(f"从字节偏移 {offset} 继续分析（已分析 {line_base} 行）: {file_path}")
+            else:
+                if cursor:
+                    logger.info(f"日志文件已{'轮转' if reason == 'rotated' else '截断或改写'}，重新完整分析: {file_path}")
+                offset, line_base = 0, 0
+            
+            end = last_line_end(f, offset, identity["size"])
+            last_line = read_line_ending_at(f, end) if end > 0 else b""
+        
+        line_count = self._analyze_plain(file_path, offset, end, line_base) if end > offset else line_base
+        
+        self._save_snapshot(snapshot_path, file_path, dict(
+            identity,
+            offset=end,
+            line_no=line_count,
+            last_line_hash=line_hash(last_line) if end > 0 else None,
+        ))
+    
+    def _snapshot_path(self, file_path: str) -> Path:
+        """
+        获取日志文件对应的快照路径
+        
+        Args:
+            file_path: 日志文件路径
+        
+        Returns:
+            Path: 快照文件路径
+        """
+        key = os.path.abspath(file_path)
+        if self._window is not None:
+            # 不同时间窗口的聚合结果不同，分别保存
+            key += f"|{self._window[0]}|{self._window[1]}"
+        key = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return Path(self.state_dir) / f"{key}.json.gz"
+    
+    def prune_snapshots(self, max_age_days: int = 7) -> int:
+        """
+        删除长时间未更新的分析快照（按时间窗口保存的快照会随日期不断增加）
+        
+        Args:
+            max_age_days: 保留天数
+        
+        Returns:
+            int: 删除的快照数
+        """
+        if not self.state_dir or not os.path.isdir(self.state_dir):
+            return 0
+        
+        cutoff = datetime.now().timestamp() - max_age_days * 86400
+        removed = 0
+        for snapshot_path in Path(self.state_dir).glob("*.json.gz"):
+            try:
+                if snapshot_path.stat().st_mtime < cutoff:
+                    snapshot_path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        
+        return removed
+    
+    def _load_snapshot(self, snapshot_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取分析快照
+        
+        Args:
+            snapshot_path: 快照文件路径
+        
+        Returns:
+            Optional[Dict]: {'cursor', 'partial'}；不存在、损坏或版本不符时为 None
+        """
+        if not snapshot_path.exists():
+            return None
+        
+        try:
+            with gzip.open(snapshot_path, 'rt', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f"分析快照损坏，重新完整分析 {snapshot_path}: {e}")
+            return None
+        
+        if snapshot.get("version") != _SNAPSHOT_VERSION:
+            return None
+        
+        lifecycle = snapshot["partial"]["lifecycle"]
+        lifecycle["explicit_session_states"] = set(lifecycle["explicit_session_states"])
+        return snapshot
+    
+    def _save_snapshot(self, snapshot_path: Path, file_path: str, cursor: Dict[str, Any]):
+        """
+        写入分析快照（先写临时文件再替换，避免中断时留下半个快照）
+        
+        Args:
+            snapshot_path: 快照文件路径
+            file_path: 日志文件路径
+            cursor: 读取游标
+        """
+        partial = self._export_partial(cursor["line_no"])
+        partial["lifecycle"] = {
+            **partial["lifecycle"],
+            "explicit_session_states": sorted(partial["lifecycle"]["explicit_session_states"]),
+        }
+        snapshot = {
+            "version": _SNAPSHOT_VERSION,
+            "file_path": os.path.abspath(file_path),
+            "cursor": cursor,
+            "partial": partial,
+        }
+        
+        try:
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, snapshot_path)
+        except OSError as e:
+            logger.warning(f"保存分析快照失败 {snapshot_path}: {e}")
+    
+    def _split_file(self, file_path: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        将文件的 [start, end) 区间按换行符对齐切分为若干字节区间
+        
+        Args:
+            file_path: 日志文件路径
+            start: 起始偏移（位于行首）
+            end: 结束偏移（None 表示文件末尾）
+        
+        Returns:
+            List[Tuple[int, int]]: [(起始偏移, 结束偏移), ...]；不需要并行时只有一个区间
+        """
+        if end is None:
+            end = os.path.getsize(file_path)
+        span = end - start
+        parts = min(self.workers, span // self.min_chunk_bytes)
+        if parts <= 1:
+            return [(start, end)]
+        
+        boundaries = [start]
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(1, parts):
+                newline = mm.find(b"\n", max(boundaries[-1], start + span * i // parts), end)
+                if newline == -1:
+                    break
+                boundaries.append(newline + 1)
+        boundaries.append(end)
+        
+        return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    
+    def _analyze_parallel(self, file_path: str, ranges: List[Tuple[int, int]], line_base: int = 0) -> int:
+        """
+        使用进程池并行分析文件的各个区间，并按顺序归并部分结果
+        
+        Args:
+            file_path: 日志文件路径
+            ranges: 按换行符对齐的字节区间
+            line_base: 第一个区间之前的行数
+        
+        Returns:
+            int: 读取到的最后一行的行号
+        """
+        logger.info(f"使用 {self.workers} 个进程并行分析 {len(ranges)} 个分块")
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            partials = executor.map(
+                _analyze_range,
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [self._worker_options()] * len(ranges),
+                [self._window] * len(ranges),
+            )
+            
+            for partial in partials:
+                self._merge_partial(partial, line_base)
+                line_base += partial["line_count"]
+        
+        return line_base
     
-    def _extract_event(self, data: dict, line_num: int) -> Optional[Dict[str, Any]]:
+    def _worker_options(self, **extra) -> Dict[str, Any]:
+        """
+        子进程中创建分析器的参数（与聚合结果格式相关的参数必须一致，才能归并）
+        
+        Args:
+            **extra: 额外参数
+        
+        Returns:
+            Dict: OpenClawLogAnalyzer 的构造参数
+        """
+        return {
+            "json_backend": self.json_backend,
+            "run_timeout_minutes": self.run_timeout_minutes,
+            "max_error_templates": self.max_error_templates,
+            "bucket_minutes": self.bucket_minutes,
+            "max_lifecycle_entries": self.max_lifecycle_entries,
+            **extra,
+        }
+    
+    def _export_partial(self, line_count: int = 0) -> Dict[str, Any]:
+        """
+        导出可归并的部分聚合结果
+        
+        Args:
+            line_count: 本段日志的行数（含空行），用于归并时换算行号
+        
+        Returns:
+            Dict: 部分聚合结果
+        """
+        return {
+            "line_count": line_count,
+            "statistics": self.statistics,
+            "events": list(self.events),
+            "lifecycle": self.lifecycle.export(),
+            "error_templates": self.error_templates.export(),
+            "timeline": self.timeline.export(),
+            "error_count": self.error_count,
+            "event_types": self.event_types,
+            "time_min": self.time_min,
+            "time_max": self.time_max,
+            "api_methods": self.api_methods,
+            "api_latency": {method: sketch.to_dict() for method, sketch in self.api_latency.items()},
+            "external_channels": self.external_channels,
+        }
+    
+    def _merge_partial(self, partial: Dict[str, Any], line_base: int = 0):
+        """
+        将后一段日志的部分聚合结果归并到当前状态
+        
+        归并结果与顺序分析两段日志完全一致：计数相加，事件按顺序拼接，
+        运行/会话以后一段中出现的状态变化为准。
+        
+        Args:
+            partial: _export_partial 导出的部分结果
+            line_base: 该段日志之前的行数
+        """
+        # 行号换算
+        if line_base:
+            for event in partial["events"]:
+                event["line_num"] += line_base
+        
+        for key, value in partial["statistics"].items():
+            self.statistics[key] = self.statistics.get(key, 0) + value
+        
+        self.events.extend(partial["events"])
+        self.error_templates.merge(partial["error_templates"])
+        self.timeline.merge(partial["timeline"])
+        self.error_count += partial["error_count"]
+        
+        for event_type, count in partial["event_types"].items():
+            self.event_types[event_type] = self.event_types.get(event_type, 0) + count
+        
+        for timestamp in (partial["time_min"], partial["time_max"]):
+            if timestamp:
+                self._update_time_range(timestamp)
+        
+        for method, count in partial["api_methods"].items():
+            self.api_methods[method] = self.api_methods.get(method, 0) + count
+        
+        for method, data in partial["api_latency"].items():
+            sketch = LatencySketch.from_dict(data)
+            if method in self.api_latency:
+                self.api_latency[method].merge(sketch)
+            else:
+                self.api_latency[method] = sketch
+        
+        for channel, count in partial["external_channels"].items():
+            self.external_channels[channel] = self.external_channels.get(channel, 0) + count
+        
+        self.lifecycle.merge(partial["lifecycle"])
+    
+    def _extract_event(self, data: dict, line_num: int) -> Optional[Tuple[Dict[str, Any], EventMatch]]:
         """
         从日志行提取事件
         
+        事件类型、API 方法和外部渠道由 EventMatcher 对消息扫描一次同时得出。
+        时间戳不在分析窗口内的行在拼接消息之前就跳过；事件只保存原始消息一份，
+        去除 ANSI 控制字符后的消息仅用于匹配（不含控制字符时两者是同一个对象）。
+        
         Args:
             data: JSON 数据
             line_num: 行号
         
         Returns:
-            Dict: 事件或 None
+            Tuple[Dict, EventMatch]: (事件, 匹配结果)，不是事件时为 None
         """
         if not isinstance(data, dict):
             return None
         
         # 获取基础信息
-        timestamp = data.get('_meta', {}).get('date') or data.get('time')
-        subsystem = data.get('_meta', {}).get('name', '')
-        log_level = data.get('_meta', {}).get('logLevelName', 'INFO')
+        meta = data.get('_meta', {})
+        timestamp = meta.get('date') or data.get('time')
+        if self._window is not None and not self._in_window(timestamp, self._window):
+            return None
         
-        # 获取消息内容
-        message_parts = []
-        for i in range(10):
-            key = str(i)
-            if key in data:
-                val = data[key]
-                if isinstance(val, dict):
-                    message_parts.append(json.dumps(val))
-                else:
-                    message_parts.append(str(val))
+        subsystem = meta.get('name', '')
+        log_level = meta.get('logLevelName', 'INFO')
         
-        message = " ".join(message_parts)
-        clean_message = self._strip_ansi(message)
+        # 获取消息内容
+        message = self._message_text(data)
+        match = self._matcher.match(self._strip_ansi(message), subsystem)
         
         event = {
             "timestamp": timestamp,
             "subsystem": subsystem,
             "log_level": log_level,
             "message": message,
-            "clean_message": clean_message,
             "line_num": line_num,
-            "type": self._classify_event(clean_message, subsystem),
+            "type": match[0],
         }
         
-        return event
+        return event, match
     
-    def _classify_event(self, message: str, subsystem: str) -> str:
+    @staticmethod
+    def _message_text(data: dict) -> str:
         """
-        分类事件类型
+        拼接消息内容（键 "0" ~ "9" 的值，字典转为 JSON）
         
         Args:
-            message: 消息内容
-            subsystem: 子系统
+            data: JSON 数据
         
         Returns:
-            str: 事件类型
+            str: 消息；只有一个字符串部分时直接返回该字符串
         """
-        message_lower = message.lower()
-        
-        # 运行相关
-        if 'run' in message_lower and 'embedded' in message_lower:
-            if 'start' in message_lower:
-                return 'run_start'
-            elif 'done' in message_lower or 'complete' in message_lower:
-                return 'run_complete'
-            else:
-                return 'run_event'
-        
-        # 会话相关
-        if 'session' in message_lower:
-            if 'state' in message_lower:
-                return 'session_state'
-            else:
-                return 'session_event'
-        
-        # 网关相关
-        if 'gateway' in subsystem.lower():
-            if 'listening' in message_lower:
-                return 'gateway_listening'
-            elif 'mounted' in message_lower:
-                return 'gateway_mounted'
-            else:
-                return 'gateway_event'
-        
-        # 连接相关
-        if 'connection' in message_lower or 'connect' in message_lower:
-            if 'close' in message_lower or 'closed' in message_lower:
-                return 'connection_closed'
-            else:
-                return 'connection_event'
-        
-        # 错误和警告
-        if message_lower in ['ERROR', 'WARN', 'WARNING']:
-            return 'error'
-        
-        # 文件访问
-        if any(word in message_lower for word in ['file', 'path', '/users', '/tmp']):
-            return 'file_access'
-        
-        return 'other'
+        parts = [data[key] for key in _MESSAGE_KEYS if key in data]
+        if len(parts) == 1 and isinstance(parts[0], str):
+            return parts[0]
+        return " ".join(json.dumps(part) if isinstance(part, dict) else str(part) for part in parts)
     
-    def _process_event(self, event: Dict[str, Any]):
+    def _process_event(self, event: Dict[str, Any], match: Optional[EventMatch] = None):
         """
         处理事件，更新统计
         
         Args:
             event: 事件对象
+            match: _extract_event 得到的匹配结果（None 时重新匹配）
         """
         event_type = event.get('type', 'other')
-        clean_message = event.get('clean_message', event.get('message', ''))
+        if match is None:
+            match = self._matcher.match(self._strip_ansi(event.get('message', '')), event.get('subsystem', ''))
+        _, api_method, channel, failed, tokens = match
+        
+        self.event_types[event_type] = self.event_types.get(event_type, 0) + 1
+        if event.get('timestamp'):
+            self._update_time_range(event['timestamp'])
+        self.timeline.add(event.get('timestamp'), event_type, event.get('subsystem'), event.get('log_level'), api_method)
         
         # 统计运行
         if 'run' in event_type:
             self.statistics["runs"] += 1
             
             # 尝试提取 runId
-            run_id = self._extract_run_id(event['message'])
+            run_id = token_id(tokens, 'runId')
             if run_id:
-                if run_id not in self.runs:
-                    self.runs[run_id] = {
-                        'start': None,
-                        'complete': None,
-                        'status': 'unknown',
-                    }
-                
-                if event_type == 'run_start':
-                    self.runs[run_id]['start'] = event['timestamp']
-                    self.runs[run_id]['status'] = 'running'
-                elif event_type == 'run_complete':
-                    self.runs[run_id]['complete'] = event['timestamp']
-                    self.runs[run_id]['status'] = 'complete'
+                self.lifecycle.on_run(run_id, event_type, event['timestamp'])
         
         # 统计会话
         if 'session' in event_type:
             self.statistics["sessions"] += 1
             
             # 尝试提取 sessionId
-            session_id = self._extract_session_id(event['message'])
+            session_id = token_id(tokens, 'sessionId')
             if session_id:
-                if session_id not in self.sessions:
-                    self.sessions[session_id] = {
-                        'start': event['timestamp'],
-                        'state': 'active',
-                    }
-                
+                state = None
                 if event_type == 'session_state':
-                    self.sessions[session_id]['state'] = self._extract_session_state(event['message'])
+                    state = self._extract_session_state(event['message'])
+                self.lifecycle.on_session(session_id, event['timestamp'], state)
         
         # 统计错误
         if event.get('log_level') in ['ERROR', 'WARN']:
             self.statistics["errors"] += 1
-            self.errors.append(event)
+            self.error_count += 1
+            self.error_templates.add(self._strip_ansi(event['message']), event['timestamp'])
         
         # 统计文件访问
         if event_type == 'file_access':
             self.statistics["file_accesses"] += 1
 
         # 统计 API 使用情况
-        api_method = self._extract_api_method(clean_message, event.get('subsystem', ''))
         if api_method:
             self.statistics["api_calls"] += 1
             self.api_methods[api_method] = self.api_methods.get(api_method, 0) + 1
-            if event.get('log_level') in ['ERROR', 'WARN'] or 'failed' in clean_message.lower():
+            if tokens["duration_ms"] is not None:
+                sketch = self.api_latency.get(api_method)
+                if sketch is None:
+                    sketch = self.api_latency[api_method] = LatencySketch()
+                sketch.add(tokens["duration_ms"])
+            if event.get('log_level') in ['ERROR', 'WARN'] or failed:
                 self.statistics["api_errors"] += 1
 
         # 统计外部对话（频道）情况
-        channel = self._detect_external_channel(clean_message, event.get('subsystem', ''))
         if channel:
             self.statistics["external_conversations"] += 1
             self.external_channels[channel] = self.external_channels.get(channel, 0) + 1
 
-    @staticmethod
-    def _strip_ansi(text: str) -> str:
+    def _update_time_range(self, timestamp: Any):
         """
-        去除 ANSI 颜色控制字符
+        更新时间范围
+        
+        Args:
+            timestamp: 事件时间戳
         """
-        return re.sub(r"\x1b\[[0-9;]*m", "", text or "")
+        if self.time_min is None or timestamp < self.time_min:
+            self.time_min = timestamp
+        if self.time_max is None or timestamp > self.time_max:
+            self.time_max = timestamp
 
     @staticmethod
-    def _extract_api_method(message: str, subsystem: str) -> Optional[str]:
-        """
-        从消息中提取 API 方法名（如 chat.history / agent.turn）
+    def _in_window(timestamp: Any, window: TimeWindow) -> bool:
         """
-        if not message:
-            return None
-
-        subsystem_lower = (subsystem or "").lower()
-        if "gateway/ws" not in subsystem_lower and "gateway" not in subsystem_lower and "agent" not in subsystem_lower:
-            return None
-
-        # 例: "res chat.history 61ms conn=..."
-        method_match = re.search(r"\b(req|res)\b\s+([a-zA-Z][\w./:-]+)", message)
-        if method_match:
-            return method_match.group(2)
-
-        # 兜底: method=xxx
-        method_match = re.search(r"\bmethod=([a-zA-Z][\w./:-]+)", message)
-        if method_match:
-            return method_match.group(1)
-
-        # 兜底: 已知常见方法
-        message_lower = message.lower()
-        common_methods = [
-            "chat.history",
-            "agent.turn",
-            "agent.reply",
-            "gateway.call",
-            "models.status",
-            "models.list",
-        ]
-        for method in common_methods:
-            if method in message_lower:
-                return method
-
-        return None
-
-    @staticmethod
-    def _detect_external_channel(message: str, subsystem: str) -> Optional[str]:
-        """
-        检测外部对话渠道
-        """
-        channels = [
-            "telegram", "whatsapp", "discord", "slack", "signal",
-            "imessage", "nostr", "msteams", "mattermost", "matrix",
-            "bluebubbles", "line", "zalo", "googlechat", "webchat",
-            "wechat", "qq", "sms",
-        ]
-
-        subsystem_lower = (subsystem or "").lower()
-        message_lower = (message or "").lower()
-
-        if "gateway/channels/" in subsystem_lower:
-            channel = subsystem_lower.split("/")[-1]
-            return channel
-
-        if "gateway/ws" in subsystem_lower:
-            if "webchat" in message_lower or "control-ui" in message_lower:
-                return "webchat"
-
-        for channel in channels:
-            if channel in message_lower:
-                return channel
-
-        return None
-    
-    def _extract_run_id(self, message: str) -> Optional[str]:
-        """
-        从消息中提取 runId
+        判断事件时间戳是否在时间窗口内（无法比较的时间戳视为在窗口内）
         
         Args:
-            message: 消息内容
+            timestamp: 事件时间戳
+            window: (起始, 结束)
         
         Returns:
-            str: runId 或 None
+            bool: 是否在窗口内
         """
-        pattern = r'runId=([a-f0-9\-]+)'
-        match = re.search(pattern, message)
-        return match.group(1) if match else None
-    
-    def _extract_session_id(self, message: str) -> Optional[str]:
+        if not isinstance(timestamp, str):
+            return True
+        start, end = window
+        if start is not None and timestamp < start:
+            return False
+        if end is not None and timestamp >= end:
+            return False
+        return True
+
+    @staticmethod
+    def _strip_ansi(text: str) -> str:
         """
-        从消息中提取 sessionId
-        
-        Args:
-            message: 消息内容
-        
-        Returns:
-            str: sessionId 或 None
+        去除 ANSI 颜色控制字符（不含 ESC 时原样返回）
         """
-        pattern = r'sessionId=([a-f0-9\-]+)'
-        match = re.search(pattern, message)
-        return match.group(1) if match else None
-    
+        if not text:
+            return ""
+        if "\x1b" not in text:
+            return text
+        return _ANSI_PATTERN.sub("", text)
+
     def _extract_session_state(self, message: str) -> str:
         """
         从消息中提取会话状态
@@ -397,71 +892,72 @@ class OpenClawLogAnalyzer:
         Returns:
             Dict: 报告数据
         """
-        # 计算时间范围
-        timestamps = [e.get('timestamp') for e in self.events if e.get('timestamp')]
-        timestamps = sorted([t for t in timestamps if t])
-        
+        # 时间范围与事件分类统计在读取时已累计
         time_range = {
-            'start': timestamps[0] if timestamps else None,
-            'end': timestamps[-1] if timestamps else None,
+            'start': self.time_min,
+            'end': self.time_max,
         }
         
-        # 事件分类统计
-        event_types = {}
-        for event in self.events:
-            event_type = event.get('type', 'other')
-            event_types[event_type] = event_types.get(event_type, 0) + 1
-        
-        # 运行统计
-        runs_stats = {
-            'total': len(self.runs),
-            'completed': sum(1 for r in self.runs.values() if r['status'] == 'complete'),
-            'running': sum(1 for r in self.runs.values() if r['status'] == 'running'),
-            'unknown': sum(1 for r in self.runs.values() if r['status'] == 'unknown'),
-        }
-        
-        # 会话统计
-        sessions_stats = {
-            'total': len(self.sessions),
-            'active': sum(1 for s in self.sessions.values() if s['state'] == 'active'),
-            'inactive': sum(1 for s in self.sessions.values() if s['state'] == 'inactive'),
-        }
+        # 运行/会话状态统计（各遍历一次），时长分布、并发度与超时运行
+        runs_stats, sessions_stats = self.lifecycle.status_counts()
+        lifecycle = self.lifecycle.summary(self.time_min, self.time_max)
         
-        # 错误日志
-        error_summary = {}
-        for error in self.errors[:50]:  # 只保留前50个错误
-            msg_preview = error['message'][:60]
-            error_summary[msg_preview] = error_summary.get(msg_preview, 0) + 1
+        # 错误模板（覆盖全部错误/警告）
+        error_templates = self.error_templates.top(_TOP_ERROR_TEMPLATES)
         
         report = {
             'analysis_time': datetime.now(ZoneInfo("Asia/Shanghai")).isoformat(),
             'time_range': time_range,
             'statistics': self.statistics,
-            'event_distribution': event_types,
+            'event_distribution': dict(self.event_types),
             'runs': runs_stats,
             'sessions': sessions_stats,
+            'lifecycle': lifecycle,
+            'timeline': self.timeline.summary(),
             'api_usage': {
                 'total_calls': self.statistics.get('api_calls', 0),
                 'errors': self.statistics.get('api_errors', 0),
                 'methods': self.api_methods,
+                'latency': self._latency_summary(),
             },
             'external_conversations': {
                 'total': self.statistics.get('external_conversations', 0),
                 'channels': self.external_channels,
             },
             'errors': {
-                'total': len(self.errors),
-                'top_errors': error_summary,
+                'total': self.error_count,
+                'top_errors': {item['template']: item['count'] for item in error_templates},
+                'templates': error_templates,
+                'distinct_templates': len(self.error_templates),
+                'evicted': self.error_templates.evicted,
             },
             'details': {
                 'runs': self.runs,
                 'sessions': self.sessions,
-                'recent_events': self.events[-100:],  # 最后100个事件
+                'recent_events': list(self.events),  # 最后100个事件
             }
         }
         
         return report
     
+    def _latency_summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        汇总各 API 方法的延迟分位数（毫秒）
+        
+        Returns:
+            Dict: {方法: {'count', 'p50', 'p95', 'p99', 'max'}}，按调用次数降序
+        """
+        summary = {}
+        for method, sketch in sorted(self.api_latency.items(), key=lambda item: -item[1].count):
+            summary[method] = {
+                'count': sketch.count,
+                'p50': round(sketch.quantile(0.50), 1),
+                'p95': round(sketch.quantile(0.95), 1),
+                'p99': round(sketch.quantile(0.99), 1),
+                'max': round(sketch.max, 1),
+            }
+        return summary
+    
     def get_summary(self) -> str:
         """
         获取简洁的文本摘要
@@ -469,6 +965,7 @@ class OpenClawLogAnalyzer:
         Returns:
             str: 摘要文本
         """
+        runs_stats, sessions_stats = self.lifecycle.status_counts()
         lines = [
             "=" * 60,
             "OpenClaw 系统日志分析摘要",
@@ -485,16 +982,98 @@ class OpenClawLogAnalyzer:
             f"  • 外部对话: {self.statistics.get('external_conversations', 0)} 次",
             "",
             "🚀 运行情况:",
-            f"  • 总运行数: {len(self.runs)}",
-            f"  • 已完成: {sum(1 for r in self.runs.values() if r['status'] == 'complete')}",
-            f"  • 运行中: {sum(1 for r in self.runs.values() if r['status'] == 'running')}",
+            f"  • 总运行数: {runs_stats['total']}",
+            f"  • 已完成: {runs_stats['completed']}",
+            f"  • 运行中: {runs_stats['running']}",
             "",
             "💬 会话情况:",
-            f"  • 总会话数: {len(self.sessions)}",
-            f"  • 活跃: {sum(1 for s in self.sessions.values() if s['state'] == 'active')}",
-            f"  • 已关闭: {sum(1 for s in self.sessions.values() if s['state'] == 'inactive')}",
+            f"  • 总会话数: {sessions_stats['total']}",
+            f"  • 活跃: {sessions_stats['active']}",
+            f"  • 已关闭: {sessions_stats['inactive']}",
             "",
             "=" * 60,
         ]
         
         return "\n".join(lines)
+
+
+def _read_until(f, start: int, end: int) -> Iterable[bytes]:
+    """
+    从当前位置 start 开始逐行读取，直到 end（位于行首）
+
+    Args:
+        f: 已定位到 start 的二进制文件对象
+        start: 当前偏移
+        end: 结束偏移
+
+    Yields:
+        bytes: 日志行
+    """
+    pos = start
+    for line in f:
+        if pos >= end:
+            break
+        pos += len(line)
+        yield line
+
+
+def _analyze_range(
+    file_path: str,
+    start: int,
+    end: int,
+    options: Dict[str, Any],
+    window: Optional[TimeWindow] = None,
+) -> Dict[str, Any]:
+    """
+    进程池任务：分析文件中 [start, end) 字节区间内的日志行
+
+    Args:
+        file_path: 日志文件路径
+        start: 起始偏移（位于行首）
+        end: 结束偏移（位于行首或文件末尾）
+        options: 分析器构造参数（OpenClawLogAnalyzer._worker_options）
+        window: 时间窗口（与父进程的分析器一致）
+
+    Returns:
+        Dict: 该区间的部分聚合结果（行号从 1 开始）
+    """
+    analyzer = OpenClawLogAnalyzer(**options)
+    analyzer._window = window
+
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        mm.seek(start)
+
+        def lines():
+            while mm.tell() < end:
+                yield mm.readline()
+
+        line_count = analyzer._consume_lines(lines())
+
+    return analyzer._export_partial(line_count)
+
+
+def _analyze_file_task(
+    file_path: str,
+    options: Dict[str, Any],
+    window: Optional[TimeWindow] = None,
+) -> Dict[str, Any]:
+    """
+    进程池任务：分析单个日志文件
+
+    Args:
+        file_path: 日志文件路径
+        options: 分析器构造参数（OpenClawLogAnalyzer._worker_options，含快照目录）
+        window: 时间窗口
+
+    Returns:
+        Dict: 该文件的部分聚合结果；失败时为 {'error'}
+    """
+    analyzer = OpenClawLogAnalyzer(**options)
+    analyzer._window = window
+
+    try:
+        analyzer._analyze_one(file_path)
+    except Exception as e:
+        return {"error": str(e)}
+
+    return analyzer._export_partial()
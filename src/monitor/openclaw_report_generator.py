@@ -5,7 +5,7 @@ OpenClaw 系统日志监控报告生成器 - 邮件优化版本
 
 import json
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from typing import Dict, Any
 import logging
@@ -37,6 +37,7 @@ class OpenClawReportGenerator:
         # 创建 HTML
         html = self._create_header()
         html += self._create_summary_section()
+        html += self._create_activity_section()
         html += self._create_api_usage_section()
         html += self._create_external_conversation_section()
         html += self._create_statistics_section()
@@ -279,6 +280,73 @@ class OpenClawReportGenerator:
                     </tr>
 """
 
+    def _create_activity_section(self, max_columns: int = 48, chart_height: int = 80) -> str:
+        """创建活动时间分布部分 - 按时间分桶的事件数柱状图（错误/警告以红色叠加）"""
+        timeline = self.report_data.get('timeline', {})
+        total = timeline.get('total', [])
+        if not timeline.get('start') or not any(total):
+            return ""
+
+        # 相邻的桶合并为一列，列数不超过 max_columns
+        group = max(1, -(-len(total) // max_columns))
+        levels = timeline.get('series', {}).get('level', {})
+        errors = [0] * len(total)
+        for level in ('ERROR', 'WARN'):
+            for index, count in enumerate(levels.get(level, [])):
+                errors[index] += count
+        columns = [
+            (sum(total[i:i + group]), sum(errors[i:i + group]))
+            for i in range(0, len(total), group)
+        ]
+        peak = max(count for count, _ in columns)
+
+        start = datetime.fromisoformat(timeline['start'].replace("Z", "+00:00")).astimezone(ZoneInfo("Asia/Shanghai"))
+        column_minutes = group * timeline.get('bucket_seconds', 60) // 60
+        label_every = max(1, len(columns) // 6)
+
+        bars = ""
+        labels = ""
+        for index, (count, error_count) in enumerate(columns):
+            error_height = round(error_count / peak * chart_height)
+            normal_height = round(count / peak * chart_height) - error_height
+            column_start = start + timedelta(minutes=index * column_minutes)
+            bars += f"""
+                                    <td title="{column_start:%H:%M} {count}" style="vertical-align:bottom;padding:0 1px;height:{chart_height}px;">
+                                        <div style="background:#667eea;height:{normal_height}px;font-size:0;line-height:0;"></div>
+                                        <div style="background:#e74c3c;height:{error_height}px;font-size:0;line-height:0;"></div>
+                                    </td>"""
+            label = f"{column_start:%H:%M}" if index % label_every == 0 else ""
+            labels += f"""
+                                    <td style="padding:4px 0 0 0;color:#95a5a6;font-size:10px;text-align:left;white-space:nowrap;">{label}</td>"""
+
+        busiest = max(range(len(columns)), key=lambda index: columns[index][0])
+        busiest_at = start + timedelta(minutes=busiest * column_minutes)
+
+        return f"""
+                    <!-- Activity Timeline -->
+                    <tr>
+                        <td style="padding:30px 30px 10px 30px;">
+                            <h2 style="margin:0 0 20px 0;color:#2c3e50;font-size:20px;font-weight:600;border-bottom:2px solid #e8edf2;padding-bottom:10px;">
+                                📉 活动时间分布
+                            </h2>
+                        </td>
+                    </tr>
+                    
+                    <tr>
+                        <td style="padding:0 30px 20px 30px;">
+                            <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="table-layout:fixed;">
+                                <tr>{bars}
+                                </tr>
+                                <tr>{labels}
+                                </tr>
+                            </table>
+                            <p style="margin:10px 0 0 0;color:#7f8c8d;font-size:12px;">
+                                每列 {column_minutes} 分钟 · 最繁忙: {busiest_at:%m-%d %H:%M} ({peak} 个事件) · <span style="color:#e74c3c;">红色</span>为错误/警告
+                            </p>
+                        </td>
+                    </tr>
+"""
+
     def _create_api_usage_section(self) -> str:
         """创建 API 使用情况部分 - 邮件优化版本，带可视化图表"""
         api_usage = self.report_data.get('api_usage', {})
@@ -323,6 +391,44 @@ class OpenClawReportGenerator:
 
         error_rate = f"{(api_errors/total_calls*100):.1f}%" if total_calls > 0 else "0%"
 
+        # 各方法的延迟分位数（分析器已按调用次数排序）
+        latency = api_usage.get('latency', {})
+        latency_rows = ""
+        for method, stats in list(latency.items())[:10]:
+            latency_rows += f"""
+                                <tr>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#2c3e50;font-size:13px;">{method}</td>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#7f8c8d;font-size:13px;text-align:right;">{stats.get('count', 0)}</td>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#2c3e50;font-size:13px;text-align:right;">{stats.get('p50', 0)}</td>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#2c3e50;font-size:13px;text-align:right;">{stats.get('p95', 0)}</td>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#e74c3c;font-size:13px;font-weight:600;text-align:right;">{stats.get('p99', 0)}</td>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#7f8c8d;font-size:13px;text-align:right;">{stats.get('max', 0)}</td>
+                                </tr>"""
+
+        latency_section = ""
+        if latency_rows:
+            latency_section = f"""
+                    <!-- API Latency Table -->
+                    <tr>
+                        <td style="padding:0 30px 20px 30px;">
+                            <h3 style="margin:0 0 15px 0;color:#2c3e50;font-size:16px;font-weight:600;">
+                                ⏱️ API 延迟 (ms)
+                            </h3>
+                            <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:#ffffff;border:1px solid #e8edf2;border-radius:8px;overflow:hidden;">
+                                <tr style="background:#f8f9fa;">
+                                    <th style="padding:12px;text-align:left;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;">方法</th>
+                                    <th style="padding:12px;text-align:right;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;">样本数</th>
+                                    <th style="padding:12px;text-align:right;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;">P50</th>
+                                    <th style="padding:12px;text-align:right;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;">P95</th>
+                                    <th style="padding:12px;text-align:right;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;">P99</th>
+                                    <th style="padding:12px;text-align:right;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;">最大</th>
+                                </tr>
+                                {latency_rows}
+                            </table>
+                        </td>
+                    </tr>
+"""
+
         return f"""
                     <!-- API Usage Section -->
                     <tr>
@@ -374,7 +480,7 @@ class OpenClawReportGenerator:
                             </table>
                         </td>
                     </tr>
-"""
+{latency_section}"""
 
     def _create_external_conversation_section(self) -> str:
         """创建外部对话情况部分 - 邮件优化版本，带饼图模拟"""
@@ -534,6 +640,7 @@ class OpenClawReportGenerator:
         """创建运行部分 - 邮件优化版本"""
         runs_stats = self.report_data.get('runs', {})
         runs_detail = self.report_data.get('details', {}).get('runs', {})
+        lifecycle = self.report_data.get('lifecycle', {})
         
         # 运行摘要
         html = f"""
@@ -554,7 +661,7 @@ class OpenClawReportGenerator:
                                         <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);border-radius:8px;padding:20px;text-align:center;">
                                             <tr>
                                                 <td>
-                                                    <div style="font-size:36px;font-weight:700;color:#ffffff;margin-bottom:5px;">{runs_stats.get('complete', 0)}</div>
+                                                    <div style="font-size:36px;font-weight:700;color:#ffffff;margin-bottom:5px;">{runs_stats.get('completed', 0)}</div>
                                                     <div style="font-size:13px;color:rgba(255,255,255,0.9);">已完成</div>
                                                 </td>
                                             </tr>
@@ -574,7 +681,7 @@ class OpenClawReportGenerator:
                             </table>
                         </td>
                     </tr>
-                    
+{self._create_lifecycle_table(lifecycle)}
                     <tr>
                         <td style="padding:20px 30px 10px 30px;">
                             <h3 style="margin:0;color:#2c3e50;font-size:16px;font-weight:600;">最近运行 (最后 20 条)</h3>
@@ -632,6 +739,60 @@ class OpenClawReportGenerator:
 """
         return html
 
+    def _create_lifecycle_table(self, lifecycle: Dict[str, Any]) -> str:
+        """创建运行/会话时长与并发度表格"""
+        if not lifecycle:
+            return ""
+
+        cell = "padding:10px;border-bottom:1px solid #e8edf2;color:#2c3e50;font-size:13px;text-align:right;"
+        rows = ""
+        for label, key in (("运行", "runs"), ("会话", "sessions")):
+            stats = lifecycle.get(key, {})
+            durations = stats.get('durations', {})
+            concurrency = stats.get('concurrency', {})
+            rows += f"""
+                                <tr>
+                                    <td style="padding:10px;border-bottom:1px solid #e8edf2;color:#2c3e50;font-size:13px;">{label}</td>
+                                    <td style="{cell}">{durations.get('count', 0)}</td>
+                                    <td style="{cell}">{durations.get('p50', '-')}</td>
+                                    <td style="{cell}">{durations.get('p95', '-')}</td>
+                                    <td style="{cell}">{durations.get('max', '-')}</td>
+                                    <td style="{cell}font-weight:600;">{concurrency.get('peak', 0)}</td>
+                                    <td style="{cell}">{concurrency.get('average', 0)}</td>
+                                </tr>"""
+
+        runs = lifecycle.get('runs', {})
+        timeout_minutes = round(runs.get('timeout_seconds', 0) / 60)
+        timed_out = runs.get('timed_out', 0)
+        timed_out_color = "#e74c3c" if timed_out else "#7f8c8d"
+
+        th = "padding:12px;text-align:right;color:#2c3e50;font-size:13px;font-weight:600;border-bottom:2px solid #e8edf2;"
+        return f"""
+                    <!-- Lifecycle Table -->
+                    <tr>
+                        <td style="padding:20px 30px 0 30px;">
+                            <h3 style="margin:0 0 15px 0;color:#2c3e50;font-size:16px;font-weight:600;">
+                                ⏱️ 时长 (秒) 与并发
+                            </h3>
+                            <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:#ffffff;border:1px solid #e8edf2;border-radius:8px;overflow:hidden;">
+                                <tr style="background:#f8f9fa;">
+                                    <th style="{th}text-align:left;">类型</th>
+                                    <th style="{th}">样本数</th>
+                                    <th style="{th}">P50</th>
+                                    <th style="{th}">P95</th>
+                                    <th style="{th}">最长</th>
+                                    <th style="{th}">峰值并发</th>
+                                    <th style="{th}">平均并发</th>
+                                </tr>
+                                {rows}
+                            </table>
+                            <p style="margin:10px 0 0 0;color:{timed_out_color};font-size:13px;">
+                                超过 {timeout_minutes} 分钟未完成的运行: {timed_out} 个
+                            </p>
+                        </td>
+                    </tr>
+"""
+
     def _create_sessions_section(self) -> str:
         """创建会话部分 - 邮件优化版本"""
         sessions_stats = self.report_data.get('sessions', {})
@@ -745,6 +906,8 @@ class OpenClawReportGenerator:
         errors = self.report_data.get('errors', {})
         total_errors = errors.get('total', 0)
         top_errors = errors.get('top_errors', {})
+        templates = errors.get('templates', [])
+        distinct = errors.get('distinct_templates', len(top_errors))
         
         html = f"""
                     <!-- Errors Section -->
@@ -762,7 +925,7 @@ class OpenClawReportGenerator:
                                 <tr>
                                     <td>
                                         <p style="margin:0;color:#856404;font-size:14px;">
-                                            <strong>总错误数:</strong> {total_errors}
+                                            <strong>总错误数:</strong> {total_errors}　<strong>错误模板:</strong> {distinct}
                                         </p>
                                     </td>
                                 </tr>
@@ -775,7 +938,29 @@ class OpenClawReportGenerator:
                             <h3 style="margin:0 0 15px 0;color:#2c3e50;font-size:16px;font-weight:600;">常见错误 (Top 10)</h3>
 """
         
-        if top_errors:
+        if templates:
+            for item in templates[:10]:
+                template = item.get('template', '')
+                first_seen = self._format_beijing_time(item.get('first_seen'))
+                last_seen = self._format_beijing_time(item.get('last_seen'))
+                html += f"""
+                            <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:#fff9c4;border-left:4px solid #fbc02d;border-radius:6px;padding:12px;margin-bottom:10px;">
+                                <tr>
+                                    <td>
+                                        <div style="color:#f57f17;font-weight:600;font-size:13px;margin-bottom:3px;">
+                                            🔴 出现 {item.get('count', 0)} 次 · {first_seen} ~ {last_seen}
+                                        </div>
+                                        <div style="color:#333;font-size:13px;line-height:1.5;font-family:monospace;">
+                                            {template[:150]}{'...' if len(template) > 150 else ''}
+                                        </div>
+                                        <div style="color:#7f8c8d;font-size:12px;line-height:1.5;margin-top:3px;">
+                                            示例: {item.get('sample', '')[:150]}
+                                        </div>
+                                    </td>
+                                </tr>
+                            </table>
+"""
+        elif top_errors:
             for error_msg, count in sorted(top_errors.items(), key=lambda x: x[1], reverse=True)[:10]:
                 html += f"""
                             <table role="presentation" cellpadding="0" cellspacing="0" border="0" width="100%" style="background:#fff9c4;border-left:4px solid #fbc02d;border-radius:6px;padding:12px;margin-bottom:10px;">
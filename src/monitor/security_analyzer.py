@@ -3,9 +3,10 @@
 """
 
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List
 import logging
 from monitor.base import BaseMonitor
+from monitor.log_parser import LogRecord, RECORD_COMMAND, RECORD_FILE_ACCESS, RECORD_EVENT
 
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,16 @@ class SecurityAnalyzer(BaseMonitor):
         super().__init__("SecurityAnalyzer")
         self.security_score = 100  # 初始评分为 100
         self.events = []
+        self.event_counts = {}
+        self.severity_counts = {}
+        self.reset()
+    
+    def reset(self):
+        """清空已收集的数据和计数"""
+        self.data = []
+        self.events = []
+        self.event_counts = {}
+        self.severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
     
     def collect(self, target_date: datetime = None, log_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
@@ -64,46 +75,60 @@ class SecurityAnalyzer(BaseMonitor):
                 "missing_logs": False,
             }
         
-        self.data = []
-        self.events = []
+        self.reset()
         
         # 分析命令执行
         for cmd in log_data.get("commands", []):
-            self.data.append({
-                "type": "command",
-                "timestamp": cmd.get("timestamp"),
-                "command": cmd.get("command"),
-                "severity": "info",
-            })
+            self.data.append(self._count(self._analyze_record(RECORD_COMMAND, cmd)))
         
         # 分析文件访问
         for access in log_data.get("file_accesses", []):
-            classified = self._classify_file_access(access)
-            self.data.append(classified)
+            self.data.append(self._count(self._analyze_record(RECORD_FILE_ACCESS, access)))
         
         # 分析日志中的安全事件
         for event in log_data.get("events", []):
-            self.data.append({
-                "type": "security_event",
-                "timestamp": event.get("timestamp"),
-                "message": event.get("message"),
-                "severity": self._determine_severity(event),
-                "category": self._categorize_event(event),
-            })
+            self.data.append(self._count(self._analyze_record(RECORD_EVENT, event)))
         
         # 如果日志缺失，添加警告事件
         if log_data.get("missing_logs", False):
-            self.data.append({
-                "type": "log_warning",
-                "timestamp": (target_date or datetime.now()).isoformat(),
-                "message": "日志文件缺失或未找到，安全分析可能不完整",
-                "severity": "warning",
-                "category": "log_management",
-            })
-            self.security_score -= 10
+            self.data.append(self.record_missing_logs(target_date))
         
         return self.data
     
+    def collect_chunk(self, records: Iterable[LogRecord]) -> List[Dict[str, Any]]:
+        """
+        流式收集：分析一批日志记录
+        
+        只累计计数，不保留分析结果，适合配合 LogParser.iter_records 分块处理；
+        开始新一轮流式收集前应调用 reset()。
+        
+        Args:
+            records: 一批 LogRecord
+        
+        Returns:
+            List[Dict[str, Any]]: 本批次分析后的事件
+        """
+        return [self._count(self._analyze_record(record.kind, record.data)) for record in records]
+    
+    def record_missing_logs(self, target_date: datetime = None) -> Dict[str, Any]:
+        """
+        记录日志缺失警告，并相应扣减安全评分
+        
+        Args:
+            target_date: 目标日期
+        
+        Returns:
+            Dict[str, Any]: 日志缺失警告事件
+        """
+        self.security_score -= 10
+        return self._count({
+            "type": "log_warning",
+            "timestamp": (target_date or datetime.now()).isoformat(),
+            "message": "日志文件缺失或未找到，安全分析可能不完整",
+            "severity": "warning",
+            "category": "log_management",
+        })
+    
     def analyze(self) -> Dict[str, Any]:
         """
         分析安全数据，计算安全评分
@@ -111,16 +136,7 @@ class SecurityAnalyzer(BaseMonitor):
         Returns:
             Dict[str, Any]: 安全分析结果
         """
-        # 计算各类型事件的数量
-        event_counts = {}
-        severity_counts = {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0}
-        
-        for event in self.data:
-            event_type = event.get("type", "unknown")
-            event_counts[event_type] = event_counts.get(event_type, 0) + 1
-            
-            severity = event.get("severity", "info")
-            severity_counts[severity] += 1
+        severity_counts = self.severity_counts
         
         # 根据严重事件调整安全评分
         self.security_score -= severity_counts["critical"] * 10
@@ -132,12 +148,60 @@ class SecurityAnalyzer(BaseMonitor):
         
         return {
             "security_score": self.security_score,
-            "event_counts": event_counts,
-            "severity_counts": severity_counts,
-            "total_events": len(self.data),
+            "event_counts": dict(self.event_counts),
+            "severity_counts": dict(severity_counts),
+            "total_events": sum(self.event_counts.values()),
             "events": self.data,
         }
     
+    def _count(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        累计事件类型和严重级别计数
+        
+        Args:
+            entry: 分析后的事件
+        
+        Returns:
+            Dict[str, Any]: 原事件
+        """
+        event_type = entry.get("type", "unknown")
+        self.event_counts[event_type] = self.event_counts.get(event_type, 0) + 1
+        
+        severity = entry.get("severity", "info")
+        self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+        
+        return entry
+    
+    def _analyze_record(self, kind: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        分析单条日志记录
+        
+        Args:
+            kind: 记录类型（RECORD_COMMAND / RECORD_FILE_ACCESS / RECORD_EVENT）
+            record: 日志记录
+        
+        Returns:
+            Dict[str, Any]: 分析后的事件
+        """
+        if kind == RECORD_COMMAND:
+            return {
+                "type": "command",
+                "timestamp": record.get("timestamp"),
+                "command": record.get("command"),
+                "severity": "info",
+            }
+        
+        if kind == RECORD_FILE_ACCESS:
+            return self._classify_file_access(record)
+        
+        return {
+            "type": "security_event",
+            "timestamp": record.get("timestamp"),
+            "message": record.get("message"),
+            "severity": self._determine_severity(record),
+            "category": self._categorize_event(record),
+        }
+    
     @staticmethod
     def _classify_file_access(access: Dict[str, Any]) -> Dict[str, Any]:
         """
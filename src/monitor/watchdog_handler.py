@@ -3,31 +3,138 @@
 """
 
 import os
+import re
+import threading
+import time
+from collections import deque
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent
-from typing import Callable, List
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+# 轮转序号后缀（如 openclaw.log.1）
+_ROTATION_SUFFIX = re.compile(r"\.\d+$")
+
 
 class LogFileHandler(FileSystemEventHandler):
     """
     日志文件变更处理器
+    
+    observer 线程只登记事件，回调在独立的工作线程中执行，慢回调不会阻塞事件接收。
+    同一文件在去抖窗口内的多次修改合并为一次读取：第一次修改登记一个到期时间，
+    窗口内的后续修改只并入这一次待处理的读取（每个文件最多一个），因此读取延迟不超过一个窗口。
+    
+    文件轮转：
+    - 重命名（openclaw.log -> openclaw.log.1）：先调用 move_callback 把读取游标转移到新路径，再读取新路径上剩余的内容；
+    - 删除、在原路径重新创建、截断（文件变小）：调用 reset_callback 清除该路径的读取游标，之后从头读取。
     """
     
-    def __init__(self, callback: Callable = None, watched_extensions: List[str] = None):
+    def __init__(
+        self,
+        callback: Callable = None,
+        watched_extensions: List[str] = None,
+        debounce_seconds: float = 0.5,
+        reset_callback: Optional[Callable[[str], None]] = None,
+        move_callback: Optional[Callable[[str, str], None]] = None,
+    ):
         """
         初始化处理器
         
         Args:
-            callback: 文件变更时的回调函数
-            watched_extensions: 监控的文件扩展名列表
+            callback: 文件变更时的回调函数（参数为文件路径）
+            watched_extensions: 监控的文件扩展名列表（带轮转序号的文件同样监控）
+            debounce_seconds: 去抖窗口（秒），0 表示每个事件尽快处理（仍在工作线程中合并排队的事件）
+            reset_callback: 文件被删除、重新创建或截断时的回调（参数为文件路径）
+            move_callback: 文件被重命名时的回调（参数为原路径、新路径）
         """
         super().__init__()
         self.callback = callback
         self.watched_extensions = watched_extensions or ['.log', '.jsonl']
+        self.debounce_seconds = max(0.0, debounce_seconds)
+        self.reset_callback = reset_callback
+        self.move_callback = move_callback
+        self.stats = {"events": 0, "coalesced": 0, "reads": 0, "resets": 0, "moves": 0}
+        
+        # {路径: {'due': 到期时间, 'reset': 读取前是否清除游标}}
+        self._pending: Dict[str, Dict] = {}
+        # 待处理的重命名（先于同一轮的读取处理）
+        self._moves: Deque[Tuple[str, str]] = deque()
+        # 最近一次观察到的 (dev, inode, 大小)（用于检测截断）
+        self._sizes: Dict[str, Tuple[int, int, int]] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._stopping = False
+    
+    def start(self):
+        """
+        启动工作线程
+        """
+        with self._condition:
+            if self._worker is not None:
+                return
+            self._stopping = False
+            self._worker = threading.Thread(target=self._run, name="log-file-handler", daemon=True)
+            self._worker.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """
+        停止工作线程（未到期的读取被丢弃，读取游标保证下次启动时补齐）
+        
+        Args:
+            timeout: 等待正在执行的回调结束的最长时间（秒）
+        """
+        with self._condition:
+            if self._worker is None:
+                return
+            self._stopping = True
+            self._condition.notify()
+            worker, self._worker = self._worker, None
+        worker.join(timeout)
+    
+    def _is_watched(self, path: str) -> bool:
+        """
+        是否为监控的日志文件（忽略轮转序号后缀）
+        """
+        name = _ROTATION_SUFFIX.sub("", path)
+        return any(name.endswith(ext) for ext in self.watched_extensions)
+    
+    def _schedule(self, path: str, reset: bool = False):
+        """
+        登记一次读取；已有待处理的读取时合并
+        
+        Args:
+            path: 文件路径
+            reset: 读取前是否清除读取游标
+        """
+        with self._condition:
+            self.stats["events"] += 1
+            pending = self._pending.get(path)
+            if pending is not None:
+                self.stats["coalesced"] += 1
+                pending["reset"] = pending["reset"] or reset
+                # 删除后又在原路径创建：恢复读取
+                pending.pop("deleted", None)
+                return
+            self._pending[path] = {"due": time.monotonic() + self.debounce_seconds, "reset": reset}
+            self._condition.notify()
+    
+    def _truncated(self, path: str) -> bool:
+        """
+        记录文件大小，并判断同一文件（dev/inode 相同）是否比上次观察到的小（被截断）
+        
+        事件可能在轮转之后才被处理，此时路径上已是另一个文件，不视为截断（由重命名、创建事件处理）。
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        current = (st.st_dev, st.st_ino, st.st_size)
+        previous = self._sizes.get(path)
+        self._sizes[path] = current
+        return previous is not None and previous[:2] == current[:2] and current[2] < previous[2]
     
     def on_modified(self, event: FileModifiedEvent):
         """
@@ -38,31 +145,115 @@ class LogFileHandler(FileSystemEventHandler):
         """
         if not event.is_directory:
             # 检查文件扩展名
-            if any(event.src_path.endswith(ext) for ext in self.watched_extensions):
+            if self._is_watched(event.src_path):
                 logger.debug(f"日志文件已修改: {event.src_path}")
-                
-                if self.callback:
-                    try:
-                        self.callback(event.src_path)
-                    except Exception as e:
-                        logger.error(f"处理文件变更回调时出错: {e}")
+                truncated = self._truncated(event.src_path)
+                if truncated:
+                    logger.info(f"日志文件已截断: {event.src_path}")
+                self._schedule(event.src_path, reset=truncated)
     
     def on_created(self, event: FileModifiedEvent):
         """
-        处理文件创建事件
+        处理文件创建事件（轮转后在原路径新建的文件从头读取）
         
         Args:
             event: 文件事件
         """
         if not event.is_directory:
-            if any(event.src_path.endswith(ext) for ext in self.watched_extensions):
+            if self._is_watched(event.src_path):
                 logger.debug(f"新日志文件已创建: {event.src_path}")
-                
-                if self.callback:
-                    try:
-                        self.callback(event.src_path)
-                    except Exception as e:
-                        logger.error(f"处理文件创建回调时出错: {e}")
+                self._truncated(event.src_path)
+                self._schedule(event.src_path, reset=True)
+    
+    def on_deleted(self, event: FileModifiedEvent):
+        """
+        处理文件删除事件（丢弃待处理的读取并清除读取游标）
+        
+        Args:
+            event: 文件事件
+        """
+        if not event.is_directory:
+            if self._is_watched(event.src_path):
+                logger.debug(f"日志文件已删除: {event.src_path}")
+                with self._condition:
+                    self._sizes.pop(event.src_path, None)
+                    self._pending[event.src_path] = {"due": time.monotonic(), "reset": True, "deleted": True}
+                    self._condition.notify()
+    
+    def on_moved(self, event: FileModifiedEvent):
+        """
+        处理文件重命名事件（日志轮转）
+        
+        Args:
+            event: 文件事件
+        """
+        if event.is_directory:
+            return
+        
+        src_watched = self._is_watched(event.src_path)
+        dest_watched = self._is_watched(event.dest_path)
+        if not src_watched and not dest_watched:
+            return
+        
+        logger.info(f"日志文件已重命名: {event.src_path} -> {event.dest_path}")
+        with self._condition:
+            # 原路径的读取改为读取新路径
+            pending = self._pending.pop(event.src_path, None)
+            observed = self._sizes.pop(event.src_path, None)
+            if observed is not None:
+                self._sizes[event.dest_path] = observed
+            if src_watched:
+                self._moves.append((event.src_path, event.dest_path))
+            self._condition.notify()
+        
+        if dest_watched:
+            self._schedule(event.dest_path, reset=not src_watched or bool(pending and pending["reset"]))
+    
+    def _run(self):
+        """
+        工作线程：按顺序处理重命名和到期的读取
+        """
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopping:
+                        return
+                    if self._moves:
+                        moves, self._moves = list(self._moves), deque()
+                        due = []
+                        break
+                    now = time.monotonic()
+                    due = [path for path, pending in self._pending.items() if pending["due"] <= now]
+                    if due:
+                        moves = []
+                        due = [(path, self._pending.pop(path)) for path in due]
+                        break
+                    timeout = min((pending["due"] for pending in self._pending.values()), default=None)
+                    self._condition.wait(None if timeout is None else max(0.0, timeout - now))
+            
+            for src_path, dest_path in moves:
+                self.stats["moves"] += 1
+                self._invoke(self.move_callback, src_path, dest_path)
+            
+            for path, pending in due:
+                if pending["reset"]:
+                    self.stats["resets"] += 1
+                    self._invoke(self.reset_callback, path)
+                if not pending.get("deleted"):
+                    self.stats["reads"] += 1
+                    self._invoke(self.callback, path)
+    
+    @staticmethod
+    def _invoke(callback: Optional[Callable], *args):
+        """
+        调用回调，出错时记录日志后继续处理
+        """
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"处理文件变更回调时出错: {e}")
 
 
 class LogFileMonitor:
@@ -70,24 +261,40 @@ class LogFileMonitor:
     日志文件监控器
     """
     
-    def __init__(self, paths: List[str], callback: Callable = None):
+    def __init__(
+        self,
+        paths: List[str],
+        callback: Callable = None,
+        debounce_seconds: float = 0.5,
+        reset_callback: Optional[Callable[[str], None]] = None,
+        move_callback: Optional[Callable[[str, str], None]] = None,
+    ):
         """
         初始化监控器
         
         Args:
             paths: 监控的路径列表
             callback: 文件变更时的回调函数
+            debounce_seconds: 同一文件的修改事件合并为一次读取的窗口（秒）
+            reset_callback: 文件被删除、重新创建或截断时的回调
+            move_callback: 文件被重命名时的回调
         """
         self.paths = paths
         self.callback = callback
         self.observer = None
-        self.event_handler = LogFileHandler(callback)
+        self.event_handler = LogFileHandler(
+            callback,
+            debounce_seconds=debounce_seconds,
+            reset_callback=reset_callback,
+            move_callback=move_callback,
+        )
     
     def start(self):
         """
         开始监控
         """
         if self.observer is None:
+            self.event_handler.start()
             self.observer = Observer()
             
             for path in self.paths:
@@ -109,4 +316,6 @@ class LogFileMonitor:
         if self.observer is not None:
             self.observer.stop()
             self.observer.join()
+            self.observer = None
+            self.event_handler.stop()
             logger.info("文件监控器已停止")
@@ -34,6 +34,35 @@ class DatabaseConfig(BaseModel):
     """数据库配置"""
     db_path: str = "database/openclaw_monitor.db"
     enable_logging: bool = True
+    journal_mode: str = "WAL"  # SQLite 日志模式（WAL 允许读写并发，提交更快）
+    synchronous: str = "NORMAL"  # SQLite 同步模式（NORMAL 在 WAL 下不逐次 fsync；FULL 最安全）
+    batch_size: int = 1000  # 批量写入时每次 executemany 的行数（限制内存占用）
+
+
+class ParsingConfig(BaseModel):
+    """日志解析配置"""
+    batch_size: int = 1000  # 流式处理时每批记录数（同时决定写库批次大小）
+    workers: int = 1  # 并行解析多个日志文件的进程数（1 表示不启用进程池）
+    pool_chunksize: int = 1  # 每个进程任务包含的文件数
+    pool_max_task_mb: int = 64  # 每个进程任务最多包含的待读内容（MB），任务结果整体驻留内存；更大的文件在主进程流式解析
+    analyzer_workers: int = 1  # 分析单个大系统日志时的并行进程数
+    analyzer_min_chunk_mb: int = 64  # 并行分析时每个分块的最小大小（MB）
+    analyzer_state_dir: Optional[str] = "database/analyzer_state"  # 系统日志分析快照目录（相对项目根），None 表示每次完整分析
+    analyzer_run_timeout_minutes: float = 30  # 运行开始后超过该时长（分钟）仍未完成即标记为超时
+    analyzer_max_error_templates: int = 2000  # 错误模板挖掘最多保留的模板数（内存预算）
+    analyzer_max_lifecycle_entries: int = 50000  # 运行、会话各自最多跟踪的条目数（内存预算）
+    analyzer_bucket_minutes: int = 1  # 活动时间序列的桶宽（分钟）
+    json_backend: str = "auto"  # JSON 解码后端：auto / orjson / ujson / json
+    prefilter: bool = True  # 解码前按字节跳过不可能产出记录的行
+    min_level: Optional[str] = None  # 安全事件的最低日志级别（如 warn），None 表示全部保留
+    seek_by_timestamp: bool = True  # 增量解析时按时间戳二分跳过旧内容（乱序文件自动线性扫描）
+
+
+class LiveConfig(BaseModel):
+    """实时跟踪配置"""
+    enabled: bool = False  # 后台运行时是否启动实时跟踪（也可用 --live 启动）
+    summary_interval_minutes: int = 10  # 输出实时聚合摘要的间隔（分钟），0 表示不输出
+    debounce_seconds: float = 0.5  # 同一文件的修改事件合并为一次读取的窗口（秒）
 
 
 class OpenClawMonitorSettings(BaseModel):
@@ -41,6 +70,8 @@ class OpenClawMonitorSettings(BaseModel):
     base_path: str = "/Users/jaceho/.openclaw"
     log_paths: LogPathsConfig = LogPathsConfig()
     database: DatabaseConfig = DatabaseConfig()
+    parsing: ParsingConfig = ParsingConfig()
+    live: LiveConfig = LiveConfig()
     email: EmailConfig
     debug_mode: bool = False
     
@@ -4,6 +4,6 @@
 
 from .logger import setup_logger
 from .path_resolver import PathResolver
-from .helpers import expand_path, get_project_root
+from .helpers import expand_path, get_project_root, chunked
 
-__all__ = ["setup_logger", "PathResolver", "expand_path", "get_project_root"]
+__all__ = ["setup_logger", "PathResolver", "expand_path", "get_project_root", "chunked"]
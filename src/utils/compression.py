@@ -0,0 +1,78 @@
+"""
+压缩日志读取 - 轮转后压缩的日志文件的流式解压
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import zlib
+from typing import BinaryIO
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# 支持的压缩后缀（.zst 需要安装 zstandard）
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+
+# 解压时可能出现的错误（文件损坏或压缩尚未写完）
+DECOMPRESSION_ERRORS = (EOFError, OSError, zlib.error, lzma.LZMAError) + (
+    (zstandard.ZstdError,) if ZSTD_AVAILABLE else ()
+)
+
+
+def is_compressed(file_path: str) -> bool:
+    """
+    判断文件是否为压缩日志
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        bool: 是否以支持的压缩后缀结尾
+    """
+    return file_path.endswith(COMPRESSED_SUFFIXES)
+
+
+def strip_compression_suffix(file_path: str) -> str:
+    """
+    去掉压缩后缀（如 a.jsonl.gz -> a.jsonl）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 去掉压缩后缀后的路径
+    """
+    for suffix in COMPRESSED_SUFFIXES:
+        if file_path.endswith(suffix):
+            return file_path[:-len(suffix)]
+    return file_path
+
+
+def open_decompressed(raw: BinaryIO, file_path: str) -> BinaryIO:
+    """
+    在已打开的原始文件上包装流式解压，按行迭代时内存占用恒定
+
+    Args:
+        raw: 以二进制模式打开的文件
+        file_path: 文件路径（根据后缀选择解压算法）
+
+    Returns:
+        BinaryIO: 解压后的二进制流；未压缩的文件原样返回
+    """
+    if file_path.endswith(".gz"):
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if file_path.endswith(".bz2"):
+        return bz2.BZ2File(raw, mode="rb")
+    if file_path.endswith(".xz"):
+        return lzma.LZMAFile(raw, mode="rb")
+    if file_path.endswith(".zst"):
+        if not ZSTD_AVAILABLE:
+            raise OSError("读取 .zst 日志需要安装 zstandard")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw))
+    return raw
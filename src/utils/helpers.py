@@ -3,8 +3,13 @@
 """
 
 import os
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Iterator, List, Tuple, TypeVar, Union
+
+
+T = TypeVar("T")
 
 
 def expand_path(path: Union[str, Path]) -> Path:
@@ -47,3 +52,39 @@ def get_database_path(relative_path: str = "database/openclaw_monitor.db") -> Pa
     db_path = project_root / relative_path
     db_path.parent.mkdir(parents=True, exist_ok=True)
     return db_path
+
+
+def utc_day_window(target_date: datetime) -> Tuple[str, str]:
+    """
+    本地日期当天对应的 UTC 时间窗口（日志时间戳为 UTC）
+    
+    Args:
+        target_date: 目标日期（按本地时区理解）
+    
+    Returns:
+        Tuple[str, str]: ("YYYY-MM-DDTHH:MM:SS" 形式的 UTC 起始, 结束)，区间为 [起始, 结束)
+    """
+    day_start = datetime.combine(target_date.date(), datetime.min.time())
+    return tuple(
+        dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        for dt in (day_start, day_start + timedelta(days=1))
+    )
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    将可迭代对象按固定大小分块
+    
+    Args:
+        iterable: 可迭代对象（可以是惰性的生成器）
+        size: 每块的最大元素数
+    
+    Returns:
+        Iterator[List[T]]: 分块迭代器
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, max(1, size)))
+        if not chunk:
+            return
+        yield chunk
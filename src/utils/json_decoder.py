@@ -0,0 +1,187 @@
+"""
+JSON 解码后端 - 在安装了更快的解码库时使用它们，否则回退到标准库
+"""
+
+import json
+import logging
+from typing import Any, Callable, Iterator, List, Optional, TextIO, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ujson
+    UJSON_AVAILABLE = True
+except ImportError:
+    UJSON_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# 解码函数：直接接受 bytes（也接受 str），解析失败时抛出 ValueError 的子类
+JsonLoads = Callable[[Union[bytes, str]], Any]
+
+# auto 模式下的优先顺序
+_PREFERRED_BACKENDS = ["orjson", "ujson", "json"]
+
+_STDLIB_DECODER = json.JSONDecoder()
+
+
+def _stdlib_loads(data: Union[bytes, str]) -> Any:
+    """
+    标准库解码
+
+    json.loads 处理 bytes 时会先探测编码，比直接按 UTF-8 解码后再解析更慢，
+    日志固定为 UTF-8，这里直接解码并复用同一个 JSONDecoder 实例。
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return _STDLIB_DECODER.decode(data)
+
+
+def available_backends() -> List[str]:
+    """
+    获取当前环境可用的解码后端
+
+    Returns:
+        List[str]: 后端名称列表（按优先顺序）
+    """
+    available = {
+        "orjson": ORJSON_AVAILABLE,
+        "ujson": UJSON_AVAILABLE,
+        "json": True,
+    }
+    return [name for name in _PREFERRED_BACKENDS if available[name]]
+
+
+def get_json_loads(backend: str = "auto") -> JsonLoads:
+    """
+    获取指定后端的解码函数
+
+    Args:
+        backend: 'auto'（选择最快的可用后端）、'orjson'、'ujson' 或 'json'
+
+    Returns:
+        JsonLoads: 解码函数
+    """
+    backend = (backend or "auto").lower()
+
+    if backend == "auto":
+        backend = available_backends()[0]
+    elif backend not in available_backends():
+        if backend in _PREFERRED_BACKENDS:
+            logger.warning(f"JSON 解码后端 {backend} 未安装，回退到标准库 json")
+        else:
+            logger.warning(f"未知的 JSON 解码后端 {backend}，回退到标准库 json")
+        backend = "json"
+
+    if backend == "orjson":
+        return orjson.loads
+    if backend == "ujson":
+        return ujson.loads
+    return _stdlib_loads
+
+
+class _StreamingJsonReader:
+    """
+    基于 JSONDecoder.raw_decode 的增量读取器：只在缓冲区中保留尚未解析的部分
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """读取下一块数据，丢弃已解析的部分；已到文件末尾时返回 False"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符（文件结束时为空字符串）"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        """读取一个属于 chars 的字符"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"JSON 格式错误：期望 {chars!r}，实际为 {char!r}")
+        self.pos += 1
+        return char
+
+    def decode_value(self) -> Any:
+        """解析下一个完整的 JSON 值，数据不足时继续读取"""
+        self.peek()
+        while True:
+            try:
+                value, end = _STDLIB_DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 数字可能在块边界被截断，确认其后还有数据
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """逐个产出当前位置的数组元素"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_json_array(f: TextIO, key: Optional[str] = None, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    流式读取 JSON 数组的元素，内存占用与单个元素大小相关，与文件大小无关
+
+    Args:
+        f: 以文本模式打开的文件
+        key: 顶层为对象时要读取的数组所在的键；顶层为数组时忽略
+        chunk_size: 每次读取的字符数
+
+    Yields:
+        Any: 数组元素
+    """
+    reader = _StreamingJsonReader(f, chunk_size)
+    first = reader.peek()
+
+    if first == "[":
+        yield from reader.iter_array()
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.decode_value()
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            yield from reader.iter_array()
+        else:
+            # 其他键的值解析后直接丢弃
+            reader.decode_value()
+        if reader.expect(",}") == "}":
+            return
@@ -0,0 +1,147 @@
+"""
+延迟分位数草图 - 对数分桶，可合并，内存与样本数无关
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+
+# 小于该值的样本计入零桶
+_MIN_POSITIVE = 1e-9
+
+
+class LatencySketch:
+    """
+    延迟分位数草图（DDSketch 的简化实现）
+
+    样本按对数分桶：桶 i 覆盖 (γ^(i-1), γ^i]，γ = (1 + α) / (1 - α)。
+    返回的分位数与真实值的相对误差不超过 α；桶数只与数值跨度有关，
+    多个草图（不同文件、分块或进程）按桶相加即可合并，结果与一次性统计相同。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        初始化草图
+
+        Args:
+            relative_accuracy: 分位数的相对误差上限 α（0 < α < 1）
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy 必须在 (0, 1) 之间: {relative_accuracy}")
+
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        """
+        添加一个样本
+
+        Args:
+            value: 样本值（负数按 0 计）
+        """
+        if value < _MIN_POSITIVE:
+            value = 0.0
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencySketch"):
+        """
+        合并另一个草图
+
+        Args:
+            other: 相对误差相同的草图
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("只能合并相对误差相同的草图")
+        if not other.count:
+            return
+
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估算分位数
+
+        Args:
+            q: 分位点（0 ~ 1）
+
+        Returns:
+            Optional[float]: 分位数估计值；没有样本时为 None
+        """
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        running = self.zero_count
+        for index in sorted(self.bins):
+            running += self.bins[index]
+            if running > rank:
+                # 桶内取使相对误差最小的代表值，并限制在实际的最小、最大值之间
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        导出为可 JSON 序列化的字典
+
+        Returns:
+            Dict: 草图状态
+        """
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": [[index, count] for index, count in self.bins.items()],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        """
+        从 to_dict 的结果恢复草图
+
+        Args:
+            data: 草图状态
+
+        Returns:
+            LatencySketch: 草图
+        """
+        sketch = cls(data["relative_accuracy"])
+        sketch.bins = {int(index): count for index, count in data["bins"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
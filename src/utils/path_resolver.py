@@ -3,32 +3,77 @@
 用于解析配置中的多个日志路径，支持 glob 模式
 """
 
+import fnmatch
 import glob
 import os
+import re
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 from datetime import datetime, timedelta
 
+from .compression import COMPRESSED_SUFFIXES
+from .helpers import utc_day_window
+
+
+# 每个目录缓存匹配结果的日期数上限（回填历史数据时避免无限增长）
+_MAX_CACHED_DATES = 32
+
+# 可以按字符串比较的时间戳（以 YYYY-MM-DD 开头）
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def state_key(file_path: str) -> str:
+    """
+    文件在读取游标、时间范围索引等持久化状态中的键
+    
+    同一文件可能以不同的路径字符串出现（配置目录末尾带 "/"、符号链接目录、watchdog 报告的路径），
+    统一解析为规范的绝对路径，批处理与实时跟踪因此共用同一份状态。
+    
+    Args:
+        file_path: 文件路径
+    
+    Returns:
+        str: 规范化的绝对路径
+    """
+    return os.path.realpath(file_path)
+
 
 class PathResolver:
     """日志路径解析器"""
     
-    def __init__(self, log_paths: List[str]):
+    def __init__(self, log_paths: List[str], range_index=None):
         """
         初始化路径解析器
         
         Args:
             log_paths: 日志路径列表（支持 ~ 和 glob 模式）
+            range_index: 日志文件时间范围索引（需提供 get_file_ranges，通常为 DatabaseManager）；
+                为 None 时不按时间范围筛选
         """
         self.log_paths = log_paths
+        self.range_index = range_index
         self.logger = None  # 在需要时注入
+        # 最近一次解析中因与已找到的文件相同（同一 dev/inode）而跳过的 [(路径, 已保留的路径)]
+        self.duplicate_logs = []
+        # 最近一次解析中因时间范围与请求窗口不重叠而跳过的文件
+        self.out_of_range_logs = []
+        # 目录列表缓存：{目录: {'mtime', 'files', 'matches': {日期: [文件路径]}}}
+        self._listing_cache = {}
     
-    def resolve_all_logs(self, target_date: datetime = None) -> dict:
+    def resolve_all_logs(self, target_date: datetime = None, since_timestamp: Optional[str] = None) -> dict:
         """
         解析所有配置的日志路径，返回找到的日志文件
         
+        不同路径指向同一文件时（如 macOS 上的 /tmp 与 /private/tmp、符号链接目录），
+        按 (st_dev, st_ino) 去重，只保留第一次出现的路径，跳过的路径记录在 duplicate_logs 中。
+        
+        配置了 range_index 时，索引中记录的时间范围与请求窗口不重叠、且建立索引后未被修改的文件
+        会被跳过（记录在 out_of_range_logs 中）。窗口为 [since_timestamp, ∞)，未指定时为目标日期（本地）当天
+        换算成的 UTC 区间（日志时间戳为 UTC）。
+        
         Args:
             target_date: 目标日期（默认为昨天）
+            since_timestamp: 只需要此时间戳之后的日志（用于增量更新）
         
         Returns:
             dict: {路径: [文件列表]}
@@ -36,19 +81,46 @@ class PathResolver:
         if target_date is None:
             target_date = datetime.now() - timedelta(days=1)
         
-        found_logs = {}
+        candidates = []
+        seen_files = {}
+        self.duplicate_logs = []
+        self.out_of_range_logs = []
         
         for path_pattern in self.log_paths:
             # 展开 ~ 和环境变量
             expanded_path = os.path.expanduser(os.path.expandvars(path_pattern))
             
             # 使用 glob 查找匹配的文件
-            matching_files = self._find_logs_by_pattern(expanded_path, target_date)
-            
-            if matching_files:
-                found_logs[path_pattern] = matching_files
-                if self.logger:
-                    self.logger.info(f"在 {path_pattern} 中找到 {len(matching_files)} 个日志文件")
+            for file in self._find_logs_by_pattern(expanded_path, target_date):
+                key, st = self._file_key(file)
+                if key in seen_files:
+                    self.duplicate_logs.append((file, seen_files[key]))
+                    continue
+                seen_files[key] = file
+                candidates.append((path_pattern, file, st))
+        
+        ranges = {}
+        if self.range_index is not None and candidates:
+            indexed = self.range_index.get_file_ranges([state_key(file) for _, file, _ in candidates])
+            ranges = {file: indexed.get(state_key(file)) for _, file, _ in candidates}
+        window = self._time_window(target_date, since_timestamp)
+        
+        found_logs = {}
+        for path_pattern, file, st in candidates:
+            if not self._may_overlap(ranges.get(file), st, window):
+                self.out_of_range_logs.append(file)
+                continue
+            found_logs.setdefault(path_pattern, []).append(file)
+        
+        if self.logger:
+            for path_pattern, matching_files in found_logs.items():
+                self.logger.info(f"在 {path_pattern} 中找到 {len(matching_files)} 个日志文件")
+        
+        if self.out_of_range_logs and self.logger:
+            self.logger.info(f"跳过 {len(self.out_of_range_logs)} 个时间范围不在请求窗口内的日志文件")
+        
+        if self.duplicate_logs and self.logger:
+            self.logger.info(f"跳过 {len(self.duplicate_logs)} 个重复的日志文件（同一文件的不同路径）")
         
         if not found_logs and self.logger:
             self.logger.warning(
@@ -58,10 +130,161 @@ class PathResolver:
         return found_logs
     
     @staticmethod
-    def _find_logs_by_pattern(path_pattern: str, target_date: datetime) -> List[str]:
+    def _file_key(file_path: str) -> Tuple[Any, Optional[os.stat_result]]:
+        """
+        获取文件的唯一标识
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            ((st_dev, st_ino), stat 结果)；无法 stat 时为 (真实路径字符串, None)
+        """
+        real_path = os.path.realpath(file_path)
+        try:
+            st = os.stat(real_path)
+        except OSError:
+            return real_path, None
+        return (st.st_dev, st.st_ino), st
+    
+    @staticmethod
+    def _time_window(target_date: datetime, since_timestamp: Optional[str]) -> Tuple[str, Optional[str], bool]:
+        """
+        计算请求的时间窗口
+        
+        Args:
+            target_date: 目标日期（本地），换算为 UTC 区间
+            since_timestamp: 增量起点
+        
+        Returns:
+            Tuple[str, Optional[str], bool]: (下界, 上界（None 表示不限）, 下界是否不含)
+        """
+        if since_timestamp:
+            return since_timestamp, None, True
+        start, end = utc_day_window(target_date)
+        return start, end, False
+    
+    @staticmethod
+    def _may_overlap(
+        time_range: Optional[Dict[str, Any]],
+        st: Optional[os.stat_result],
+        window: Tuple[str, Optional[str], bool],
+    ) -> bool:
+        """
+        判断文件是否可能包含窗口内的日志
+        
+        没有索引、文件在建立索引后被修改、或时间戳不是 ISO 格式时无法判断，一律视为可能重叠。
+        
+        Args:
+            time_range: 索引中的 {'min_ts', 'max_ts', 'size', 'mtime_ns'}
+            st: 文件当前的 stat 结果
+            window: _time_window 的结果
+        
+        Returns:
+            bool: 是否需要解析该文件
+        """
+        if not time_range or st is None:
+            return True
+        if (time_range["size"], time_range["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+            return True
+        
+        min_ts, max_ts = time_range["min_ts"], time_range["max_ts"]
+        if not (_ISO_DATE.match(min_ts) and _ISO_DATE.match(max_ts)):
+            return True
+        
+        lower, upper, exclusive = window
+        if max_ts < lower or (exclusive and max_ts == lower):
+            return False
+        if upper is not None and min_ts >= upper:
+            return False
+        return True
+    
+    @staticmethod
+    def _name_patterns(date_str: str) -> List[str]:
+        """
+        生成日志文件名模式（按优先顺序）
+        
+        Args:
+            date_str: 日期字符串（YYYY-MM-DD）
+        
+        Returns:
+            List[str]: 文件名 glob 模式列表
+        """
+        # 支持多种日志名称格式
+        patterns = [
+            f"openclaw-{date_str}.log",
+            f"openclaw-{date_str}.jsonl",
+            f"*{date_str}*.log",
+            f"*{date_str}*.jsonl",
+            "openclaw*.log",
+            "openclaw*.jsonl",
+        ]
+        # 轮转后压缩的日志（如 openclaw.jsonl.1.gz）
+        patterns += [
+            f"{pattern}*{suffix}" for suffix in COMPRESSED_SUFFIXES for pattern in patterns
+        ]
+        return patterns
+    
+    @classmethod
+    def _compile_name_patterns(cls, date_str: str) -> Pattern:
+        """
+        将所有文件名模式合并为一个正则，命名分组 p<i> 对应第 i 个模式
+        
+        分支按顺序尝试，命中的分组即为第一个匹配的模式。
+        
+        Args:
+            date_str: 日期字符串（YYYY-MM-DD）
+        
+        Returns:
+            Pattern: 合并后的正则
+        """
+        return re.compile("|".join(
+            f"(?P<p{i}>{fnmatch.translate(pattern)})"
+            for i, pattern in enumerate(cls._name_patterns(date_str))
+        ))
+    
+    def _list_files(self, directory: str) -> List[str]:
+        """
+        列出目录中的普通文件名（按目录 mtime 缓存）
+        
+        目录中增删或重命名文件都会更新目录 mtime，mtime 不变时直接返回缓存的列表。
+        
+        Args:
+            directory: 目录路径
+        
+        Returns:
+            List[str]: 文件名列表（不含隐藏文件）；目录不存在时为空
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._listing_cache.pop(directory, None)
+            return []
+        
+        cached = self._listing_cache.get(directory)
+        if cached and cached["mtime"] == mtime:
+            return cached["files"]
+        
+        files = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # 与 glob 一致：通配符不匹配隐藏文件
+                    if not entry.name.startswith(".") and entry.is_file():
+                        files.append(entry.name)
+        except OSError:
+            return []
+        
+        self._listing_cache[directory] = {"mtime": mtime, "files": files, "matches": {}}
+        return files
+    
+    def _find_logs_by_pattern(self, path_pattern: str, target_date: datetime) -> List[str]:
         """
         根据模式查找日志文件
         
+        每个目录只扫描一次，所有文件名模式在内存中用一个合并的正则匹配；
+        结果按第一个命中的模式排序（同一模式内按文件名），并随目录列表一起缓存。
+        
         Args:
             path_pattern: 路径模式（可能包含 glob）
             target_date: 目标日期
@@ -70,26 +293,38 @@ class PathResolver:
             List[str]: 找到的文件路径列表
         """
         date_str = target_date.strftime("%Y-%m-%d")
-        matching_files = []
         
-        try:
-            # 支持多种日志名称格式
-            patterns = [
-                f"{path_pattern}/openclaw-{date_str}.log",
-                f"{path_pattern}/openclaw-{date_str}.jsonl",
-                f"{path_pattern}/*{date_str}*.log",
-                f"{path_pattern}/*{date_str}*.jsonl",
-                f"{path_pattern}/openclaw*.log",
-                f"{path_pattern}/openclaw*.jsonl",
-            ]
+        if glob.has_magic(path_pattern):
+            directories = sorted(d for d in glob.glob(path_pattern) if os.path.isdir(d))
+        else:
+            directories = [path_pattern]
+        
+        matching_files = []
+        seen = set()
+        name_pattern = None
+        for directory in directories:
+            names = self._list_files(directory)
+            cached = self._listing_cache.get(directory)
+            if cached is not None and date_str in cached["matches"]:
+                matched = cached["matches"][date_str]
+            else:
+                if name_pattern is None:
+                    name_pattern = self._compile_name_patterns(date_str)
+                ranked = []
+                for name in names:
+                    match = name_pattern.match(name)
+                    if match:
+                        ranked.append((int(match.lastgroup[1:]), name))
+                matched = [os.path.join(directory, name) for _, name in sorted(ranked)]
+                if cached is not None:
+                    if len(cached["matches"]) >= _MAX_CACHED_DATES:
+                        cached["matches"].clear()
+                    cached["matches"][date_str] = matched
             
-            for pattern in patterns:
-                files = glob.glob(pattern)
-                for file in files:
-                    if os.path.isfile(file) and file not in matching_files:
-                        matching_files.append(file)
-        except Exception:
-            pass  # 忽略 glob 错误
+            for file in matched:
+                if file not in seen:
+                    seen.add(file)
+                    matching_files.append(file)
         
         return matching_files
     
@@ -0,0 +1,257 @@
+"""
+定宽时间分桶计数 - 按分钟（或更粗粒度）统计各维度的事件数，数组存储，可合并
+"""
+
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+
+
+class TimeBuckets:
+    """
+    定宽时间分桶计数器
+
+    每个维度的每个取值对应一个无符号整数数组，下标为相对起始桶的偏移。
+    日志基本按时间顺序写入，同一分钟内的事件先按取值组合在字典中计数（每个事件一次字典更新），
+    分钟变化时再一次性写入数组，时间戳每分钟只解析一次。
+    不同文件、分块或运行的结果按桶对齐后相加即可合并。
+    """
+
+    def __init__(self, dimensions: Tuple[str, ...], bucket_seconds: int = 60, max_buckets: int = 31 * 24 * 60):
+        """
+        初始化计数器
+
+        Args:
+            dimensions: 维度名称（add 时按相同顺序给出取值）
+            bucket_seconds: 桶宽（秒，60 的整数倍）
+            max_buckets: 最多保留的桶数；超出范围的事件只计入 dropped（防止异常时间戳撑大数组）
+        """
+        if bucket_seconds <= 0 or bucket_seconds % 60:
+            raise ValueError(f"bucket_seconds 必须是 60 的正整数倍: {bucket_seconds}")
+
+        self.dimensions = dimensions
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        # 第一个桶的编号（Unix 时间 // 桶宽），None 表示还没有数据
+        self.origin: Optional[int] = None
+        self.length = 0
+        # {维度: {取值: array('L')}}，数组按需补零，可能短于 length
+        self.series: Dict[str, Dict[str, array]] = {dimension: {} for dimension in dimensions}
+        self.dropped = 0
+        # 当前分钟（UTC 时间戳取分钟前缀，其他时间戳取原值）的 {取值组合: 次数}
+        self._pending_key: Optional[str] = None
+        self._pending_timestamp: Any = None
+        self._pending: Dict[Tuple[Optional[str], ...], int] = {}
+
+    def add(self, timestamp: Any, *values: Optional[str]):
+        """
+        记录一个事件
+
+        Args:
+            timestamp: 事件时间戳（ISO 8601）
+            *values: 各维度的取值（与 dimensions 顺序一致），None 表示该维度不计数
+        """
+        if isinstance(timestamp, str) and timestamp.endswith("Z"):
+            key = timestamp[:16]
+        else:
+            key = timestamp
+        if key != self._pending_key:
+            self._flush()
+            self._pending_key = key
+            self._pending_timestamp = timestamp
+
+        pending = self._pending
+        pending[values] = pending.get(values, 0) + 1
+
+    def _flush(self):
+        """
+        把当前分钟的计数写入数组
+        """
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        offset = self._offset(self._bucket_of(self._pending_timestamp))
+        if offset is None:
+            self.dropped += sum(pending.values())
+            return
+
+        # 先按维度汇总，每个取值的数组只更新一次
+        totals: Tuple[Dict[str, int], ...] = tuple({} for _ in self.dimensions)
+        for values, count in pending.items():
+            for dimension_totals, value in zip(totals, values):
+                if value is not None:
+                    dimension_totals[value] = dimension_totals.get(value, 0) + count
+
+        for dimension, dimension_totals in zip(self.dimensions, totals):
+            series = self.series[dimension]
+            for value, count in dimension_totals.items():
+                counts = series.get(value)
+                if counts is None:
+                    counts = series[value] = array('L')
+                if len(counts) <= offset:
+                    counts.extend(array('L', [0]) * (offset + 1 - len(counts)))
+                counts[offset] += count
+
+    def _bucket_of(self, timestamp: Any) -> Optional[int]:
+        """
+        计算时间戳所在的桶编号
+        """
+        if not isinstance(timestamp, str):
+            return None
+
+        if timestamp.endswith("Z"):
+            minute = self._parse_minute(timestamp[:16] + "+00:00")
+        else:
+            minute = self._parse_minute(timestamp)
+
+        if minute is None:
+            return None
+        return minute * 60 // self.bucket_seconds
+
+    @staticmethod
+    def _parse_minute(timestamp: str) -> Optional[int]:
+        """
+        解析为 Unix 分钟数（不带时区的按本地时间）
+        """
+        try:
+            return int(datetime.fromisoformat(timestamp).timestamp()) // 60
+        except ValueError:
+            return None
+
+    def _offset(self, bucket: Optional[int]) -> Optional[int]:
+        """
+        取得桶在数组中的下标，必要时扩展桶范围
+
+        Returns:
+            Optional[int]: 下标；时间戳无效或超出 max_buckets 时为 None（由调用方计入 dropped）
+        """
+        if bucket is None or not self._reserve(bucket, bucket):
+            return None
+        return bucket - self.origin
+
+    def _reserve(self, first: int, last: int) -> bool:
+        """
+        扩展桶范围使其覆盖 [first, last]
+
+        Returns:
+            bool: 扩展后的桶数不超过 max_buckets 时为 True（否则不做改动）
+        """
+        if self.origin is None:
+            if last - first + 1 > self.max_buckets:
+                return False
+            self.origin = first
+            self.length = last - first + 1
+            return True
+
+        start = min(first, self.origin)
+        end = max(last, self.origin + self.length - 1)
+        if end - start + 1 > self.max_buckets:
+            return False
+        if start < self.origin:
+            self._shift(self.origin - start)
+        self.length = end - self.origin + 1
+        return True
+
+    def _shift(self, count: int):
+        """
+        起始桶前移 count 个（所有数组前面补零）
+        """
+        padding = array('L', [0]) * count
+        for values in self.series.values():
+            for counts in values.values():
+                counts[0:0] = padding
+        self.origin -= count
+        self.length += count
+
+    def export(self) -> Dict[str, Any]:
+        """
+        导出为可 JSON 序列化的字典（用于跨进程归并和分析快照）
+
+        Returns:
+            Dict: {'bucket_seconds', 'origin', 'length', 'series', 'dropped'}
+        """
+        self._flush()
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "origin": self.origin,
+            "length": self.length,
+            "series": {
+                dimension: {value: counts.tolist() for value, counts in values.items()}
+                for dimension, values in self.series.items()
+            },
+            "dropped": self.dropped,
+        }
+
+    def merge(self, partial: Dict[str, Any]):
+        """
+        按桶相加合并另一段的计数
+
+        Args:
+            partial: export 导出的结果（桶宽必须相同）
+        """
+        if partial["bucket_seconds"] != self.bucket_seconds:
+            raise ValueError("只能合并桶宽相同的计数")
+
+        self._flush()
+        self.dropped += partial["dropped"]
+        if partial["origin"] is None:
+            return
+
+        if not self._reserve(partial["origin"], partial["origin"] + partial["length"] - 1):
+            self.dropped += sum(sum(counts) for counts in partial["series"].get(self.dimensions[0], {}).values())
+            return
+        first = partial["origin"] - self.origin
+
+        for dimension, values in partial["series"].items():
+            target = self.series.setdefault(dimension, {})
+            for value, counts in values.items():
+                merged = target.get(value)
+                if merged is None:
+                    merged = target[value] = array('L')
+                needed = first + len(counts)
+                if len(merged) < needed:
+                    merged.extend(array('L', [0]) * (needed - len(merged)))
+                for index, count in enumerate(counts, first):
+                    if count:
+                        merged[index] += count
+
+    def summary(self, top: int = 8) -> Dict[str, Any]:
+        """
+        生成报告用的时间序列
+
+        Args:
+            top: 每个维度保留总数最多的取值个数
+
+        Returns:
+            Dict: {'bucket_seconds', 'start'（第一个桶的 UTC 时间）, 'buckets',
+                'total'（第一个维度各取值之和）, 'series': {维度: {取值: [各桶计数]}}, 'dropped'}
+        """
+        self._flush()
+
+        def padded(counts) -> list:
+            return counts.tolist() + [0] * (self.length - len(counts))
+
+        total = [0] * self.length
+        for counts in self.series[self.dimensions[0]].values():
+            for index, count in enumerate(counts):
+                total[index] += count
+
+        series = {}
+        for dimension, values in self.series.items():
+            ranked = sorted(values.items(), key=lambda item: (-sum(item[1]), item[0]))[:top]
+            series[dimension] = {value: padded(counts) for value, counts in ranked}
+
+        start = None
+        if self.origin is not None:
+            start = datetime.fromtimestamp(self.origin * self.bucket_seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "start": start,
+            "buckets": self.length,
+            "total": total,
+            "series": series,
+            "dropped": self.dropped,
+        }
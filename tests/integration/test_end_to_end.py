@@ -35,3 +35,114 @@ email:
         assert monitor.process_monitor is not None
         assert monitor.log_parser is not None
         assert monitor.security_analyzer is not None
+
+
+def _create_monitor(tmpdir, log_dir, batch_size):
+    """创建使用临时数据库、只解析 log_dir 的监控程序（不采集进程）"""
+    from openclawmonitor.main import OpenClawMonitor
+    from openclawmonitor.db.manager import DatabaseManager
+    from openclawmonitor.monitor.log_parser import LogParser
+    
+    config_path = Path(tmpdir) / "config.yaml"
+    config_path.write_text("""
+base_path: /tmp/test_openclaw
+debug_mode: true
+email:
+  sender_email: test@example.com
+  sender_password: test_password
+  recipient_email: recipient@example.com
+""")
+    monitor = OpenClawMonitor(str(config_path))
+    monitor.process_monitor.collect = lambda target_date: []
+    monitor.config.parsing.batch_size = batch_size
+    monitor.db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+    monitor.log_parser = LogParser([str(log_dir)], cursor_store=monitor.db_manager, range_index=monitor.db_manager)
+    return monitor
+
+
+def test_save_commits_per_batch_and_skips_checkpoints_of_failed_files(monkeypatch):
+    """测试按批提交：某批写入失败时只有该批的文件不提交读取游标，下次重新读取后补齐"""
+    import json
+    import sqlite3
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_dir = Path(tmpdir) / "logs"
+        log_dir.mkdir()
+        for name, commands in (("a", ["a1", "a2", "a3"]), ("b", ["b1", "boom", "b3"])):
+            with open(log_dir / f"openclaw-{name}.jsonl", "w") as f:
+                for i, command in enumerate(commands):
+                    f.write(json.dumps({"timestamp": f"2024-01-15T10:0{i}:00", "exec": command}) + "\n")
+        
+        monitor = _create_monitor(tmpdir, log_dir, batch_size=2)
+        db_manager, parser = monitor.db_manager, monitor.log_parser
+        
+        bulk_add_activities = db_manager.bulk_add_activities
+        
+        def failing_bulk_add(rows, batch_size=None):
+            if any(row["description"] == "boom" for row in rows):
+                raise sqlite3.OperationalError("disk I/O error")
+            return bulk_add_activities(rows, batch_size)
+        
+        def ingest():
+            data = monitor.collect_daily_data(datetime(2024, 1, 15), use_checkpoints=True)
+            monitor.save_to_database(data)
+            parser.commit_checkpoints()
+        
+        def commands():
+            return sorted(a["description"] for a in db_manager.get_activities_by_date("2024-01-15"))
+        
+        # 3 批：[a1, a2] [a3, b1] [boom, b3]，最后一批失败
+        monkeypatch.setattr(db_manager, "bulk_add_activities", failing_bulk_add)
+        ingest()
+        assert commands() == ["a1", "a2", "a3", "b1"]
+        assert db_manager.get_file_cursor(str(log_dir / "openclaw-a.jsonl")) is not None
+        assert db_manager.get_file_cursor(str(log_dir / "openclaw-b.jsonl")) is None
+        
+        # 恢复后只重新读取失败的文件，已写入的记录不重复
+        monkeypatch.setattr(db_manager, "bulk_add_activities", bulk_add_activities)
+        ingest()
+        assert commands() == ["a1", "a2", "a3", "b1", "b3", "boom"]
+        assert db_manager.get_file_cursor(str(log_dir / "openclaw-b.jsonl")) is not None
+
+
+def test_approvals_are_streamed_into_the_database_in_batches():
+    """测试命令执行审批在保存时才逐条读取，并按 parsing.batch_size 分批写入"""
+    import json
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        approvals_file = Path(tmpdir) / "exec-approvals.json"
+        approvals_file.write_text(json.dumps({"approvals": [
+            {"timestamp": f"2024-01-15T10:0{i}:00", "command": f"cmd-{i}"} for i in range(5)
+        ]}))
+        monitor = _create_monitor(tmpdir, Path(tmpdir) / "logs", batch_size=2)
+        db_manager, parser = monitor.db_manager, monitor.log_parser
+        
+        read, batches = [], []
+        iter_exec_approvals = parser.iter_exec_approvals
+        bulk_add_activities = db_manager.bulk_add_activities
+        
+        def tracking_iter(approvals_file=str(approvals_file)):
+            for entry in iter_exec_approvals(approvals_file):
+                read.append(entry)
+                yield entry
+        
+        def tracking_bulk_add(rows, batch_size=None):
+            batches.append(len(rows))
+            return bulk_add_activities(rows, batch_size)
+        
+        parser.iter_exec_approvals = tracking_iter
+        db_manager.bulk_add_activities = tracking_bulk_add
+        
+        data = monitor.collect_daily_data(datetime(2024, 1, 15))
+        assert read == []
+        monitor.save_to_database(data)
+        parser.commit_checkpoints()
+        
+        assert len(read) == 5 and max(batches) <= 2
+        commands = [a["description"] for a in db_manager.get_activities_by_date("2024-01-15")]
+        assert sorted(commands) == [f"cmd-{i}" for i in range(5)]
+        
+        # 已提交的审批不再读取
+        read.clear()
+        monitor.save_to_database(monitor.collect_daily_data(datetime(2024, 1, 15)))
+        assert read == []
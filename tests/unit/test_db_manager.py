@@ -0,0 +1,79 @@
+"""
+单元测试 - 数据库管理模块测试
+"""
+
+import threading
+import tempfile
+from pathlib import Path
+from openclawmonitor.db.manager import DatabaseManager
+
+
+def test_persistent_connection_uses_wal_and_survives_errors():
+    """测试长连接：WAL 模式、重复记录不影响后续写入、多线程写入"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        assert db_manager._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        
+        assert db_manager.add_activity_record("2024-01-15", "10:00", "command", "ls", details={"a": 1})
+        # 重复记录：回滚后连接仍可使用
+        assert not db_manager.add_activity_record("2024-01-15", "10:00", "command", "ls")
+        assert db_manager.add_security_event("2024-01-15", "10:01", "sudo", "sudo ls", "high")
+        
+        def write(worker):
+            for i in range(50):
+                db_manager.add_activity_record("2024-01-15", f"11:{i:02d}", "command", f"echo {worker}")
+        
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        activities = db_manager.get_activities_by_date("2024-01-15")
+        assert len(activities) == 201
+        assert activities[0]["details"] == '{"a": 1}'
+        assert len(db_manager.get_security_events_by_date("2024-01-15")) == 1
+        db_manager.close()
+        
+        # 重新打开后数据仍在
+        reopened = DatabaseManager(str(Path(tmpdir) / "test.db"), journal_mode="DELETE", synchronous="FULL")
+        assert len(reopened.get_activities_by_date("2024-01-15")) == 201
+        reopened.close()
+
+
+def test_bulk_add_counts_inserted_and_ignored():
+    """测试批量写入：分批 executemany、重复与缺少必填字段的记录计入 ignored、失败时整体回滚"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"), batch_size=7)
+        db_manager.add_activity_record("2024-01-15", "10:00:00", "command", "echo 0")
+        
+        activities = (
+            {"date": "2024-01-15", "timestamp": f"10:00:{i % 30:02d}", "activity_type": "command",
+             "description": f"echo {i % 30}", "details": {"i": i}}
+            for i in range(50)
+        )
+        assert db_manager.bulk_add_activities(activities) == {"inserted": 29, "ignored": 21}
+        assert db_manager.bulk_add_activities([
+            {"date": "2024-01-15", "timestamp": None, "activity_type": "command", "description": "no time"},
+        ]) == {"inserted": 0, "ignored": 1}
+        assert db_manager.bulk_add_activities([]) == {"inserted": 0, "ignored": 0}
+        
+        events = [
+            {"date": "2024-01-15", "timestamp": "10:00:00", "event_type": "sudo",
+             "description": "sudo ls", "severity": "high", "source": "log"},
+        ] * 3
+        assert db_manager.bulk_add_security_events(events, batch_size=2) == {"inserted": 1, "ignored": 2}
+        assert db_manager.get_security_events_by_date("2024-01-15")[0]["source"] == "log"
+        
+        # 嵌套在外层事务中：外层失败时批量写入一并回滚
+        try:
+            with db_manager.transaction():
+                db_manager.bulk_add_activities([
+                    {"date": "2024-01-16", "timestamp": "10:00", "activity_type": "command", "description": "ls"},
+                ])
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert db_manager.get_activities_by_date("2024-01-16") == []
+        assert len(db_manager.get_activities_by_date("2024-01-15")) == 30
+        db_manager.close()
@@ -0,0 +1,76 @@
+"""
+单元测试 - JSON 解码后端测试
+"""
+
+import importlib
+import json
+import sys
+import tempfile
+from pathlib import Path
+from openclawmonitor.utils import json_decoder
+from openclawmonitor.utils.json_decoder import available_backends, get_json_loads
+
+
+def test_backend_selection():
+    """测试 auto 选择最快的可用后端，指定后端、大小写和未知名称的处理"""
+    backends = available_backends()
+    assert backends[-1] == "json"
+    assert backends == [name for name in ("orjson", "ujson", "json") if name in backends]
+
+    auto = get_json_loads("auto")
+    assert get_json_loads(None) is auto
+    if json_decoder.ORJSON_AVAILABLE:
+        assert auto is json_decoder.orjson.loads
+        assert get_json_loads("ORJSON") is json_decoder.orjson.loads
+    elif json_decoder.UJSON_AVAILABLE:
+        assert auto is json_decoder.ujson.loads
+    else:
+        assert auto is json_decoder._stdlib_loads
+
+    assert get_json_loads("json") is json_decoder._stdlib_loads
+    assert get_json_loads("simdjson") is json_decoder._stdlib_loads
+
+
+def test_falls_back_to_stdlib_when_fast_backends_missing(monkeypatch):
+    """测试未安装 orjson / ujson 时（导入失败）回退到标准库"""
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "ujson", None)
+    module = importlib.reload(json_decoder)
+    try:
+        assert module.ORJSON_AVAILABLE is False and module.UJSON_AVAILABLE is False
+        assert module.available_backends() == ["json"]
+        for backend in ("auto", "orjson", "ujson"):
+            loads = module.get_json_loads(backend)
+            assert loads is module._stdlib_loads
+            assert loads(b'{"exec": "ls"}') == {"exec": "ls"}
+    finally:
+        monkeypatch.undo()
+        importlib.reload(json_decoder)
+
+
+def test_bytes_and_str_decode_identically():
+    """测试每个可用后端对 bytes 和 str 行的解码结果相同（包括非 ASCII 内容）"""
+    line = json.dumps({"timestamp": "2024-01-15T10:00:00Z", "exec": "echo 你好", "n": [1, 2.5, None]}, ensure_ascii=False)
+    for backend in available_backends():
+        loads = get_json_loads(backend)
+        assert loads(line.encode("utf-8")) == loads(line) == json.loads(line), backend
+        assert loads(bytearray(line.encode("utf-8"))) == json.loads(line), backend
+
+
+def test_malformed_line_is_skipped():
+    """测试每个可用后端遇到格式错误或非 UTF-8 的行时跳过该行而不是抛出异常"""
+    from openclawmonitor.monitor.log_parser import LogParser
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw-2024-01-15.jsonl"
+        log_file.write_bytes(
+            json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}).encode() + b"\n"
+            + b'{"timestamp": "2024-01-15T10:01:00", "exec": \n'
+            + b'{"exec": "\xff\xfe"}\n'
+            + json.dumps({"timestamp": "2024-01-15T10:02:00", "exec": "pwd"}).encode() + b"\n"
+        )
+
+        for backend in available_backends():
+            loads = get_json_loads(backend)
+            records = list(LogParser._iter_jsonl_file(str(log_file), loads=loads))
+            assert [(entry["command"], entry["line"]) for _, entry in records] == [("ls", 1), ("pwd", 4)], backend
@@ -48,3 +48,471 @@ def test_path_resolver():
     pattern = PathResolver.get_daily_log_pattern("/tmp/openclaw/")
     assert "/tmp/openclaw/" in pattern
     assert "*" in pattern
+
+
+def test_parse_all_logs_resumes_from_checkpoint():
+    """测试按字节偏移增量解析以及截断后完整重解析"""
+    from datetime import datetime
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw-2024-01-15.log"
+        log_file.write_text(
+            json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}) + "\n"
+        )
+        
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        parser = LogParser([tmpdir], cursor_store=db_manager)
+        target_date = datetime(2024, 1, 15)
+        
+        result = parser.parse_all_logs(target_date)
+        assert [c["command"] for c in result["commands"]] == ["ls"]
+        parser.commit_checkpoints()
+        
+        # 追加新行：只解析新增部分
+        with open(log_file, "a") as f:
+            f.write(json.dumps({"timestamp": "2024-01-15T10:05:00", "exec": "pwd"}) + "\n")
+        result = parser.parse_all_logs(target_date)
+        assert [c["command"] for c in result["commands"]] == ["pwd"]
+        assert result["commands"][0]["line"] == 2
+        parser.commit_checkpoints()
+        
+        # 截断后重写：回退到完整解析
+        log_file.write_text(json.dumps({"exec": "id"}) + "\n")
+        result = parser.parse_all_logs(target_date)
+        assert [c["command"] for c in result["commands"]] == ["id"]
+
+
+def test_unterminated_last_line_is_read_once_complete():
+    """测试末尾未写完的行不产出，写完后只产出一次"""
+    from datetime import datetime
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw-2024-01-15.jsonl"
+        partial = json.dumps({"timestamp": "2024-01-15T10:01:00", "exec": "pwd"})
+        log_file.write_text(json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}) + "\n" + partial)
+        
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        parser = LogParser([tmpdir], cursor_store=db_manager)
+        target_date = datetime(2024, 1, 15)
+        
+        def commands():
+            result = parser.parse_all_logs(target_date)
+            parser.commit_checkpoints()
+            return [(c["command"], c["line"]) for c in result["commands"]]
+        
+        assert commands() == [("ls", 1)]
+        assert commands() == []
+        
+        with open(log_file, "a") as f:
+            f.write("\n")
+        assert commands() == [("pwd", 2)]
+        assert commands() == []
+
+
+def test_iter_records_streams_typed_records():
+    """测试流式记录迭代接口"""
+    from datetime import datetime
+    from openclawmonitor.monitor.log_parser import RECORD_COMMAND, RECORD_FILE_ACCESS
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw-2024-01-15.jsonl"
+        log_file.write_text(
+            json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}) + "\n"
+            + json.dumps({"timestamp": "2024-01-15T10:01:00", "path": "/tmp/a"}) + "\n"
+        )
+        
+        parser = LogParser([tmpdir])
+        records = parser.iter_records(datetime(2024, 1, 15))
+        
+        assert records.found_logs_count == 1
+        assert records.missing_logs is False
+        
+        kinds = [record.kind for record in records]
+        assert kinds == [RECORD_COMMAND, RECORD_FILE_ACCESS]
+
+
+def test_line_filter_skips_irrelevant_lines():
+    """测试字节级预过滤"""
+    from openclawmonitor.monitor.log_parser import LineFilter
+    
+    line_filter = LineFilter(min_level="warn")
+    
+    assert not line_filter.accepts_line(b'{"message": "heartbeat", "file_count": 3}\n')
+    assert line_filter.accepts_line(b'{"exec": "ls", "level": "debug"}\n')
+    assert line_filter.accepts_line(b'{"error": "boom", "level": "error"}\n')
+    assert not line_filter.accepts_line(b'{"error": "boom", "level": "debug"}\n')
+    assert not line_filter.level_allowed("info")
+    assert line_filter.level_allowed("WARN")
+
+
+def test_seek_by_timestamp_matches_linear_scan():
+    """测试按时间戳二分跳转与线性扫描结果一致，乱序文件回退为线性扫描"""
+    def write_log(path, seconds):
+        with open(path, "w") as f:
+            for i, second in enumerate(seconds):
+                timestamp = f"2024-01-15T{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+                f.write(json.dumps({"timestamp": timestamp, "exec": f"cmd-{i}", "padding": "x" * 40}) + "\n")
+    
+    def commands(path, seek):
+        return [
+            (entry["command"], entry["line"])
+            for kind, entry in LogParser._iter_jsonl_file(
+                str(path), "2024-01-15T20:00:00", seek_by_timestamp=seek
+            )
+        ]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ordered = Path(tmpdir) / "ordered.jsonl"
+        write_log(ordered, [i * 2 for i in range(43200)])
+        
+        linear = commands(ordered, seek=False)
+        seeked = commands(ordered, seek=True)
+        assert [c for c, _ in seeked] == [c for c, _ in linear]
+        assert linear[0] == ("cmd-36001", 36002)
+        # 跳转后无法得知行号
+        assert seeked[0][1] is None
+        
+        shuffled = Path(tmpdir) / "shuffled.jsonl"
+        write_log(shuffled, [(i * 7919) % 86400 for i in range(43200)])
+        assert commands(shuffled, seek=True) == commands(shuffled, seek=False)
+
+
+def test_parse_compressed_rotated_logs():
+    """测试轮转后压缩的日志流式解压解析，未变化的压缩文件在续读时整体跳过"""
+    import bz2
+    import gzip
+    import lzma
+    from datetime import datetime
+    
+    class CursorStore:
+        def __init__(self):
+            self.cursors = {}
+        
+        def get_file_cursor(self, file_path):
+            return self.cursors.get(file_path)
+        
+        def save_file_cursor(self, file_path, **cursor):
+            self.cursors[file_path] = cursor
+            return True
+    
+    content = (
+        json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}) + "\n"
+        + json.dumps({"timestamp": "2024-01-15T10:01:00", "path": "/tmp/a"}) + "\n"
+    ).encode()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, opener in [
+            ("openclaw.jsonl.1.gz", gzip.open),
+            ("openclaw.jsonl.2.bz2", bz2.open),
+            ("openclaw.jsonl.3.xz", lzma.open),
+        ]:
+            with opener(Path(tmpdir) / name, "wb") as f:
+                f.write(content)
+        
+        parser = LogParser([tmpdir], cursor_store=CursorStore())
+        result = parser.parse_all_logs(datetime(2024, 1, 15))
+        assert result["found_logs_count"] == 3
+        assert [c["command"] for c in result["commands"]] == ["ls"] * 3
+        assert len(result["file_accesses"]) == 3
+        
+        parser.commit_checkpoints()
+        result = parser.parse_all_logs(datetime(2024, 1, 15))
+        assert result["commands"] == []
+
+
+def test_process_pool_matches_serial_parsing():
+    """测试进程池并行解析（包括超过任务大小上限的文件在当前进程流式解析）与顺序解析产出相同顺序的记录，
+    提交的游标也相同（包括续读追加内容）"""
+    from datetime import datetime
+    
+    class CursorStore:
+        def __init__(self):
+            self.cursors = {}
+        
+        def get_file_cursor(self, file_path):
+            return self.cursors.get(file_path)
+        
+        def save_file_cursor(self, file_path, **cursor):
+            self.cursors[file_path] = cursor
+            return True
+    
+    def append_lines(path, start, count):
+        with open(path, "a") as f:
+            for i in range(start, start + count):
+                f.write(json.dumps({"timestamp": f"2024-01-15T10:{i // 60:02d}:{i % 60:02d}", "exec": f"{path.name}-{i}"}) + "\n")
+                f.write(json.dumps({"timestamp": f"2024-01-15T10:{i // 60:02d}:{i % 60:02d}", "path": f"/tmp/{i}"}) + "\n")
+    
+    def parse(parser):
+        records = list(parser.iter_records(datetime(2024, 1, 15)))
+        parser.commit_checkpoints()
+        return [(record.kind, record.source, record.data) for record in records]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = [Path(tmpdir) / f"openclaw-{name}.jsonl" for name in ("a", "b", "c", "d", "e")]
+        for n, path in enumerate(files):
+            append_lines(path, 0, 20 + n * 7)
+        
+        serial = LogParser([tmpdir], cursor_store=CursorStore())
+        pooled = LogParser([tmpdir], cursor_store=CursorStore(), workers=2, pool_chunksize=2)
+        # 超过任务大小上限的文件（d、e）在当前进程中流式解析，其余交给进程池
+        capped = LogParser([tmpdir], cursor_store=CursorStore(), workers=2, pool_chunksize=2,
+                           pool_max_task_bytes=files[2].stat().st_size)
+        streamed = []
+        iter_file_records = capped._iter_file_records
+        
+        def tracking_iter(file_path, *args, **kwargs):
+            streamed.append(Path(file_path).name)
+            return iter_file_records(file_path, *args, **kwargs)
+        
+        capped._iter_file_records = tracking_iter
+        
+        expected = parse(serial)
+        assert len({source for _, source, _ in expected}) == len(files)
+        assert parse(pooled) == expected
+        assert parse(capped) == expected
+        assert sorted(streamed) == ["openclaw-d.jsonl", "openclaw-e.jsonl"]
+        assert pooled.cursor_store.cursors == serial.cursor_store.cursors
+        assert capped.cursor_store.cursors == serial.cursor_store.cursors
+        assert len(serial.cursor_store.cursors) == len(files)
+        
+        # 追加后两种模式都只从游标处续读
+        for path in files[::2]:
+            append_lines(path, 100, 5)
+        expected = parse(serial)
+        assert len(expected) == 3 * 5 * 2
+        assert parse(pooled) == expected
+        assert parse(capped) == expected
+        assert pooled.cursor_store.cursors == serial.cursor_store.cursors
+        assert capped.cursor_store.cursors == serial.cursor_store.cursors
+
+
+def test_path_resolver_dedupes_same_file_by_inode():
+    """测试不同路径（符号链接目录）指向同一文件时只解析一次"""
+    import os
+    from datetime import datetime
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        real_dir = Path(tmpdir) / "openclaw"
+        real_dir.mkdir()
+        (real_dir / "openclaw-2024-01-15.jsonl").write_text(
+            json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}) + "\n"
+        )
+        link_dir = Path(tmpdir) / "link"
+        os.symlink(real_dir, link_dir)
+        
+        parser = LogParser([str(real_dir), str(link_dir)])
+        result = parser.parse_all_logs(datetime(2024, 1, 15), use_checkpoints=False)
+        
+        assert result["found_logs_count"] == 1
+        assert [c["command"] for c in result["commands"]] == ["ls"]
+        assert result["duplicate_logs"] == [
+            (str(link_dir / "openclaw-2024-01-15.jsonl"), str(real_dir / "openclaw-2024-01-15.jsonl"))
+        ]
+
+
+def test_path_resolver_caches_listing_until_directory_changes():
+    """测试目录列表按 mtime 缓存，目录变化后重新扫描"""
+    import os
+    from datetime import datetime
+    from openclawmonitor.utils.path_resolver import PathResolver
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in ["openclaw.jsonl", "openclaw-2024-01-15.log", "notes.txt", "openclaw.jsonl.1.gz"]:
+            (Path(tmpdir) / name).write_text("")
+        
+        resolver = PathResolver([tmpdir])
+        files = resolver._find_logs_by_pattern(tmpdir, datetime(2024, 1, 15))
+        assert [Path(f).name for f in files] == [
+            "openclaw-2024-01-15.log", "openclaw.jsonl", "openclaw.jsonl.1.gz"
+        ]
+        assert resolver._find_logs_by_pattern(tmpdir, datetime(2024, 1, 15)) == files
+        
+        (Path(tmpdir) / "app-2024-01-15.jsonl").write_text("")
+        os.utime(tmpdir, ns=(0, os.stat(tmpdir).st_mtime_ns + 1))
+        files = resolver._find_logs_by_pattern(tmpdir, datetime(2024, 1, 15))
+        assert "app-2024-01-15.jsonl" in [Path(f).name for f in files]
+
+
+def test_time_range_index_skips_files_outside_window():
+    """测试时间范围索引：未修改且时间范围不重叠的文件不再解析"""
+    from datetime import datetime
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_dir = Path(tmpdir) / "logs"
+        log_dir.mkdir()
+        old_log = log_dir / "openclaw-2024-01-10.jsonl"
+        old_log.write_text(
+            json.dumps({"timestamp": "2024-01-10T09:00:00", "exec": "old"}) + "\n"
+            + json.dumps({"timestamp": "2024-01-11T09:00:00", "exec": "older"}) + "\n"
+        )
+        current_log = log_dir / "openclaw.jsonl"
+        current_log.write_text(json.dumps({"timestamp": "2024-01-15T10:00:00", "exec": "ls"}) + "\n")
+        
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        parser = LogParser([str(log_dir)], range_index=db_manager)
+        target_date = datetime(2024, 1, 15)
+        
+        # 首次解析：没有索引，两个文件都解析并建立索引
+        result = parser.parse_all_logs(target_date, use_checkpoints=False)
+        assert sorted(c["command"] for c in result["commands"]) == ["ls", "old", "older"]
+        parser.commit_checkpoints()
+        
+        result = parser.parse_all_logs(target_date, use_checkpoints=False)
+        assert [c["command"] for c in result["commands"]] == ["ls"]
+        assert result["out_of_range_logs"] == [str(old_log)]
+        assert result["missing_logs"] is False
+        
+        # 回填旧日期时只解析旧文件
+        result = parser.parse_all_logs(datetime(2024, 1, 10), use_checkpoints=False)
+        assert [c["command"] for c in result["commands"]] == ["old", "older"]
+        
+        # 增量窗口 [since, ∞)
+        result = parser.parse_all_logs(target_date, since_timestamp="2024-01-15T10:00:00", use_checkpoints=False)
+        assert result["found_logs_count"] == 0
+        
+        # 文件修改后索引失效，重新解析
+        with open(old_log, "a") as f:
+            f.write(json.dumps({"timestamp": "2024-01-15T11:00:00", "exec": "late"}) + "\n")
+        result = parser.parse_all_logs(target_date, use_checkpoints=False)
+        assert sorted(c["command"] for c in result["commands"]) == ["late", "ls", "old", "older"]
+
+
+def test_time_range_index_uses_utc_window_for_local_date(monkeypatch):
+    """测试时间范围筛选把本地目标日期换算为 UTC 窗口（非 UTC 时区下 UTC 时间戳跨日的文件不被误跳过）"""
+    import time
+    from datetime import datetime
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    monkeypatch.setenv("TZ", "Asia/Shanghai")
+    time.tzset()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_dir = Path(tmpdir) / "logs"
+            log_dir.mkdir()
+            # 2025-01-01T20:00Z 为本地 2025-01-02 04:00，2025-01-02T20:00Z 为本地 2025-01-03 04:00
+            (log_dir / "openclaw-a.jsonl").write_text(json.dumps({"timestamp": "2025-01-01T20:00:00Z", "exec": "a"}) + "\n")
+            (log_dir / "openclaw-b.jsonl").write_text(json.dumps({"timestamp": "2025-01-02T20:00:00Z", "exec": "b"}) + "\n")
+            
+            db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+            parser = LogParser([str(log_dir)], range_index=db_manager)
+            parser.parse_all_logs(datetime(2025, 1, 2), use_checkpoints=False)
+            parser.commit_checkpoints()
+            
+            result = parser.parse_all_logs(datetime(2025, 1, 2), use_checkpoints=False)
+            assert [c["command"] for c in result["commands"]] == ["a"]
+            assert result["out_of_range_logs"] == [str(log_dir / "openclaw-b.jsonl")]
+            
+            result = parser.parse_all_logs(datetime(2025, 1, 3), use_checkpoints=False)
+            assert [c["command"] for c in result["commands"]] == ["b"]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_parse_exec_approvals_emits_only_new_entries():
+    """测试审批文件按 (mtime, size) 缓存、只产出新增条目"""
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        approvals_file = Path(tmpdir) / "exec-approvals.json"
+        approvals = [{"command": "ls", "approved": True}, {"command": "pwd", "approved": True}]
+        approvals_file.write_text(json.dumps({"version": 1, "approvals": approvals}, indent=2))
+        
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        parser = LogParser([tmpdir], cursor_store=db_manager)
+        
+        assert parser.parse_exec_approvals(str(approvals_file)) == approvals
+        # 未提交前再次解析仍会产出
+        assert parser.parse_exec_approvals(str(approvals_file)) == approvals
+        parser.commit_checkpoints()
+        
+        # 文件未变化：不读取
+        assert parser.parse_exec_approvals(str(approvals_file)) == []
+        
+        # 追加条目（键顺序不同的旧条目视为同一条）
+        approvals = [{"approved": True, "command": "ls"}] + approvals[1:] + [{"command": "id", "approved": False}]
+        approvals_file.write_text(json.dumps({"approvals": approvals}))
+        assert parser.parse_exec_approvals(str(approvals_file)) == [{"command": "id", "approved": False}]
+        
+        # 未配置 cursor_store 时产出全部条目
+        assert LogParser([tmpdir]).parse_exec_approvals(str(approvals_file)) == approvals
+
+
+def test_move_and_reset_cursor_on_rotation():
+    """测试轮转：重命名后游标随文件转移（不重复读取），清除游标后从头读取"""
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    def line(i):
+        return json.dumps({"timestamp": f"2024-01-15T10:00:{i:02d}", "exec": f"echo {i}"}) + "\n"
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "commands.jsonl"
+        rotated = Path(tmpdir) / "commands.jsonl.1"
+        log_file.write_text("".join(line(i) for i in range(3)))
+        
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        parser = LogParser([tmpdir], cursor_store=db_manager)
+        assert len(list(parser.iter_appended_records(str(log_file)))) == 3
+        parser.commit_checkpoints()
+        
+        # 轮转前又写入了两行，然后重命名并在原路径新建文件
+        with open(log_file, "a") as f:
+            f.write(line(3) + line(4))
+        log_file.rename(rotated)
+        log_file.write_text(line(5))
+        parser.move_cursor(str(log_file), str(rotated))
+        
+        assert [r.data["command"] for r in parser.iter_appended_records(str(rotated))] == ["echo 3", "echo 4"]
+        assert [r.data["command"] for r in parser.iter_appended_records(str(log_file))] == ["echo 5"]
+        parser.commit_checkpoints()
+        assert list(parser.iter_appended_records(str(log_file))) == []
+        
+        parser.reset_cursor(str(log_file))
+        assert db_manager.get_file_cursor(str(log_file)) is None
+        assert len(list(parser.iter_appended_records(str(log_file)))) == 1
+
+
+def test_batch_and_live_tail_share_cursor_across_path_spellings():
+    """测试配置路径末尾带 "/" 或经过符号链接时，批处理与实时跟踪共用游标和时间范围索引"""
+    import os
+    from datetime import datetime
+    from openclawmonitor.db.manager import DatabaseManager
+    
+    def line(i):
+        return json.dumps({"timestamp": f"2024-01-15T10:00:{i:02d}", "exec": f"echo {i}"}) + "\n"
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_dir = Path(tmpdir) / "logs"
+        log_dir.mkdir()
+        link_dir = Path(tmpdir) / "link"
+        os.symlink(log_dir, link_dir)
+        log_file = log_dir / "openclaw-2024-01-15.jsonl"
+        log_file.write_text("".join(line(i) for i in range(3)))
+        db_manager = DatabaseManager(str(Path(tmpdir) / "test.db"))
+        
+        # 每日批处理：配置路径末尾带 "/"，且经过符号链接
+        batch = LogParser([str(link_dir) + "/"], cursor_store=db_manager, range_index=db_manager)
+        assert len(list(batch.iter_records(datetime(2024, 1, 15)))) == 3
+        batch.commit_checkpoints()
+        assert db_manager.get_file_cursor(os.path.realpath(log_file)) is not None
+        
+        # 实时跟踪：watchdog 报告的路径
+        live = LogParser([str(log_dir)], cursor_store=db_manager, range_index=db_manager)
+        assert list(live.iter_appended_records(str(log_file))) == []
+        
+        with open(log_file, "a") as f:
+            f.write(line(3))
+        assert [r.data["command"] for r in live.iter_appended_records(str(log_file))] == ["echo 3"]
+        live.commit_checkpoints()
+        
+        # 批处理再次运行：实时跟踪已入库的内容不再产出
+        assert list(batch.iter_records(datetime(2024, 1, 15))) == []
+        
+        # 经符号链接路径重命名：游标随文件转移
+        rotated = log_dir / "openclaw-2024-01-15.jsonl.1"
+        log_file.rename(rotated)
+        live.move_cursor(str(link_dir / log_file.name), str(link_dir / rotated.name))
+        assert list(live.iter_appended_records(str(rotated))) == []
@@ -0,0 +1,460 @@
+"""
+单元测试 - OpenClaw 系统日志分析器测试
+"""
+
+import json
+import tempfile
+from pathlib import Path
+from openclawmonitor.monitor.openclaw_log_analyzer import OpenClawLogAnalyzer
+
+
+def _write_gateway_log(path: Path, lines: int = 600):
+    """写入合成的系统日志"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            timestamp = f"2024-01-15T10:{i // 60 % 60:02d}:{i % 60:02d}.000Z"
+            if i % 3 == 0:
+                message = f"embedded run start: runId=ab{i // 6:04x}"
+            elif i % 3 == 1:
+                message = f"embedded run done: runId=ab{i // 6:04x}"
+            else:
+                message = f"res chat.history {i}ms conn=1 sessionId=cd{i // 30:04x} state active"
+            level = "ERROR" if i % 50 == 0 else "INFO"
+            f.write(json.dumps({
+                "0": message,
+                "_meta": {"date": timestamp, "name": "gateway/ws", "logLevelName": level},
+            }) + "\n")
+
+
+def _normalize(report):
+    """去掉与运行时间相关的字段"""
+    report = dict(report)
+    report.pop("analysis_time", None)
+    return json.dumps(report, sort_keys=True, default=str)
+
+
+def test_parallel_analysis_matches_sequential():
+    """测试分块并行分析与顺序分析结果一致"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw-2024-01-15.log"
+        _write_gateway_log(log_file)
+        
+        sequential = OpenClawLogAnalyzer().analyze_file(str(log_file))
+        parallel = OpenClawLogAnalyzer(workers=4, min_chunk_bytes=4096).analyze_file(str(log_file))
+        
+        assert sequential["statistics"]["parsed_lines"] == 600
+        assert _normalize(parallel) == _normalize(sequential)
+
+
+def test_compressed_log_matches_plain():
+    """测试压缩日志与未压缩日志的分析结果一致"""
+    import gzip
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        plain = Path(tmpdir) / "openclaw.log"
+        _write_gateway_log(plain, 2000)
+        compressed = Path(tmpdir) / "openclaw.log.1.gz"
+        with gzip.open(compressed, "wb") as f:
+            f.write(plain.read_bytes())
+        
+        expected = OpenClawLogAnalyzer().analyze_file(str(plain))
+        actual = OpenClawLogAnalyzer().analyze_file(str(compressed))
+        
+        assert _normalize(actual) == _normalize(expected)
+
+
+def test_streaming_aggregation_is_bounded():
+    """测试只保留最近事件和错误模板，汇总数字仍覆盖全部日志"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw.log"
+        _write_gateway_log(log_file, 6000)
+        
+        analyzer = OpenClawLogAnalyzer()
+        report = analyzer.analyze_file(str(log_file))
+        
+        assert len(analyzer.events) == 100
+        assert len(analyzer.error_templates) == 3
+        assert report["errors"]["total"] == 120
+        assert sum(item["count"] for item in report["errors"]["templates"]) == 120
+        assert sum(report["event_distribution"].values()) == 6000
+        assert report["details"]["recent_events"][-1]["line_num"] == 6000
+        assert report["time_range"] == {"start": "2024-01-15T10:00:00.000Z", "end": "2024-01-15T10:59:59.000Z"}
+
+
+def test_resume_from_snapshot_matches_full_analysis():
+    """测试从快照继续分析追加内容的结果与完整分析一致，截断后重新分析"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        full_log = Path(tmpdir) / "full.log"
+        _write_gateway_log(full_log, 3000)
+        content = full_log.read_bytes()
+        expected = OpenClawLogAnalyzer().analyze_file(str(full_log))
+        
+        log_file = Path(tmpdir) / "openclaw.log"
+        state_dir = Path(tmpdir) / "state"
+        cut = content.index(b"\n", len(content) // 2) + 10  # 第一次分析时最后一行尚未写完
+        log_file.write_bytes(content[:cut])
+        
+        first = OpenClawLogAnalyzer(state_dir=str(state_dir)).analyze_file(str(log_file))
+        assert first["statistics"]["total_lines"] < expected["statistics"]["total_lines"]
+        assert len(list(state_dir.glob("*.json.gz"))) == 1
+        
+        with open(log_file, "ab") as f:
+            f.write(content[cut:])
+        resumed = OpenClawLogAnalyzer(state_dir=str(state_dir)).analyze_file(str(log_file))
+        assert _normalize(resumed) == _normalize(expected)
+        
+        # 截断：丢弃快照重新分析
+        log_file.write_bytes(content[:content.index(b"\n") + 1])
+        truncated = OpenClawLogAnalyzer(state_dir=str(state_dir)).analyze_file(str(log_file))
+        assert truncated["statistics"]["total_lines"] == 1
+
+
+def test_analyze_files_merges_per_file_results():
+    """测试多文件并行分析的合并结果与单文件分析一致，时间窗口只统计窗口内的事件"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        full_log = Path(tmpdir) / "full.log"
+        _write_gateway_log(full_log, 3000)
+        lines = full_log.read_bytes().splitlines(keepends=True)
+        expected = OpenClawLogAnalyzer().analyze_file(str(full_log))
+        
+        parts = []
+        for i, start in enumerate(range(0, 3000, 1000)):
+            part = Path(tmpdir) / f"openclaw.log.{3 - i}"
+            part.write_bytes(b"".join(lines[start:start + 1000]))
+            parts.append(str(part))
+        
+        for workers in (1, 3):
+            merged = OpenClawLogAnalyzer(workers=workers).analyze_files(parts)
+            for key in ("statistics", "event_distribution", "time_range", "runs", "sessions"):
+                assert merged[key] == expected[key]
+            assert merged["errors"]["total"] == expected["errors"]["total"]
+        
+        window = ("2024-01-15T10:10:00", "2024-01-15T10:20:00")
+        windowed = OpenClawLogAnalyzer(workers=3).analyze_files(parts, window)
+        assert sum(windowed["event_distribution"].values()) == 600
+        assert windowed["time_range"] == {"start": "2024-01-15T10:10:00.000Z", "end": "2024-01-15T10:19:59.000Z"}
+
+
+def test_parallel_chunks_respect_time_window():
+    """测试单个文件分块并行分析时时间窗口同样生效，结果与顺序分析一致"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw.log"
+        _write_gateway_log(log_file, 3000)
+        window = ("2024-01-15T10:10:00", "2024-01-15T10:20:00")
+        
+        sequential = OpenClawLogAnalyzer().analyze_files([str(log_file)], window)
+        parallel = OpenClawLogAnalyzer(workers=4, min_chunk_bytes=4096).analyze_files([str(log_file)], window)
+        
+        assert sum(sequential["event_distribution"].values()) == 600
+        assert parallel["time_range"] == {"start": "2024-01-15T10:10:00.000Z", "end": "2024-01-15T10:19:59.000Z"}
+        assert _normalize(parallel) == _normalize(sequential)
+
+
+def test_event_matcher_matches_keyword_checks():
+    """测试 EventMatcher 与逐个关键字判断的结果一致（包括重叠和互为子串的关键字）"""
+    from openclawmonitor.monitor.event_matcher import EventMatcher
+    
+    # (消息, 子系统, 事件类型, API 方法, 渠道, 是否失败)；期望值来自逐个关键字判断的参考实现
+    cases = [
+        ("embedded run start: runId=ab12", "agent/embedded", "run_start", None, None, False),
+        ("embedded run done", "agent/embedded", "run_complete", None, None, False),
+        ("reconnection closed", "tools", "connection_closed", None, None, False),
+        ("signaline", "delivery", "other", None, "signal", False),
+        ("agent.turnostr", "delivery", "other", None, "nostr", False),
+        ("telegrammatrix", "delivery", "other", None, "telegram", False),
+        ("res chat.history 12ms conn=1", "gateway/ws", "gateway_event", "chat.history", None, False),
+        ("xres chat.history method=agent.reply", "gateway/ws", "gateway_event", "agent.reply", None, False),
+        ("control-ui connected", "gateway/ws", "gateway_event", None, "webchat", False),
+        ("inbound from slack", "gateway/channels/slack", "gateway_event", None, "slack", False),
+        ("Delivery FAILED via models.list", "agent", "other", "models.list", None, True),
+        ("read /Users/dev/file.txt", "tools", "file_access", None, None, False),
+        ("", "gateway", "gateway_event", None, None, False),
+    ]
+    matcher = EventMatcher()
+    for message, subsystem, *expected in cases:
+        assert matcher.match(message, subsystem)[:4] == tuple(expected), message
+
+
+def test_extract_event_keeps_single_message_copy():
+    """测试事件只保存一份原始消息，ANSI 控制字符只在匹配时去除"""
+    analyzer = OpenClawLogAnalyzer()
+    
+    plain = {"0": "embedded run start: runId=ab12", "_meta": {"date": "2024-01-15T10:00:00Z", "name": "agent"}}
+    event, _ = analyzer._extract_event(plain, 1)
+    assert event["message"] is plain["0"]
+    assert "clean_message" not in event
+    
+    colored = {"0": "\x1b[32mres\x1b[39m chat.history 5ms", "1": {"ok": True}, "_meta": {"name": "gateway/ws"}}
+    event, match = analyzer._extract_event(colored, 2)
+    assert event["message"] == '\x1b[32mres\x1b[39m chat.history 5ms {"ok": true}'
+    assert match[1] == "chat.history"
+    
+    analyzer._window = ("2024-01-16", None)
+    assert analyzer._extract_event(plain, 3) is None
+
+
+def test_tokenize_message_and_latency_sketch():
+    """测试网关消息切分（包括紧挨标点、括号的字段），以及延迟草图的分位数精度和合并"""
+    import random
+    from openclawmonitor.monitor.event_matcher import token_id, tokenize_message
+    from openclawmonitor.utils.latency_sketch import LatencySketch
+    
+    tokens = tokenize_message("res chat.history 61ms conn=ab12, id=7")
+    assert tokens == {
+        "direction": "res",
+        "method": "chat.history",
+        "duration_ms": 61.0,
+        "fields": {"conn": "ab12", "id": "7"},
+    }
+    assert tokenize_message("embedded run done: runId=ab12 durationMs=5300")["duration_ms"] == 5300.0
+    
+    # 字段紧挨着标点或括号时同样取出标识
+    for message in ("embedded run start (runId=ab12)", "embedded run start runId=ab12,sessionId=cd34;",
+                    "embedded run start [runId=ab12] {sessionId=cd34}"):
+        tokens = tokenize_message(message)
+        assert token_id(tokens, "runId") == "ab12", message
+    assert token_id(tokenize_message("runId=ab12,sessionId=cd34;"), "sessionId") == "cd34"
+    assert token_id(tokenize_message("[runId=ab12] {sessionId=cd34}"), "sessionId") == "cd34"
+    
+    rng = random.Random(0)
+    values = [rng.lognormvariate(4, 1) for _ in range(20000)]
+    whole = LatencySketch()
+    parts = [LatencySketch(), LatencySketch()]
+    for i, value in enumerate(values):
+        whole.add(value)
+        parts[i % 2].add(value)
+    merged = LatencySketch.from_dict(parts[0].to_dict())
+    merged.merge(parts[1])
+    
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(whole.quantile(q) - exact) <= 0.011 * exact
+        assert merged.quantile(q) == whole.quantile(q)
+    assert merged.count == whole.count and merged.max == whole.max
+
+
+def test_report_includes_api_latency_percentiles():
+    """测试报告的 API 部分包含各方法的延迟分位数，并行分析结果一致"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw.log"
+        _write_gateway_log(log_file, 3000)
+        
+        report = OpenClawLogAnalyzer().analyze_file(str(log_file))
+        parallel = OpenClawLogAnalyzer(workers=3, min_chunk_bytes=4096).analyze_file(str(log_file))
+        
+        latency = report["api_usage"]["latency"]["chat.history"]
+        assert latency["count"] == 1000
+        assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"] == 2999.0
+        assert parallel["api_usage"]["latency"] == report["api_usage"]["latency"]
+
+
+def test_lifecycle_durations_concurrency_and_timeouts():
+    """测试运行/会话时长分位数、扫描线并发度和超时运行，分文件归并结果一致"""
+    entries = [
+        ("10:00:00", "embedded run start: runId=aa01", "agent"),
+        ("10:00:00", "session state active sessionId=5a01", "agent"),
+        ("10:00:05", "embedded run start: runId=bb02", "agent"),
+        ("10:00:10", "embedded run done: runId=aa01", "agent"),
+        ("10:00:10", "session event sessionId=5b02", "agent"),
+        ("10:00:20", "embedded run start: runId=cc03", "agent"),
+        ("10:00:20", "session event sessionId=5b02", "agent"),
+        ("10:00:25", "embedded run done: runId=bb02", "agent"),
+        ("10:00:30", "session state closed sessionId=5a01", "agent"),
+        ("11:00:00", "gateway listening on ws://127.0.0.1:18789", "gateway"),
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for part in (entries[:5], entries[5:]):
+            path = Path(tmpdir) / f"openclaw-{len(paths)}.log"
+            with open(path, "w", encoding="utf-8") as f:
+                for clock, message, subsystem in part:
+                    f.write(json.dumps({"0": message, "_meta": {"date": f"2024-01-15T{clock}.000Z", "name": subsystem}}) + "\n")
+            paths.append(str(path))
+        
+        analyzer = OpenClawLogAnalyzer(run_timeout_minutes=30)
+        report = analyzer.analyze_files(paths)
+        
+        runs = report["lifecycle"]["runs"]
+        assert runs["durations"] == {"count": 2, "avg": 15.0, "p50": 10.0, "p95": 10.0, "p99": 10.0, "max": 20.0}
+        assert runs["concurrency"]["peak"] == 2
+        assert runs["concurrency"]["peak_at"] == "2024-01-15T10:00:05Z"
+        # A 10 秒 + B 20 秒 + 超时的 C 计到 30 分钟，除以 1 小时的分析范围
+        assert runs["concurrency"]["average"] == round(1830 / 3600, 2)
+        assert runs["timed_out"] == 1
+        assert runs["timed_out_runs"] == [{"run_id": "cc03", "start": "2024-01-15T10:00:20.000Z"}]
+        
+        sessions = report["lifecycle"]["sessions"]
+        assert sessions["durations"]["count"] == 2 and sessions["durations"]["max"] == 30.0
+        assert sessions["concurrency"]["peak"] == 2
+        assert report["runs"] == {"total": 3, "completed": 2, "running": 1, "unknown": 0}
+        assert report["sessions"] == {"total": 2, "active": 1, "inactive": 1}
+        
+        single = Path(tmpdir) / "openclaw-all.log"
+        single.write_text("".join(Path(p).read_text(encoding="utf-8") for p in paths), encoding="utf-8")
+        whole = OpenClawLogAnalyzer(run_timeout_minutes=30).analyze_file(str(single))
+        assert whole["lifecycle"] == report["lifecycle"]
+
+
+def test_lifecycle_parses_z_suffix_without_311_fromisoformat(monkeypatch):
+    """测试 "Z" 结尾的时间戳在 fromisoformat 不接受 "Z" 时（Python 3.11 之前）仍能解析"""
+    from datetime import datetime
+    from openclawmonitor.monitor import lifecycle
+    
+    class StrictDatetime(datetime):
+        @classmethod
+        def fromisoformat(cls, text):
+            if text.endswith("Z"):
+                raise ValueError(f"Invalid isoformat string: {text!r}")
+            return super().fromisoformat(text)
+    
+    monkeypatch.setattr(lifecycle, "datetime", StrictDatetime)
+    assert lifecycle.parse_timestamp("2024-01-15T10:00:00.000Z") == lifecycle.parse_timestamp("2024-01-15T10:00:00+00:00")
+    
+    tracker = lifecycle.LifecycleTracker(run_timeout_seconds=60)
+    tracker.on_run("aa01", "run_start", "2024-01-15T10:00:00.000Z")
+    tracker.on_run("aa01", "run_complete", "2024-01-15T10:00:10.000Z")
+    tracker.on_run("bb02", "run_start", "2024-01-15T10:00:05.000Z")
+    summary = tracker.summary("2024-01-15T10:00:00.000Z", "2024-01-15T10:05:00.000Z")
+    assert summary["runs"]["durations"]["count"] == 1 and summary["runs"]["durations"]["max"] == 10.0
+    assert summary["runs"]["concurrency"]["peak"] == 2
+    assert summary["runs"]["timed_out"] == 1
+
+
+def test_lifecycle_evicts_timed_out_runs_within_budget():
+    """测试生命周期跟踪超出预算时先淘汰已超时的运行并计入超时，条目数有界且总数守恒"""
+    from openclawmonitor.monitor.lifecycle import LifecycleTracker
+
+    tracker = LifecycleTracker(run_timeout_seconds=60, max_entries=10)
+    # 5 个运行开始后再无下文（超时），其余每个运行 1 秒内完成
+    for i in range(5):
+        tracker.on_run(f"lost{i}", "run_start", f"2024-01-15T10:00:0{i}Z")
+    for i in range(40):
+        start = f"2024-01-15T10:{10 + i // 60:02d}:{i % 60:02d}Z"
+        tracker.on_run(f"ok{i:02d}", "run_start", start)
+        tracker.on_run(f"ok{i:02d}", "run_complete", start)
+        tracker.on_session(f"s{i:02d}", start)
+
+    assert len(tracker.runs) <= 10 and len(tracker.sessions) <= 10
+    run_counts, session_counts = tracker.status_counts()
+    assert run_counts == {"total": 45, "completed": 40, "running": 5, "unknown": 0}
+    assert session_counts == {"total": 40, "active": 40, "inactive": 0}
+
+    summary = tracker.summary("2024-01-15T10:00:00Z", "2024-01-15T10:11:00Z")
+    assert summary["runs"]["timed_out"] == 5
+    assert [item["run_id"] for item in summary["runs"]["timed_out_runs"]] == [f"lost{i}" for i in range(5)]
+    assert summary["runs"]["evicted"] == 45 - len(tracker.runs)
+
+    # 导出再归并后淘汰统计不丢失
+    merged = LifecycleTracker(run_timeout_seconds=60, max_entries=10)
+    merged.merge(json.loads(json.dumps(tracker.export(), default=sorted)))
+    assert merged.status_counts() == (run_counts, session_counts)
+    assert merged.summary("2024-01-15T10:00:00Z", "2024-01-15T10:11:00Z")["runs"]["timed_out"] == 5
+
+
+def test_error_templates_cover_all_errors_within_budget():
+    """测试错误模板：数字、标识归并为通配符，非数字变量在聚类时合并，超出预算时总数守恒"""
+    from openclawmonitor.monitor.error_templates import ErrorTemplateMiner, mask_message
+    
+    assert mask_message("connect 10.0.0.1 failed after 61ms runId=ab12") == "connect <*> failed after <*> runId=<*>"
+    
+    miner = ErrorTemplateMiner()
+    for i in range(300):
+        miner.add(f"request {i} timed out after {i * 7}ms", f"2024-01-15T10:{i // 60:02d}:{i % 60:02d}Z")
+    for name in ("alice", "bob", "carol"):
+        miner.add(f"user {name} not found", "2024-01-15T11:00:00Z")
+    
+    top = miner.top()
+    assert [(item["template"], item["count"]) for item in top] == [
+        ("request <*> timed out after <*>", 300),
+        ("user <*> not found", 3),
+    ]
+    assert top[0]["first_seen"] == "2024-01-15T10:00:00Z"
+    assert top[0]["last_seen"] == "2024-01-15T10:04:59Z"
+    assert top[0]["sample"] == "request 0 timed out after 0ms"
+    
+    # 分段归并与一次性统计一致
+    first, second = ErrorTemplateMiner(), ErrorTemplateMiner()
+    for i in range(300):
+        (first if i < 150 else second).add(f"request {i} timed out after {i * 7}ms", f"2024-01-15T10:{i // 60:02d}:{i % 60:02d}Z")
+    for name in ("alice", "bob", "carol"):
+        second.add(f"user {name} not found", "2024-01-15T11:00:00Z")
+    first.merge(second.export())
+    assert first.top() == top
+    
+    bounded = ErrorTemplateMiner(max_templates=10)
+    for i in range(100):
+        bounded.add(f"code{chr(97 + i % 26)}{chr(97 + i // 26)} failed")
+    assert len(bounded) <= 10
+    assert sum(entry["count"] for entry in bounded.templates.values()) + bounded.evicted == 100
+
+
+def test_timeline_buckets_merge_by_addition():
+    """测试按分钟分桶的活动计数：各维度计数正确，分文件归并与整体分析一致"""
+    from openclawmonitor.utils.time_buckets import TimeBuckets
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw.log"
+        _write_gateway_log(log_file, 600)
+        
+        report = OpenClawLogAnalyzer().analyze_file(str(log_file))
+        timeline = report["timeline"]
+        assert timeline["start"] == "2024-01-15T10:00:00Z"
+        assert timeline["buckets"] == 10
+        assert timeline["total"] == [60] * 10
+        assert timeline["series"]["level"]["ERROR"] == [2, 1, 1, 1, 1, 2, 1, 1, 1, 1]
+        assert sum(timeline["series"]["method"]["chat.history"]) == 200
+        
+        coarse = OpenClawLogAnalyzer(bucket_minutes=5).analyze_file(str(log_file))
+        assert coarse["timeline"]["total"] == [300, 300]
+    
+    later, earlier = TimeBuckets(("type",)), TimeBuckets(("type",))
+    later.add("2024-01-15T10:05:30.000Z", "a")
+    earlier.add("2024-01-15T10:01:00.000Z", "a")
+    earlier.add("2024-01-15T10:02:00+00:00", "b")
+    later.merge(earlier.export())
+    summary = later.summary()
+    assert summary["start"] == "2024-01-15T10:01:00Z"
+    assert summary["series"]["type"] == {"a": [1, 0, 0, 0, 1], "b": [0, 1, 0, 0, 0]}
+    assert summary["total"] == [1, 1, 0, 0, 1]
+
+
+def test_tail_file_reads_only_appended_lines():
+    """测试实时跟踪：只分析新追加的完整行，截断后从头读取，from_end 跳过已有内容"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = Path(tmpdir) / "openclaw.log"
+        _write_gateway_log(log_file, 60)
+        lines = log_file.read_bytes().splitlines(keepends=True)
+        
+        analyzer = OpenClawLogAnalyzer()
+        log_file.write_bytes(b"".join(lines[:40]) + lines[40][:10])
+        assert analyzer.tail_file(str(log_file)) == 40
+        assert analyzer.tail_file(str(log_file)) == 0
+        
+        # 补全未写完的一行并追加
+        with open(log_file, "ab") as f:
+            f.write(lines[40][10:] + b"".join(lines[41:]))
+        assert analyzer.tail_file(str(log_file)) == 20
+        
+        expected = OpenClawLogAnalyzer().analyze_file(str(log_file))
+        report = analyzer.current_report()
+        assert report["statistics"]["parsed_lines"] == 60
+        assert report["lifecycle"] == expected["lifecycle"]
+        assert report["timeline"] == expected["timeline"]
+        
+        # 截断（轮转后重新创建）时从头读取
+        log_file.write_bytes(b"".join(lines[:5]))
+        assert analyzer.tail_file(str(log_file)) == 5
+        assert analyzer.current_report()["statistics"]["parsed_lines"] == 65
+        
+        # from_end：第一次只记录位置
+        tail = OpenClawLogAnalyzer()
+        assert tail.tail_file(str(log_file), from_end=True) == 0
+        with open(log_file, "ab") as f:
+            f.write(b"".join(lines[5:8]))
+        assert tail.tail_file(str(log_file)) == 3
+        assert tail.current_report()["statistics"]["parsed_lines"] == 3
+        
+        tail.reset()
+        assert tail.current_report()["statistics"]["parsed_lines"] == 0
+        assert tail.tail_file(str(Path(tmpdir) / "missing.log")) == 0
@@ -0,0 +1,96 @@
+"""
+单元测试 - 文件变更事件处理测试
+"""
+
+import threading
+import time
+import tempfile
+from pathlib import Path
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+from openclawmonitor.monitor.watchdog_handler import LogFileHandler
+
+
+def _wait_for(predicate, timeout: float = 5.0):
+    """等待条件成立"""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_modify_events_are_debounced_and_coalesced():
+    """测试同一文件的大量修改事件合并为一次读取，回调在工作线程中执行"""
+    calls = []
+    handler = LogFileHandler(lambda path: calls.append((path, threading.current_thread().name)),
+                             debounce_seconds=0.2)
+    handler.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = str(Path(tmpdir) / "openclaw.log")
+            other_file = str(Path(tmpdir) / "commands.jsonl")
+            Path(log_file).write_text("x\n")
+            
+            for _ in range(200):
+                handler.on_modified(FileModifiedEvent(log_file))
+            handler.on_modified(FileModifiedEvent(other_file))
+            handler.on_modified(FileModifiedEvent(str(Path(tmpdir) / "notes.txt")))
+            assert calls == []
+            
+            assert _wait_for(lambda: len(calls) == 2)
+            time.sleep(0.3)
+            assert sorted(path for path, _ in calls) == sorted([log_file, other_file])
+            assert all(name == "log-file-handler" for _, name in calls)
+            assert handler.stats["coalesced"] == 199
+            
+            # 窗口过后的修改再次触发读取
+            handler.on_modified(FileModifiedEvent(log_file))
+            assert _wait_for(lambda: len(calls) == 3)
+    finally:
+        handler.stop()
+
+
+def test_rotation_events_move_or_reset_cursor():
+    """测试重命名先转移游标再读取新路径，删除、重新创建和截断清除游标"""
+    actions = []
+    handler = LogFileHandler(
+        lambda path: actions.append(("read", Path(path).name)),
+        debounce_seconds=0.05,
+        reset_callback=lambda path: actions.append(("reset", Path(path).name)),
+        move_callback=lambda src, dest: actions.append(("moved", Path(src).name, Path(dest).name)),
+    )
+    handler.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = Path(tmpdir) / "openclaw.log"
+            rotated = Path(tmpdir) / "openclaw.log.1"
+            log_file.write_text("a\nb\n")
+            handler.on_modified(FileModifiedEvent(str(log_file)))
+            assert _wait_for(lambda: actions == [("read", "openclaw.log")])
+            
+            # 轮转：重命名 + 在原路径新建
+            actions.clear()
+            log_file.rename(rotated)
+            handler.on_modified(FileModifiedEvent(str(log_file)))
+            handler.on_moved(FileMovedEvent(str(log_file), str(rotated)))
+            log_file.write_text("c\n")
+            handler.on_created(FileCreatedEvent(str(log_file)))
+            assert _wait_for(lambda: len(actions) == 4)
+            assert actions[0] == ("moved", "openclaw.log", "openclaw.log.1")
+            assert sorted(actions[1:]) == [("read", "openclaw.log"), ("read", "openclaw.log.1"), ("reset", "openclaw.log")]
+            
+            # 截断
+            actions.clear()
+            log_file.write_text("")
+            handler.on_modified(FileModifiedEvent(str(log_file)))
+            assert _wait_for(lambda: len(actions) == 2)
+            assert actions == [("reset", "openclaw.log"), ("read", "openclaw.log")]
+            
+            # 删除：只清除游标
+            actions.clear()
+            rotated.unlink()
+            handler.on_deleted(FileDeletedEvent(str(rotated)))
+            assert _wait_for(lambda: len(actions) == 1)
+            time.sleep(0.1)
+            assert actions == [("reset", "openclaw.log.1")]
+    finally:
+        handler.stop()